@@ -0,0 +1,647 @@
+"""
+EqualAreaEngine.py: In-process area calculations for the Equal Area Polygon tool.
+
+The Equal Area Polygon tool needs the area of a polygon on each side of a horizontal line many times while it searches
+for the balanced line. Running CreateFeatureclass, FeatureToPolygon and Clip for every guess is slow. This module loads
+the rings of the polygon into NumPy arrays once and answers the same question with a vectorized calculation.
+
+The area is found with Green's theorem, A = the line integral of x dy around every ring. A horizontal cut line has
+dy = 0, so the part of the polygon south of y = c is just the sum of the integral over the pieces of each edge that lie
+south of c. There is no need to build the clipped rings. Holes and multipart shapes are handled for free, because holes
+wind the opposite way to outer rings and subtract from the total.
+
+This module does not import arcpy, so it can also be used from worker processes and scripts outside ArcMap. The
+per-feature mode of the tool sends each feature's edges to the worker processes of EqualAreaWorker.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import hashlib
+import json
+import numpy as np
+import os
+import tempfile
+import time
+
+# FLAT_EDGE: DOUBLE edges whose change in height is smaller than this fraction of the polygon's size are treated as
+#   horizontal.
+FLAT_EDGE = 0.0000000001
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def ringsToEdges(rings):
+    """
+    Convert a list of rings into an array of edges.
+
+    Each ring is closed by joining its last vertex to its first. A ring that already repeats its first vertex gains a
+    zero length edge, which does not change any area.
+
+    :param rings: LIST a list of rings, each a sequence of (x, y) vertices.
+    :return: ARRAY an (n, 4) array of edges where each row is x0, y0, x1, y1.
+    """
+    blocks = []
+    for ring in rings:
+        ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+        if len(ring) < 3:
+            continue
+        blocks.append(np.hstack([ring, np.roll(ring, -1, axis=0)]))
+
+    if not blocks:
+        return np.zeros((0, 4), dtype=np.float64)
+
+    return np.vstack(blocks)
+
+
+def buildEdgeTable(edges):
+    """
+    Precompute everything the area calculations need from an array of edges.
+
+    Horizontal edges never contribute to the area and are dropped. So are edges that are within FLAT_EDGE of horizontal,
+    because their huge slopes would swamp the sums with rounding error while adding almost nothing to the area. The
+    orientation of the rings is stored so the areas returned are positive whichever way the outer rings wind.
+
+    :param edges: ARRAY an (n, 4) array of edges from ringsToEdges.
+    :return: DICT the edge table:
+
+            table = {
+                "lo": the lower y of each edge,
+                "hi": the upper y of each edge,
+                "x_lo": the x of each edge at its lower y, measured from x_min,
+                "slope": the change in x per unit of y along each edge,
+                "sign": +1 for edges going north and -1 for edges going south, times the ring orientation,
+                "total": the total area of the polygon,
+                "x_min", "x_max", "y_min", "y_max": the extent of the polygon
+            }
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+
+    if len(edges):
+        x_min, x_max = float(np.min(edges[:, [0, 2]])), float(np.max(edges[:, [0, 2]]))
+        y_min, y_max = float(np.min(edges[:, [1, 3]])), float(np.max(edges[:, [1, 3]]))
+    else:
+        x_min = x_max = y_min = y_max = 0.0
+
+    # Measure x from the left of the extent so the sums keep their precision on large projected coordinates.
+    x0, y0, x1, y1 = edges[:, 0] - x_min, edges[:, 1], edges[:, 2] - x_min, edges[:, 3]
+
+    dy = y1 - y0
+    keep = np.abs(dy) > FLAT_EDGE * max(x_max - x_min, y_max - y_min)
+    x0, y0, x1, y1, dy = x0[keep], y0[keep], x1[keep], y1[keep], dy[keep]
+
+    slope = (x1 - x0) / dy
+    lo = np.minimum(y0, y1)
+    hi = np.maximum(y0, y1)
+    x_lo = np.where(y0 <= y1, x0, x1)
+    sign = np.sign(dy)
+
+    # Line integral of x dy around all rings. Positive when the outer rings wind counter-clockwise.
+    signed_total = np.sum(sign * (hi - lo) * (x0 + x1) / 2.0)
+    orientation = -1.0 if signed_total < 0 else 1.0
+
+    return {
+        "lo": lo,
+        "hi": hi,
+        "x_lo": x_lo,
+        "slope": slope,
+        "sign": sign * orientation,
+        "total": abs(float(signed_total)),
+        "x_min": x_min,
+        "x_max": x_max,
+        "y_min": y_min,
+        "y_max": y_max
+    }
+
+
+def areaBelow(table, cut_y):
+    """
+    Return the area of the polygon south of a horizontal line.
+
+    :param table: DICT an edge table from buildEdgeTable.
+    :param cut_y: DOUBLE or ARRAY the y value of the line. An array returns the area below each value.
+    :return: DOUBLE or ARRAY the area south of the line.
+    """
+    cut_y = np.asarray(cut_y, dtype=np.float64)
+    c = cut_y[..., np.newaxis]
+
+    top = np.minimum(np.maximum(c, table["lo"]), table["hi"])
+    height = top - table["lo"]
+    mid_x = table["x_lo"] + table["slope"] * height / 2.0
+
+    area = np.sum(table["sign"] * height * mid_x, axis=-1)
+
+    if area.ndim == 0:
+        return float(area)
+    return area
+
+
+def areaAboveBelow(table, cut_y):
+    """
+    Return the area of the polygon north and south of a horizontal line.
+
+    :param table: DICT an edge table from buildEdgeTable.
+    :param cut_y: DOUBLE the y value of the line.
+    :return: DOUBLE the area north of the line.
+    :return: DOUBLE the area south of the line.
+    """
+    below = areaBelow(table, cut_y)
+    return table["total"] - below, below
+
+
+def overlappingBoxes(boxes):
+    """
+    Yield every pair of bounding boxes whose interiors overlap.
+
+    A sort and sweep index: the boxes are sorted by their left side once, then swept from left to right keeping only
+    the boxes that are still open. Boxes that only share an edge or a corner do not count, so neighbouring parcels
+    that line up on a shared boundary are never reported.
+
+    :param boxes: ARRAY an (n, 4) array of boxes where each row is x_min, y_min, x_max, y_max.
+    :return: GENERATOR of (i, j) index pairs into boxes.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    active = []
+    for i in np.argsort(boxes[:, 0], kind="mergesort"):
+        x_min, y_min, x_max, y_max = boxes[i]
+        active = [j for j in active if boxes[j, 2] > x_min]
+        for j in active:
+            if boxes[j, 1] < y_max and y_min < boxes[j, 3]:
+                yield int(j), int(i)
+        active.append(i)
+
+
+def buildAreaProfile(table):
+    """
+    Build the exact area south of a horizontal line as a function of the line's height.
+
+    Between two neighbouring vertex heights the same edges cross the line, so the width of the polygon along the line
+    changes linearly and the area below the line is a quadratic. The vertex heights are sorted once and the width and
+    area at each of them are accumulated in a single pass, giving the whole piecewise quadratic.
+
+    Heights are measured from the bottom of the extent so the sums keep their precision on large projected coordinates.
+
+    :param table: DICT an edge table from buildEdgeTable.
+    :return: DICT the area profile:
+
+            profile = {
+                "ys": the sorted unique vertex heights,
+                "area": the area below each height in ys,
+                "width": the width of the polygon just above each height in ys, except the last,
+                "rate": how fast the width changes with height inside each slab,
+                "total": the total area of the polygon
+            }
+    """
+    y_ref = table["y_min"]
+    lo = table["lo"] - y_ref
+    hi = table["hi"] - y_ref
+
+    ys = np.unique(np.concatenate([lo, hi]))
+    i_lo = np.searchsorted(ys, lo)
+    i_hi = np.searchsorted(ys, hi)
+
+    # Each edge adds sign * (x at y) to the width while the line is between its lower and upper heights. Written as
+    # a + b * y, the a and b of every edge are added where the edge starts and removed where it ends.
+    a = table["sign"] * (table["x_lo"] - table["slope"] * lo)
+    b = table["sign"] * table["slope"]
+    n = len(ys)
+    alpha = np.cumsum(np.bincount(i_lo, a, n) - np.bincount(i_hi, a, n))[:-1]
+    beta = np.cumsum(np.bincount(i_lo, b, n) - np.bincount(i_hi, b, n))[:-1]
+
+    width = alpha + beta * ys[:-1]
+    dy = np.diff(ys)
+    slab_area = dy * (width + beta * dy / 2.0)
+
+    return {
+        "ys": ys + y_ref,
+        "area": np.concatenate([[0.0], np.cumsum(slab_area)]),
+        "width": width,
+        "rate": beta,
+        "total": table["total"]
+    }
+
+
+def heightForArea(profile, target_area):
+    """
+    Return the height of the horizontal line with a given area south of it.
+
+    Finds the slab holding each target in the cumulative areas, then solves the slab's quadratic in closed form. There
+    is no iteration, so the answer is exact up to floating point.
+
+    :param profile: DICT an area profile from buildAreaProfile.
+    :param target_area: DOUBLE or ARRAY the area wanted south of the line.
+    :return: DOUBLE or ARRAY the height of the line.
+    """
+    target_area = np.asarray(target_area, dtype=np.float64)
+    ys, area = profile["ys"], profile["area"]
+
+    if len(ys) < 2:
+        return np.full(target_area.shape, ys[0] if len(ys) else 0.0)[()]
+
+    k = np.clip(np.searchsorted(area, target_area, side="right") - 1, 0, len(ys) - 2)
+    remaining = np.clip(target_area - area[k], 0.0, area[k + 1] - area[k])
+    width = profile["width"][k]
+    rate = profile["rate"][k]
+
+    # Solve rate / 2 * t^2 + width * t = remaining for t with the form that stays accurate when rate is near zero.
+    root = np.sqrt(np.maximum(width * width + 2.0 * rate * remaining, 0.0))
+    denominator = width + root
+    safe = np.where(denominator > 0, denominator, 1.0)
+    t = np.where(denominator > 0, 2.0 * remaining / safe, 0.0)
+
+    return np.minimum(ys[k] + t, ys[k + 1])[()]
+
+
+def toCutFrame(x, y, angle):
+    """
+    Rotate coordinates into the frame where cut lines at the given angle are horizontal.
+
+    :param x: DOUBLE or ARRAY x coordinates in the map frame.
+    :param y: DOUBLE or ARRAY y coordinates in the map frame.
+    :param angle: DOUBLE the angle of the cut lines in degrees, counter-clockwise from east.
+    :return: DOUBLE or ARRAY the x and y coordinates in the cut frame.
+    """
+    theta = np.radians(angle)
+    cos, sin = np.cos(theta), np.sin(theta)
+    return x * cos + y * sin, y * cos - x * sin
+
+
+def fromCutFrame(x, y, angle):
+    """
+    Rotate coordinates from the cut frame back into the map frame. The inverse of toCutFrame.
+
+    :param x: DOUBLE or ARRAY x coordinates in the cut frame.
+    :param y: DOUBLE or ARRAY y coordinates in the cut frame.
+    :param angle: DOUBLE the angle of the cut lines in degrees, counter-clockwise from east.
+    :return: DOUBLE or ARRAY the x and y coordinates in the map frame.
+    """
+    theta = np.radians(angle)
+    cos, sin = np.cos(theta), np.sin(theta)
+    return x * cos - y * sin, x * sin + y * cos
+
+
+def rotateEdges(edges, angle):
+    """
+    Rotate an array of edges into the cut frame for the given angle.
+
+    :param edges: ARRAY an (n, 4) array of edges from ringsToEdges.
+    :param angle: DOUBLE the angle of the cut lines in degrees, counter-clockwise from east.
+    :return: ARRAY the rotated (n, 4) array of edges.
+    """
+    if not angle:
+        return edges
+
+    x0, y0 = toCutFrame(edges[:, 0], edges[:, 1], angle)
+    x1, y1 = toCutFrame(edges[:, 2], edges[:, 3], angle)
+    return np.column_stack([x0, y0, x1, y1])
+
+
+def batchCutLengths(edges, angles, fractions, max_cells=2000000):
+    """
+    Return the equal area cut lines and their total length for many candidate angles at once.
+
+    Builds the same piecewise quadratic area profile as buildAreaProfile, but for a block of angles at a time as rows of
+    2D arrays. Vertex heights are sorted row by row and the width changes are accumulated with one flat bincount using
+    row offsets, so no Python loop runs per angle. The length of a cut is the width of the polygon along it, which the
+    profile already holds.
+
+    :param edges: ARRAY an (n, 4) array of edges from ringsToEdges.
+    :param angles: LIST the candidate angles in degrees, counter-clockwise from east.
+    :param fractions: LIST the fraction of the total area wanted south of each cut line, for example [0.5].
+    :param max_cells: INT the largest number of array cells to hold at once. Limits the angles in each block.
+    :return: ARRAY the (angles, fractions) heights of the cut lines in each angle's cut frame.
+    :return: ARRAY the total length of the cut lines for each angle.
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    fractions = np.asarray(fractions, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.float64)
+
+    # Rotate about the middle of the polygon to keep the sums small.
+    center_x = (edges[:, 0].min() + edges[:, 0].max()) / 2.0
+    center_y = (edges[:, 1].min() + edges[:, 1].max()) / 2.0
+    edges = edges - [center_x, center_y, center_x, center_y]
+    span = 2 * np.abs(edges).max() if len(edges) else 0.0
+
+    m = len(edges)
+    block = max(1, int(max_cells // max(2 * m, 1)))
+
+    heights = np.zeros((len(angles), len(fractions)))
+    lengths = np.zeros(len(angles))
+
+    for start in range(0, len(angles), block):
+        theta = np.radians(angles[start:start + block])[:, np.newaxis]
+        rows = len(theta)
+        cos, sin = np.cos(theta), np.sin(theta)
+
+        x0 = edges[:, 0] * cos + edges[:, 1] * sin
+        y0 = edges[:, 1] * cos - edges[:, 0] * sin
+        x1 = edges[:, 2] * cos + edges[:, 3] * sin
+        y1 = edges[:, 3] * cos - edges[:, 2] * sin
+
+        # Rotated edges can come out horizontal or nearly so. They are left out the same way buildEdgeTable drops them.
+        dy = y1 - y0
+        flat = np.abs(dy) <= FLAT_EDGE * span
+        slope = (x1 - x0) / np.where(flat, 1.0, dy)
+        sign = np.where(flat, 0.0, np.sign(dy))
+        lo = np.minimum(y0, y1)
+        hi = np.maximum(y0, y1)
+        x_lo = np.where(y0 <= y1, x0, x1)
+
+        signed_total = np.sum(sign * (hi - lo) * (x0 + x1) / 2.0, axis=1)
+        sign = sign * np.where(signed_total < 0, -1.0, 1.0)[:, np.newaxis]
+        total = np.abs(signed_total)
+
+        # Sort every row of heights and find where each edge starts and ends in its row.
+        row = np.arange(rows)[:, np.newaxis]
+        events = np.concatenate([lo, hi], axis=1)
+        order = np.argsort(events, axis=1, kind="mergesort")
+        ys = events[row, order]
+        rank = np.empty_like(order)
+        rank[row, order] = np.arange(2 * m)
+        offset = (np.arange(rows) * 2 * m)[:, np.newaxis]
+        i_lo = (rank[:, :m] + offset).ravel()
+        i_hi = (rank[:, m:] + offset).ravel()
+
+        a = (sign * (x_lo - slope * lo)).ravel()
+        b = (sign * slope).ravel()
+        cells = rows * 2 * m
+        alpha = np.cumsum((np.bincount(i_lo, a, cells) - np.bincount(i_hi, a, cells)).reshape(rows, 2 * m), axis=1)
+        beta = np.cumsum((np.bincount(i_lo, b, cells) - np.bincount(i_hi, b, cells)).reshape(rows, 2 * m), axis=1)
+
+        width = (alpha + beta * ys)[:, :-1]
+        rate = beta[:, :-1]
+        slab_dy = np.diff(ys, axis=1)
+        area = np.concatenate([np.zeros((rows, 1)),
+                               np.cumsum(slab_dy * (width + rate * slab_dy / 2.0), axis=1)], axis=1)
+
+        for j, fraction in enumerate(fractions):
+            target = (total * fraction)[:, np.newaxis]
+            k = np.clip(np.sum(area <= target, axis=1) - 1, 0, 2 * m - 2)[:, np.newaxis]
+            remaining = np.maximum(target - area[row, k], 0.0)
+            w = width[row, k]
+            r = rate[row, k]
+            root = np.sqrt(np.maximum(w * w + 2.0 * r * remaining, 0.0))
+            t = np.where(w + root > 0, 2.0 * remaining / np.where(w + root > 0, w + root, 1.0), 0.0)
+
+            # Shift the height back from the middle of the polygon to the cut frame of the map coordinates.
+            center_cut = center_y * cos - center_x * sin
+            heights[start:start + rows, j] = (ys[row, k] + t + center_cut)[:, 0]
+            lengths[start:start + rows] += np.abs(w + r * t)[:, 0]
+
+    return heights, lengths
+
+
+def minimumCutAngle(edges, parts=2, step=1.0, refine_step=0.05):
+    """
+    Return the angle whose equal area cut lines are the shortest.
+
+    Every angle from 0 to 180 degrees is tried in steps of step, then the best one is refined with refine_step.
+
+    :param edges: ARRAY an (n, 4) array of edges from ringsToEdges.
+    :param parts: INT the number of equal area strips.
+    :param step: DOUBLE the spacing of the first set of candidate angles in degrees.
+    :param refine_step: DOUBLE the spacing of the candidate angles around the best first angle.
+    :return: DOUBLE the best angle in degrees, counter-clockwise from east.
+    :return: DOUBLE the total length of its cut lines.
+    """
+    fractions = [k / float(parts) for k in range(1, parts)]
+
+    angles = np.round(np.arange(0.0, 180.0, step), 9)
+    heights, lengths = batchCutLengths(edges, angles, fractions)
+    best = angles[np.argmin(lengths)]
+
+    angles = np.round(np.arange(best - step, best + step + refine_step / 2.0, refine_step) % 180.0, 9)
+    heights, lengths = batchCutLengths(edges, angles, fractions)
+    i = np.argmin(lengths)
+
+    return float(angles[i]), float(lengths[i])
+
+
+def cutCacheKey(edges, **params):
+    """
+    Return the key of a polygon and a set of split parameters in the cut cache.
+
+    :param edges: ARRAY an (n, 4) array of edges from ringsToEdges.
+    :param params: the split parameters that change the answer, such as parts and angle. The tolerance is left out so
+        a re-run with a tighter tolerance finds the earlier answer.
+    :return: STRING a SHA-1 hex digest of the coordinates and parameters.
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(edges, dtype=np.float64).tobytes())
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def readCutCache(cache_path):
+    """
+    Return the contents of a cut cache file, or an empty cache if it is missing or unreadable.
+
+    :param cache_path: STRING the path of the JSON cache file.
+    :return: DICT the cache, keyed by cutCacheKey.
+    """
+    try:
+        with open(cache_path, "r") as cache_file:
+            cache = json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def writeCutCache(cache_path, cache):
+    """
+    Write a cut cache file. A cache that cannot be written is skipped, it only makes the next run slower.
+
+    The cache is written under a unique temporary name in the same folder and then replaced over the file in one step,
+    so a run that crashes or a run at the same time never leaves half a file behind.
+
+    :param cache_path: STRING the path of the JSON cache file.
+    :param cache: DICT the cache, keyed by cutCacheKey.
+    :return: VOID
+    """
+    temp_path = None
+    try:
+        handle, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(cache_path)))
+        with os.fdopen(handle, "w") as cache_file:
+            json.dump(cache, cache_file)
+        if hasattr(os, "replace"):
+            os.replace(temp_path, cache_path)
+        else:
+            # Python 2 has no os.replace and cannot rename over a file on Windows, so the old file is removed first.
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            os.rename(temp_path, cache_path)
+    except (IOError, OSError):
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def loadCachedCut(cache_path, key):
+    """
+    Return the cut lines saved for a key.
+
+    Reading does not write the cache. The entry is marked as recently used when the run stores its answer with
+    storeCachedCut.
+
+    :param cache_path: STRING the path of the JSON cache file.
+    :param key: STRING the key from cutCacheKey.
+    :return: DICT the saved entry, {"cut_ys": [...], "angle": ...}, or None.
+    """
+    return readCutCache(cache_path).get(key)
+
+
+def storeCachedCut(cache_path, key, cut_ys, angle, max_entries=64):
+    """
+    Save the cut lines for a key, evicting the least recently used entries once the cache is full.
+
+    :param cache_path: STRING the path of the JSON cache file.
+    :param key: STRING the key from cutCacheKey.
+    :param cut_ys: LIST the heights of the cut lines in the cut frame.
+    :param angle: DOUBLE the angle of the cut lines.
+    :param max_entries: INT the largest number of entries to keep.
+    :return: VOID
+    """
+    cache = readCutCache(cache_path)
+    cache[key] = {"cut_ys": [float(y) for y in cut_ys], "angle": float(angle), "used": time.time()}
+
+    while len(cache) > max_entries:
+        del cache[min(cache, key=lambda k: cache[k].get("used", 0))]
+
+    writeCutCache(cache_path, cache)
+
+
+def streamEdgeChunks(points, origin, angle=0.0, chunk_size=16384):
+    """
+    Turn a stream of vertices into a stream of edge arrays of a fixed size.
+
+    Vertices are copied into one preallocated buffer. Each time it fills, the edges between its vertices are handed
+    out and the last vertex is kept to start the next chunk. Only the buffer and the first vertex of the current ring
+    are held, so memory stays the same however many vertices the polygon has.
+
+    The edges are measured from origin and rotated into the cut frame for angle. Measuring from a point near the
+    polygon keeps the sums accurate on large projected coordinates.
+
+    :param points: ITERABLE of (x, y) vertices, with None after the last vertex of every ring.
+    :param origin: TUPLE the (x, y) point the coordinates are measured from.
+    :param angle: DOUBLE the angle of the cut lines in degrees, counter-clockwise from east.
+    :param chunk_size: INT the number of vertices in the buffer.
+    :return: GENERATOR of (n, 4) edge arrays like ringsToEdges.
+    """
+    buffer = np.empty((chunk_size + 1, 2), dtype=np.float64)
+    n = 0
+    first = None
+
+    def edges(count):
+        vertices = buffer[:count] - origin
+        x, y = toCutFrame(vertices[:, 0], vertices[:, 1], angle)
+        return np.column_stack([x[:-1], y[:-1], x[1:], y[1:]])
+
+    for pnt in points:
+        if pnt is None:
+            # Close the ring back to its first vertex.
+            if first is not None:
+                buffer[n] = first
+                yield edges(n + 1)
+            n = 0
+            first = None
+            continue
+
+        if first is None:
+            first = pnt
+        buffer[n] = pnt
+        n += 1
+
+        if n == chunk_size:
+            yield edges(n)
+            buffer[0] = buffer[n - 1]
+            n = 1
+
+    if first is not None:
+        buffer[n] = first
+        yield edges(n + 1)
+
+
+def signedAreaBelow(edges, cut_ys):
+    """
+    Return the line integral of x dy over the parts of some edges south of each of several horizontal lines.
+
+    The edges do not have to form closed rings, so this can be summed over the chunks of streamEdgeChunks. The sign
+    depends on which way the rings wind.
+
+    :param edges: ARRAY an (n, 4) array of edges.
+    :param cut_ys: ARRAY the y values of the lines.
+    :return: ARRAY the integral below each line.
+    """
+    x0, y0, x1, y1 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+    dy = y1 - y0
+    keep = dy != 0
+    x0, y0, x1, dy = x0[keep], y0[keep], x1[keep], dy[keep]
+
+    slope = (x1 - x0) / dy
+    lo = np.minimum(y0, y0 + dy)
+    x_lo = np.where(dy > 0, x0, x1)
+    sign = np.sign(dy)
+
+    top = np.minimum(np.maximum(np.asarray(cut_ys, dtype=np.float64)[:, np.newaxis], lo), lo + np.abs(dy))
+    height = top - lo
+    return np.sum(sign * height * (x_lo + slope * height / 2.0), axis=1)
+
+
+def streamTotals(chunks):
+    """
+    Return the area and extent of a polygon from a stream of edge chunks, holding only running totals.
+
+    :param chunks: ITERABLE of (n, 4) edge arrays from streamEdgeChunks.
+    :return: DICT the totals:
+
+            totals = {
+                "total": the total area of the polygon,
+                "orientation": +1 if the outer rings wind counter-clockwise, otherwise -1,
+                "x_min", "x_max", "y_min", "y_max": the extent of the polygon in the frame of the chunks,
+                "edges": the number of edges read
+            }
+    """
+    signed_total = 0.0
+    x_min = y_min = np.inf
+    x_max = y_max = -np.inf
+    count = 0
+
+    for chunk in chunks:
+        signed_total += np.sum((chunk[:, 3] - chunk[:, 1]) * (chunk[:, 0] + chunk[:, 2]) / 2.0)
+        x_min = min(x_min, chunk[:, [0, 2]].min())
+        x_max = max(x_max, chunk[:, [0, 2]].max())
+        y_min = min(y_min, chunk[:, [1, 3]].min())
+        y_max = max(y_max, chunk[:, [1, 3]].max())
+        count += len(chunk)
+
+    return {
+        "total": abs(float(signed_total)),
+        "orientation": -1.0 if signed_total < 0 else 1.0,
+        "x_min": float(x_min),
+        "x_max": float(x_max),
+        "y_min": float(y_min),
+        "y_max": float(y_max),
+        "edges": count
+    }
+
+
+def streamAreaBelow(chunks, cut_ys, orientation):
+    """
+    Return the area of a polygon south of each of several horizontal lines from a stream of edge chunks.
+
+    :param chunks: ITERABLE of (n, 4) edge arrays from streamEdgeChunks.
+    :param cut_ys: ARRAY the y values of the lines, in the frame of the chunks.
+    :param orientation: DOUBLE the orientation from streamTotals.
+    :return: ARRAY the area south of each line.
+    """
+    cut_ys = np.asarray(cut_ys, dtype=np.float64)
+    area = np.zeros(len(cut_ys))
+    for chunk in chunks:
+        area += signedAreaBelow(chunk, cut_ys)
+    return area * orientation
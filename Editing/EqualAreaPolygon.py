@@ -1,10 +1,11 @@
-
 """
 EqualAreaPolygon.py: Splits a polygon into equal north south areas.
 
 This script is for an ArcMap Python Toolbox that splits a polygon into two north south equal areas. All features in the
 feature class are merged into one feature before processing. The tool honors selections and will export only the
-selected layers before merging the selected layers and processing.
+selected layers before merging the selected layers and processing. When none of the features overlap the merge is
+skipped, because their areas simply add up. The polygon can also be split into more than two north south strips of
+equal area.
 """
 
 __author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
@@ -15,8 +16,14 @@ __status__ = "Production"
 
 
 import arcpy
+import itertools
+import numpy as np
 import os
 
+import EqualAreaEngine
+import EqualAreaTelemetry
+import EqualAreaWorker
+
 ########################################################################################################################
 #
 #                                                  TOOL PARAMETERS
@@ -28,10 +35,62 @@ import os
 #   polygon with the smallest area / by the polygon with the greatest area. The tool runs until this metric is above the
 #   the user defined tolerance.
 # save_location: POLYGON the location for the resulting split polygon
+# solver: STRING (optional) how the bisecting line is moved between iterations:
+#   INCREMENT - the original fixed step that is divided by 10 each time the line changes direction. (default)
+#   BISECTION - brackets the balanced line between the bottom and top of the extent and halves the bracket each time.
+#   BRENT - brackets the balanced line like BISECTION, but uses the area imbalance to take secant and inverse quadratic
+#       steps. Usually needs the fewest geoprocessing rounds.
+#   SWEEP - builds the exact area below the line as a function of its height and solves for the balanced line directly.
+#       There is no iteration, the tolerance is only checked against the result.
+# parts: LONG (optional) the number of equal area strips to split the polygon into. Defaults to 2. More than 2 parts
+#   always uses the SWEEP solver, which finds every cut line from the same area profile.
+# angle: DOUBLE (optional) the angle of the cut lines in degrees, counter-clockwise from east. Defaults to 0, which
+#   splits the polygon north south. Cuts at an angle are always measured in process with the NUMPY area engine.
+# minimize_cut: BOOLEAN (optional) when true, ignores angle and uses the angle whose cut lines are the shortest.
+# per_feature: BOOLEAN (optional) when true, splits every feature on its own instead of dissolving them into one. The
+#   features are split by a pool of worker processes, one per core, and every piece is tagged with the OID of the
+#   feature it came from. Always uses the SWEEP solver.
+# use_cache: BOOLEAN (optional) when true, the cut lines of every run are saved in a small cache in the
+#   scratch folder. A re-run on the same polygon with the same parts and angle starts from the saved lines, and
+#   returns straight away if they already meet the tolerance.
+# streaming: BOOLEAN (optional) when true, the polygon is never loaded in full. Its vertices are read in fixed size
+#   chunks and every pass over them keeps only running totals, so memory stays flat on huge coastline polygons. The
+#   intermediate feature classes are written to the scratch geodatabase instead of in_memory. Every pass measures
+#   many lines at once, so only a few passes are needed. Does not use the cache or minimize_cut.
+# write_telemetry: BOOLEAN (optional) when true, the time of every stage of every iteration, the solver state and the
+#   peak memory are written as JSON lines to <output name>_telemetry.jsonl in the folder that holds the output.
+# area_engine: STRING (optional) how the BISECTION and BRENT solvers measure the area on each side of the line:
+#   GEOPROCESSING - runs CreateFeatureclass, FeatureToPolygon and Clip for every guess. (default)
+#   NUMPY - loads the rings of the polygon into NumPy arrays once and measures the areas in process. Geoprocessing only
+#       runs once to write the output.
+
+
+def optionalParameter(index, as_text=True):
+    """
+    Returns an optional tool parameter, or an empty value when the toolbox does not declare it. A toolbox saved before
+    the parameter was added still runs the tool, with the parameter's default.
+
+    :param index: INT the position of the parameter.
+    :param as_text: BOOLEAN true for the text of the parameter, false for its value.
+    :return: the parameter, or "" as text and None as a value when the toolbox does not declare it.
+    """
+    if index >= arcpy.GetArgumentCount():
+        return "" if as_text else None
+    return arcpy.GetParameterAsText(index) if as_text else arcpy.GetParameter(index)
+
 
 in_fc = arcpy.GetParameterAsText(0)
 tolerance = float(arcpy.GetParameterAsText(1))
 save_location = arcpy.GetParameterAsText(2)
+solver = (optionalParameter(3) or "INCREMENT").upper()
+area_engine = (optionalParameter(4) or "GEOPROCESSING").upper()
+parts = int(optionalParameter(5) or 2)
+angle = float(optionalParameter(6) or 0.0)
+minimize_cut = optionalParameter(7).lower() == "true"
+per_feature = optionalParameter(8).lower() == "true"
+use_cache = optionalParameter(9).lower() == "true"
+streaming = optionalParameter(10).lower() == "true"
+write_telemetry = optionalParameter(11).lower() == "true"
 
 
 ########################################################################################################################
@@ -102,6 +161,38 @@ def bisectExtent(line_fc, X_max, X_min, Y_max, Y_min, start_x, start_y, end_x, e
     cursor.insertRow([arcpy.Polyline(array)])
 
 
+def partitionExtent(line_fc, X_max, X_min, Y_max, Y_min, cut_ys, angle=0.0):
+    """
+    Populates a feature class with polylines representing the extent of a feature class and several cut lines.
+
+    Works like bisectExtent, but draws one line across the extent for every value in cut_ys so that FeatureToPolygon
+    turns the extent into len(cut_ys) + 1 strips. When angle is set, the extent and cut lines are given in the rotated
+    cut frame of EqualAreaEngine and are rotated back into the map frame before they are drawn.
+
+    :param line_fc: POLYLINE The feature class to populate.
+    :param X_max: DOUBLE The right extent of a feature class.
+    :param X_min: DOUBLE The left extent of a feature class.
+    :param Y_max: DOUBLE The top extent of a feature class.
+    :param Y_min: DOUBLE The bottom extent of a feature class.
+    :param cut_ys: LIST Y coordinates of the cut lines.
+    :param angle: DOUBLE The angle of the cut lines in degrees, counter-clockwise from east.
+    :return: VOID
+    """
+    def toPoint(x, y):
+        x, y = EqualAreaEngine.fromCutFrame(x, y, angle)
+        return arcpy.Point(float(x), float(y))
+
+    cursor = arcpy.da.InsertCursor(line_fc, ["SHAPE@"])
+
+    extent = [[X_max, Y_max], [X_min, Y_max], [X_min, Y_min], [X_max, Y_min], [X_max, Y_max]]
+    cursor.insertRow([arcpy.Polyline(arcpy.Array([toPoint(x, y) for x, y in extent]))])
+
+    for cut_y in cut_ys:
+        cursor.insertRow([arcpy.Polyline(arcpy.Array([toPoint(X_max, cut_y), toPoint(X_min, cut_y)]))])
+
+    del cursor
+
+
 def getArea(in_fc):
     """
     Returns the total area of a all features in a feature class.
@@ -116,6 +207,125 @@ def getArea(in_fc):
     return area
 
 
+def getRings(in_fc):
+    """
+    Returns the coordinates of every ring of every feature in a feature class.
+
+    Outer rings and holes are both returned. Holes wind the opposite way to outer rings, which is what the area engine
+    uses to subtract them.
+
+    :param in_fc: POLYGON The input feature class
+    :return: LIST a list of rings, each a list of (x, y) tuples.
+    """
+    rings = []
+    cursor = arcpy.da.SearchCursor(in_fc, ["SHAPE@"])
+    for row in cursor:
+        rings.extend(geometryRings(row[0]))
+    return rings
+
+
+def streamPoints(in_fc):
+    """
+    Yields the vertices of every ring of every feature in a feature class one at a time.
+
+    Only one feature's geometry is open at a time and no list of coordinates is built, so the caller decides how many
+    vertices to hold.
+
+    :param in_fc: POLYGON The input feature class
+    :return: GENERATOR of (x, y) tuples, with None after the last vertex of every ring.
+    """
+    for row in arcpy.da.SearchCursor(in_fc, ["SHAPE@"]):
+        for part in row[0]:
+            for pnt in part:
+                # A None point separates the outer ring of a part from its holes.
+                yield None if pnt is None else (pnt.X, pnt.Y)
+            yield None
+
+
+def geometryRings(geometry):
+    """
+    Returns the coordinates of every ring of a polygon geometry.
+
+    :param geometry: POLYGON The input geometry
+    :return: LIST a list of rings, each a list of (x, y) tuples.
+    """
+    rings = []
+    for part in geometry:
+        ring = []
+        for pnt in part:
+            # A None point separates the outer ring of a part from its holes.
+            if pnt is None:
+                rings.append(ring)
+                ring = []
+            else:
+                ring.append((pnt.X, pnt.Y))
+        rings.append(ring)
+    return rings
+
+
+def stripPolygon(X_max, X_min, Y_max, Y_min, angle, spatial_ref):
+    """
+    Returns a rectangle given in the rotated cut frame of EqualAreaEngine as a polygon in the map frame.
+
+    :param X_max: DOUBLE The right side of the rectangle in the cut frame.
+    :param X_min: DOUBLE The left side of the rectangle in the cut frame.
+    :param Y_max: DOUBLE The top of the rectangle in the cut frame.
+    :param Y_min: DOUBLE The bottom of the rectangle in the cut frame.
+    :param angle: DOUBLE The angle of the cut lines in degrees, counter-clockwise from east.
+    :param spatial_ref: SPATIAL REFERENCE The spatial reference of the polygon.
+    :return: POLYGON the rectangle.
+    """
+    array = arcpy.Array()
+    for x, y in [[X_max, Y_max], [X_max, Y_min], [X_min, Y_min], [X_min, Y_max], [X_max, Y_max]]:
+        x, y = EqualAreaEngine.fromCutFrame(x, y, angle)
+        array.add(arcpy.Point(float(x), float(y)))
+    return arcpy.Polygon(array, spatial_ref)
+
+
+def partsOverlap(in_fc, exact=True, batch_size=1000):
+    """
+    Returns true if any two features in a feature class overlap.
+
+    Only the bounding boxes of the features are kept from the cursor, and they are indexed so only the pairs whose
+    boxes overlap are candidates. The candidates are checked batch_size pairs at a time: the geometries of a batch are
+    read again by OID and tested with disjoint and touches, which is much cheaper than building their intersection,
+    and the first pair whose interiors overlap ends the search. Features that only touch along a shared boundary do
+    not overlap. Without exact, any two overlapping boxes count as an overlap and no geometry is kept at all.
+
+    :param in_fc: POLYGON The input feature class
+    :param exact: BOOLEAN test the geometry of the candidate pairs instead of only their boxes.
+    :param batch_size: INT the number of candidate pairs whose geometries are read at once.
+    :return: BOOLEAN true if the interiors of any two features overlap.
+    """
+    oids = []
+    boxes = []
+    for oid, extent in arcpy.da.SearchCursor(in_fc, ["OID@", "SHAPE@EXTENT"]):
+        if extent is None:
+            continue
+        oids.append(oid)
+        boxes.append([extent.XMin, extent.YMin, extent.XMax, extent.YMax])
+
+    if len(boxes) < 2:
+        return False
+
+    pairs = EqualAreaEngine.overlappingBoxes(boxes)
+    if not exact:
+        return next(pairs, None) is not None
+
+    oid_field = arcpy.AddFieldDelimiters(in_fc, arcpy.Describe(in_fc).OIDFieldName)
+    while True:
+        batch = list(itertools.islice(pairs, batch_size))
+        if not batch:
+            return False
+        where = "{0} IN ({1})".format(oid_field, ", ".join(str(oid) for oid in sorted(set(
+            oids[i] for pair in batch for i in pair))))
+        geometries = dict(arcpy.da.SearchCursor(in_fc, ["OID@", "SHAPE@"], where))
+        for i, j in batch:
+            first, second = geometries[oids[i]], geometries[oids[j]]
+            if not first.disjoint(second) and not first.touches(second):
+                return True
+
+
 def checkEquality(in_fc):
     """
     Check which of two north south polygons have the greatest area.
@@ -153,6 +363,295 @@ def checkEquality(in_fc):
         return ratio, "down", high_area, low_area
 
 
+def getImbalance(direction, high_area, low_area):
+    """
+    Return the signed area imbalance of two north south polygons.
+
+    Turns the output of checkEquality into the area south of the bisecting line minus the area north of it. The value
+    grows as the line moves north, is negative when the line needs to move up and positive when it needs to move down.
+
+    :param direction: TEXT the direction returned by checkEquality.
+    :param high_area: DOUBLE the value of the polygon with the greatest area.
+    :param low_area: DOUBLE the value of the polygon with the lowest area.
+    :return: DOUBLE the area south of the line minus the area north of the line.
+    """
+    if direction == "up":
+        return low_area - high_area
+    elif direction == "down":
+        return high_area - low_area
+    else:
+        return 0.0
+
+
+def toleranceToImbalance(total_area, tolerance):
+    """
+    Return the largest area imbalance that still meets the tolerance.
+
+    The tolerance is low_area / high_area. With low_area + high_area = total_area, a ratio above the tolerance is the
+    same as an absolute imbalance below total_area * (1 - tolerance) / (1 + tolerance).
+
+    :param total_area: DOUBLE the total area of the polygon being split.
+    :param tolerance: DOUBLE the user defined tolerance.
+    :return: DOUBLE the largest acceptable absolute imbalance.
+    """
+    return total_area * (1.0 - tolerance) / (1.0 + tolerance)
+
+
+def solveBisection(func, a, b, fa, fb, xtol, ftol, max_iter=200):
+    """
+    Find the root of a monotone function by bisection.
+
+    :param func: FUNCTION called with a y value and returns the signed area imbalance at that y.
+    :param a: DOUBLE the bottom of the bracket.
+    :param b: DOUBLE the top of the bracket.
+    :param fa: DOUBLE func(a).
+    :param fb: DOUBLE func(b). Must have the opposite sign of fa.
+    :param xtol: DOUBLE stop once the bracket is narrower than this.
+    :param ftol: DOUBLE stop once the absolute imbalance is below this.
+    :param max_iter: INT the maximum number of calls to func.
+    :return: DOUBLE the y value of the root.
+    """
+    if fa * fb > 0:
+        raise ValueError("The bisecting line is not bracketed: f({0}) = {1}, f({2}) = {3}".format(a, fa, b, fb))
+
+    x = (a + b) / 2.0
+    for i in range(max_iter):
+        x = (a + b) / 2.0
+        fx = func(x)
+        if abs(fx) <= ftol or (b - a) / 2.0 < xtol:
+            return x
+        if (fx < 0) == (fa < 0):
+            a, fa = x, fx
+        else:
+            b, fb = x, fx
+    return x
+
+
+def solveBrent(func, a, b, fa, fb, xtol, ftol, max_iter=100):
+    """
+    Find the root of a function with Brent's method.
+
+    Keeps a bracket around the root like bisection, but steps with the secant or inverse quadratic interpolation of the
+    last evaluations whenever they stay inside the bracket. Falls back to bisection when they do not.
+
+    :param func: FUNCTION called with a y value and returns the signed area imbalance at that y.
+    :param a: DOUBLE one end of the bracket.
+    :param b: DOUBLE the other end of the bracket.
+    :param fa: DOUBLE func(a).
+    :param fb: DOUBLE func(b). Must have the opposite sign of fa.
+    :param xtol: DOUBLE stop once the bracket is narrower than this.
+    :param ftol: DOUBLE stop once the absolute imbalance is below this.
+    :param max_iter: INT the maximum number of calls to func.
+    :return: DOUBLE the y value of the root.
+    """
+    if fa * fb > 0:
+        raise ValueError("The bisecting line is not bracketed: f({0}) = {1}, f({2}) = {3}".format(a, fa, b, fb))
+
+    x_pre, x_cur = a, b
+    f_pre, f_cur = fa, fb
+    x_blk, f_blk = 0.0, 0.0
+    s_pre, s_cur = 0.0, 0.0
+
+    for i in range(max_iter):
+        if f_pre * f_cur < 0:
+            x_blk, f_blk = x_pre, f_pre
+            s_pre = s_cur = x_cur - x_pre
+
+        # Keep the best guess in x_cur.
+        if abs(f_blk) < abs(f_cur):
+            x_pre, x_cur, x_blk = x_cur, x_blk, x_cur
+            f_pre, f_cur, f_blk = f_cur, f_blk, f_cur
+
+        delta = xtol / 2.0
+        s_bis = (x_blk - x_cur) / 2.0
+        if abs(f_cur) <= ftol or abs(s_bis) < delta:
+            return x_cur
+
+        if abs(s_pre) > delta and abs(f_cur) < abs(f_pre):
+            if x_pre == x_blk:
+                # Secant step.
+                s_try = -f_cur * (x_cur - x_pre) / (f_cur - f_pre)
+            else:
+                # Inverse quadratic interpolation.
+                d_pre = (f_pre - f_cur) / (x_pre - x_cur)
+                d_blk = (f_blk - f_cur) / (x_blk - x_cur)
+                s_try = -f_cur * (f_blk * d_blk - f_pre * d_pre) / (d_blk * d_pre * (f_blk - f_pre))
+
+            if 2 * abs(s_try) < min(abs(s_pre), 3 * abs(s_bis) - delta):
+                s_pre, s_cur = s_cur, s_try
+            else:
+                s_pre, s_cur = s_bis, s_bis
+        else:
+            s_pre, s_cur = s_bis, s_bis
+
+        x_pre, f_pre = x_cur, f_cur
+        if abs(s_cur) > delta:
+            x_cur += s_cur
+        else:
+            x_cur += delta if s_bis > 0 else -delta
+
+        f_cur = func(x_cur)
+
+    return x_cur
+
+
+def partitionAtY(line_fc_path, line_fc_filename, spatial_ref, ftop_fc, clip_fc, split_fc,
+                 X_max, X_min, Y_max, Y_min, cut_ys, angle=0.0, telemetry=None):
+    """
+    Split a feature class into strips along several cut lines.
+
+    Runs the geoprocessing chain used by the tool once: creates the polyline feature class, draws the extent and all the
+    cut lines, converts the lines to polygons and clips them with the polygon being split.
+
+    :param line_fc_path: STRING The path for the polyline feature class.
+    :param line_fc_filename: STRING The filename for the polyline feature class.
+    :param spatial_ref: SPATIAL REFERENCE The spatial reference of the polyline feature class.
+    :param ftop_fc: POLYGON Path for output of feature to polygon geoprocessing tool.
+    :param clip_fc: POLYGON Path for output of clip geoprocessing tool.
+    :param split_fc: POLYGON The feature class being split.
+    :param X_max: DOUBLE The right extent of split_fc.
+    :param X_min: DOUBLE The left extent of split_fc.
+    :param Y_max: DOUBLE The top extent of split_fc.
+    :param Y_min: DOUBLE The bottom extent of split_fc.
+    :param cut_ys: LIST The Y coordinates of the cut lines.
+    :param angle: DOUBLE The angle of the cut lines in degrees, counter-clockwise from east. The extent and cut_ys are
+        in the rotated cut frame when this is set.
+    :param telemetry: TELEMETRY Optional EqualAreaTelemetry.Telemetry that times each step.
+    :return: VOID
+    """
+    telemetry = telemetry or EqualAreaTelemetry.Telemetry()
+    line_fc = os.path.join(line_fc_path, line_fc_filename)
+
+    with telemetry.stage("create_featureclass"):
+        arcpy.CreateFeatureclass_management(line_fc_path, line_fc_filename, "POLYLINE", None, None, None, spatial_ref)
+    with telemetry.stage("bisect_extent"):
+        partitionExtent(line_fc, X_max, X_min, Y_max, Y_min, cut_ys, angle)
+    with telemetry.stage("feature_to_polygon"):
+        arcpy.FeatureToPolygon_management(line_fc, ftop_fc)
+    with telemetry.stage("clip"):
+        arcpy.Clip_analysis(ftop_fc, split_fc, clip_fc)
+
+
+def solveMultisection(func, a, b, targets, xtol, atol, probes=64, max_passes=60):
+    """
+    Find the heights of several lines with given areas south of them, measuring many heights per pass.
+
+    Each pass measures probes evenly spaced heights inside the bracket of every unsolved line with one call to func,
+    then narrows each bracket to the gap between the two probes its target falls between. The brackets shrink by a
+    factor of probes + 1 per pass, so a handful of passes reach the precision limit. Built for func that has to read
+    the whole polygon every time it is called.
+
+    :param func: FUNCTION called with an array of y values and returns the area south of each.
+    :param a: DOUBLE the bottom of the extent, where the area south is 0.
+    :param b: DOUBLE the top of the extent, where the area south is the total area.
+    :param targets: LIST the area wanted south of each line.
+    :param xtol: DOUBLE a line is solved once its bracket is narrower than this.
+    :param atol: DOUBLE a line is solved once the area south of it is within this of its target.
+    :param probes: INT the number of heights measured in each bracket per pass.
+    :param max_passes: INT the maximum number of calls to func.
+    :return: LIST the y values of the lines.
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    lows = np.full(len(targets), float(a))
+    highs = np.full(len(targets), float(b))
+    solved = np.full(len(targets), np.nan)
+    steps = np.arange(1, probes + 1) / float(probes + 1)
+
+    for i in range(max_passes):
+        open_lines = np.flatnonzero(np.isnan(solved))
+        if not len(open_lines):
+            break
+
+        ys = lows[open_lines, np.newaxis] + (highs - lows)[open_lines, np.newaxis] * steps
+        areas = func(ys.ravel()).reshape(ys.shape)
+
+        for row, line in enumerate(open_lines):
+            error = areas[row] - targets[line]
+            best = np.argmin(np.abs(error))
+            if abs(error[best]) <= atol:
+                solved[line] = ys[row, best]
+                continue
+
+            above = np.flatnonzero(error > 0)
+            k = above[0] if len(above) else probes
+            if k > 0:
+                lows[line] = ys[row, k - 1]
+            if k < probes:
+                highs[line] = ys[row, k]
+            if highs[line] - lows[line] < xtol:
+                solved[line] = (lows[line] + highs[line]) / 2.0
+
+    unsolved = np.isnan(solved)
+    solved[unsolved] = ((lows + highs) / 2.0)[unsolved]
+    return [float(y) for y in solved]
+
+
+def warmStartBracket(func, start, f_start, step, lo, hi, f_lo, f_hi):
+    """
+    Grow a bracket outwards from a starting guess until the area imbalance changes sign.
+
+    Used when an earlier run already found a line close to the answer. The bracket starts step wide on the side of the
+    guess the line needs to move to and grows four times wider each try, never going past the extent.
+
+    :param func: FUNCTION called with a y value and returns the signed area imbalance at that y.
+    :param start: DOUBLE the starting guess.
+    :param f_start: DOUBLE func(start).
+    :param step: DOUBLE the width of the first bracket.
+    :param lo: DOUBLE the bottom of the extent.
+    :param hi: DOUBLE the top of the extent.
+    :param f_lo: DOUBLE func(lo).
+    :param f_hi: DOUBLE func(hi).
+    :return: the bottom and top of the bracket and the value of func at each.
+    """
+    direction = 1 if f_start < 0 else -1
+    while True:
+        probe = start + direction * step
+        if direction > 0 and probe >= hi:
+            return start, hi, f_start, f_hi
+        if direction < 0 and probe <= lo:
+            return lo, start, f_lo, f_start
+
+        f_probe = func(probe)
+        if (f_probe < 0) != (f_start < 0) or f_probe == 0:
+            if direction > 0:
+                return start, probe, f_start, f_probe
+            return probe, start, f_probe, f_start
+
+        start, f_start = probe, f_probe
+        step *= 4
+
+
+def splitAtY(line_fc_path, line_fc_filename, spatial_ref, ftop_fc, clip_fc, split_fc,
+             X_max, X_min, Y_max, Y_min, cut_y, telemetry=None):
+    """
+    Split a feature class into north south polygons along a horizontal line.
+
+    Runs one round of the geoprocessing chain used by the tool: creates the polyline feature class, draws the extent and
+    the bisecting line, converts the lines to polygons and clips them with the polygon being split.
+
+    :param line_fc_path: STRING The path for the polyline feature class.
+    :param line_fc_filename: STRING The filename for the polyline feature class.
+    :param spatial_ref: SPATIAL REFERENCE The spatial reference of the polyline feature class.
+    :param ftop_fc: POLYGON Path for output of feature to polygon geoprocessing tool.
+    :param clip_fc: POLYGON Path for output of clip geoprocessing tool.
+    :param split_fc: POLYGON The feature class being split.
+    :param X_max: DOUBLE The right extent of split_fc.
+    :param X_min: DOUBLE The left extent of split_fc.
+    :param Y_max: DOUBLE The top extent of split_fc.
+    :param Y_min: DOUBLE The bottom extent of split_fc.
+    :param cut_y: DOUBLE The Y coordinate of the bisecting line.
+    :param telemetry: TELEMETRY Optional EqualAreaTelemetry.Telemetry that times each step.
+    :return: the ratio, direction, high area and low area returned by checkEquality.
+    """
+    telemetry = telemetry or EqualAreaTelemetry.Telemetry()
+
+    partitionAtY(line_fc_path, line_fc_filename, spatial_ref, ftop_fc, clip_fc, split_fc,
+                 X_max, X_min, Y_max, Y_min, [cut_y], telemetry=telemetry)
+
+    with telemetry.stage("check_equality"):
+        return checkEquality(clip_fc)
+
+
 ########################################################################################################################
 #
 #                                               ENVIRONMENT SETTINGS
@@ -161,7 +660,11 @@ def checkEquality(in_fc):
 
 
 # Set workspace to in_memory. Uses computer RAM for increased performance, but may cause issues with larger datasets.
-arcpy.env.workspace = 'in_memory'
+# Streaming runs are meant for those larger datasets, so they work in the scratch geodatabase on disk instead.
+if streaming:
+    arcpy.env.workspace = arcpy.env.scratchGDB
+else:
+    arcpy.env.workspace = 'in_memory'
 
 
 ########################################################################################################################
@@ -172,6 +675,8 @@ arcpy.env.workspace = 'in_memory'
 
 # in_fc_copy: POLYGON The path to a copy of the user input feature class to be split
 # in_fc_copy_diss: POLYGON The path to the dissolve of in_fc_copy
+# split_fc: POLYGON The feature class that is measured and clipped. in_fc_copy_diss, or in_fc_copy when none of its
+#   features overlap.
 # in_fc_spatialref: SPATIAL REFERENCE The spatial reference of the input feature class. Needed for the create feature
 #   class parameter when creating feature class for polyline.
 # line_fc_path: STRING The path for the polyline feature class.
@@ -181,17 +686,27 @@ arcpy.env.workspace = 'in_memory'
 # clip_fc: POLYGON Path for output of clip geoprocessing tool.
 # ratio: DOUBLE The starting ratio
 # tolerance_divider: INT the number to divide the tolerance by after each change of direction.
-
-in_fc_copy = r"in_memory\copy"
-in_fc_copy_diss = r'in_memory\copy_diss'
+# cut_cache_path: STRING The path of the cache of solved cut lines.
+# cut_cache_size: INT The largest number of polygons to keep in the cache. The least recently used are dropped first.
+# warm_start_step: DOUBLE The width of the first bracket around a cached line, as a fraction of the extent height.
+# stream_chunk_size: INT The number of vertices held at a time when streaming.
+# telemetry: TELEMETRY Times the stages of every iteration. Records nothing unless write_telemetry is set.
+
+in_fc_copy = os.path.join(arcpy.env.workspace, "copy")
+in_fc_copy_diss = os.path.join(arcpy.env.workspace, "copy_diss")
 in_fc_spatialref = arcpy.Describe(in_fc).spatialReference
-line_fc_path = r"in_memory"
+line_fc_path = arcpy.env.workspace
 line_fc_filename = "split_line"
 line_fc = os.path.join(line_fc_path, line_fc_filename)
-ftop_fc = r"in_memory\feature_to_polygon"
-clip_fc = r"in_memory\clip"
+ftop_fc = os.path.join(arcpy.env.workspace, "feature_to_polygon")
+clip_fc = os.path.join(arcpy.env.workspace, "clip")
 ratio = 0.0
 tolerance_divider = 10
+cut_cache_path = os.path.join(arcpy.env.scratchFolder, "EqualAreaPolygon_cache.json")
+cut_cache_size = 64
+warm_start_step = 0.0001
+stream_chunk_size = 16384
+telemetry = EqualAreaTelemetry.Telemetry(EqualAreaTelemetry.telemetryPath(save_location) if write_telemetry else None)
 
 
 ########################################################################################################################
@@ -200,73 +715,307 @@ tolerance_divider = 10
 #
 ########################################################################################################################
 
-# Make a copy of the input feature class so we don't mess it up. This also extracts and isolates any user selected
-# features.
-arcpy.CopyFeatures_management(in_fc, in_fc_copy)
-
-# Dissolve all features into one feature.
-arcpy.Dissolve_management(in_fc_copy, in_fc_copy_diss)
-
-# Calculate the total area of features in the feature class.
-total_area = getArea(in_fc_copy_diss)
-
-# Get the extent of the feature class.
-x_max, x_min, y_max, y_min = getExtent(in_fc_copy_diss)
-
-# calculate the coordinates of the bisecting line.
-start_x = x_max
-start_y = (y_max - y_min) / 2 + y_min
-end_y = (y_max - y_min) / 2 + y_min
-end_x = x_min
-increment = ((y_max - y_min) / 2) / tolerance_divider
-
-# While the ratio is less than the tolerance, move the bisecting line towards the polygon with the greatest area.
-started = False
-moving = "nowhere"
-while ratio <= tolerance:
-
-    # Make the polyline feature class that will have the bisecting line.
-    arcpy.CreateFeatureclass_management(line_fc_path, line_fc_filename, "POLYLINE", None, None, None, in_fc_spatialref)
-
-    # Insert lines into the line_fc that represent the perimeter of the extent with a bisecting line through the middle.
-    bisectExtent(line_fc, x_max, x_min, y_max, y_min, start_x, start_y, end_x, end_y)
-
-    # Convert the lines to polygons
-    arcpy.FeatureToPolygon_management(line_fc, ftop_fc)
-
-    # Clip the polygons with the original feature class
-    arcpy.Clip_analysis(ftop_fc, in_fc_copy_diss, clip_fc)
-
-    # Find the ratio of area between the two polygons and the direction we need to move the bisecting line to make them
-    # equal.
-    ratio, direction, high, low = checkEquality(clip_fc)
-
-    arcpy.AddMessage("The area ratio is {0}, adjusting bisect line {1}".format(ratio, direction))
-
-    # Each time the line changes direction reduce the amount the line is incremented by. The precision of feature class
-    # extents is 9. If the increment value drops below this the tool will get hung. Therefore, we add clause that breaks
-    # the loop if the precision drops below 9.
-    if started:
-        if moving != direction:
-            increment = increment / 10
-            if 0.00000001 > increment > 0.000000001:
-                increment = 0.000000001
-            elif increment < 0.000000001:
-                break
-            arcpy.AddMessage("Reducing line increment to {0}".format(increment))
-
-    if direction == "up":
-        start_y += increment
-        end_y += increment
+if per_feature:
+
+    # Stream the features out of the input and send each one's edges to the worker pool. Geometries cannot be sent to
+    # other processes, so only the NumPy edge arrays go out and only the cut lines come back.
+    # Features with a null or empty shape have nothing to split and are left out of the output.
+    def featureJobs():
+        for oid, geometry in arcpy.da.SearchCursor(in_fc, ["OID@", "SHAPE@"]):
+            if geometry is None or not geometry.area:
+                arcpy.AddWarning("Feature {0} has no area and is skipped".format(oid))
+                continue
+            yield oid, EqualAreaEngine.ringsToEdges(geometryRings(geometry)), max(parts, 2), angle, minimize_cut
+
+    cuts = {}
+    with telemetry.stage("split_features"):
+        for oid, feature_angle, cut_ys, extent in EqualAreaWorker.splitFeaturesInPool(featureJobs()):
+            cuts[oid] = feature_angle, cut_ys, extent
+    telemetry.iteration(features=len(cuts))
+    arcpy.AddMessage("Found the cut lines of {0} features".format(len(cuts)))
+
+    # Collect every piece into one output feature class, tagged by the OID of the feature it came from.
+    out_path, out_name = os.path.split(save_location)
+    arcpy.CreateFeatureclass_management(out_path, out_name, "POLYGON", None, None, None, in_fc_spatialref)
+    arcpy.AddField_management(save_location, "SRC_OID", "LONG")
+    arcpy.AddField_management(save_location, "PART", "SHORT")
+
+    with telemetry.stage("write_output"):
+        cursor = arcpy.da.InsertCursor(save_location, ["SHAPE@", "SRC_OID", "PART"])
+        for oid, geometry in arcpy.da.SearchCursor(in_fc, ["OID@", "SHAPE@"]):
+            if oid not in cuts:
+                continue
+            feature_angle, cut_ys, (f_x_max, f_x_min, f_y_max, f_y_min) = cuts[oid]
+            bounds = [f_y_min - 1] + cut_ys + [f_y_max + 1]
+            for part in range(len(bounds) - 1):
+                strip = stripPolygon(f_x_max + 1, f_x_min - 1, bounds[part + 1], bounds[part], feature_angle,
+                                     in_fc_spatialref)
+                cursor.insertRow([geometry.intersect(strip, 4), oid, part + 1])
+        del cursor
+    telemetry.summary(mode="per_feature", features=len(cuts), parts=max(parts, 2), angle=angle)
+
+else:
+
+    # Make a copy of the input feature class so we don't mess it up. This also extracts and isolates any user selected
+    # features.
+    arcpy.CopyFeatures_management(in_fc, in_fc_copy)
+
+    # Streaming never holds all the vertices, which the cache key and the search for the shortest cut both need.
+    if streaming:
+        use_cache = False
+        minimize_cut = False
+
+    # Dissolve all features into one feature. Features that do not overlap can be measured and clipped as they are,
+    # because their areas simply add up, so the dissolve is skipped for them. Streaming only compares the extents of
+    # the features, so it dissolves whenever two extents overlap rather than read any geometry back.
+    if partsOverlap(in_fc_copy, exact=not streaming):
+        arcpy.Dissolve_management(in_fc_copy, in_fc_copy_diss)
+        split_fc = in_fc_copy_diss
     else:
-        start_y -= increment
-        end_y -= increment
-
-    moving = direction
+        arcpy.AddMessage("None of the features overlap, skipping the dissolve.")
+        split_fc = in_fc_copy
+
+    # Calculate the total area of features in the feature class.
+    total_area = getArea(split_fc)
+
+    # Get the extent of the feature class.
+    x_max, x_min, y_max, y_min = getExtent(split_fc)
+
+    # calculate the coordinates of the bisecting line.
+    start_x = x_max
+    start_y = (y_max - y_min) / 2 + y_min
+    end_y = (y_max - y_min) / 2 + y_min
+    end_x = x_min
+    increment = ((y_max - y_min) / 2) / tolerance_divider
+
+    # Cuts at an angle are never measured with the geoprocessing chain, which only draws extents lined up with the map.
+    if (angle or minimize_cut) and not streaming:
+        if solver == "INCREMENT":
+            solver = "SWEEP"
+            arcpy.AddMessage("Cuts at an angle use the SWEEP solver.")
+        if area_engine != "NUMPY":
+            area_engine = "NUMPY"
+            arcpy.AddMessage("Cuts at an angle use the NUMPY area engine.")
+
+    # Look for the cut lines of an earlier run on the same polygon with the same split parameters.
+    edges = None
+    cached = None
+    if use_cache:
+        edges = EqualAreaEngine.ringsToEdges(getRings(split_fc))
+        cache_key = EqualAreaEngine.cutCacheKey(edges, parts=max(parts, 2), angle=angle, minimize_cut=minimize_cut)
+        cached = EqualAreaEngine.loadCachedCut(cut_cache_path, cache_key)
+        if cached is not None and len(cached["cut_ys"]) == max(parts, 2) - 1:
+            arcpy.AddMessage("Starting from the cut lines of an earlier run at {0}".format(cached["cut_ys"]))
+            angle = cached["angle"]
+        else:
+            cached = None
+
+    if not streaming and (parts > 2 or solver == "SWEEP" or area_engine == "NUMPY"):
+
+        # Load the rings once and rotate them so the cut lines are horizontal. Every solver after this works in the
+        # rotated frame and only the final write goes back to the map frame.
+        if edges is None:
+            edges = EqualAreaEngine.ringsToEdges(getRings(split_fc))
+        if minimize_cut and cached is None:
+            angle, cut_length = EqualAreaEngine.minimumCutAngle(edges, max(parts, 2))
+            arcpy.AddMessage("The shortest cut is at {0} degrees with a length of {1}".format(angle, cut_length))
+
+        edge_table = EqualAreaEngine.buildEdgeTable(EqualAreaEngine.rotateEdges(edges, angle))
+        total_area = edge_table["total"]
+        x_max, x_min, y_max, y_min = edge_table["x_max"], edge_table["x_min"], edge_table["y_max"], edge_table["y_min"]
+
+    if streaming:
+
+        # Every pass reads the vertices again in chunks from the cursor. Coordinates are measured from the bottom left
+        # of the extent, in the cut frame for the angle.
+        origin = (x_min, y_min)
+
+        def streamChunks():
+            return EqualAreaEngine.streamEdgeChunks(streamPoints(split_fc), origin, angle, stream_chunk_size)
+
+        totals = EqualAreaEngine.streamTotals(streamChunks())
+        total_area = totals["total"]
+        arcpy.AddMessage("Streamed {0} edges with a total area of {1}".format(totals["edges"], total_area))
+
+        def streamAreasBelow(cut_ys):
+            arcpy.AddMessage("Measuring {0} lines in one pass...".format(len(cut_ys)))
+            with telemetry.stage("stream_pass"):
+                areas = EqualAreaEngine.streamAreaBelow(streamChunks(), cut_ys, totals["orientation"])
+            telemetry.iteration(probes=len(cut_ys))
+            return areas
+
+        targets = [total_area * k / float(max(parts, 2)) for k in range(1, max(parts, 2))]
+        cut_ys = solveMultisection(streamAreasBelow, totals["y_min"], totals["y_max"], targets, 0.000000001,
+                                   toleranceToImbalance(total_area / max(parts, 2), tolerance) / 2.0)
+
+        # Move the answer from the origin back to the cut frame used to draw the lines.
+        origin_x, origin_y = EqualAreaEngine.toCutFrame(origin[0], origin[1], angle)
+        x_max, x_min = totals["x_max"] + origin_x, totals["x_min"] + origin_x
+        y_max, y_min = totals["y_max"] + origin_y, totals["y_min"] + origin_y
+        cut_ys = [y + origin_y for y in cut_ys]
+
+        arcpy.AddMessage("The cut lines are at {0}".format(", ".join(str(y) for y in cut_ys)))
+        partitionAtY(line_fc_path, line_fc_filename, in_fc_spatialref, ftop_fc, clip_fc, split_fc,
+                     x_max, x_min, y_max, y_min, cut_ys, angle, telemetry)
+
+    elif parts > 2 or solver == "SWEEP":
+
+        if solver != "SWEEP":
+            arcpy.AddMessage("Splitting into {0} parts uses the SWEEP solver.".format(parts))
+
+        # Sort the vertex heights once and build the area below the line as a piecewise quadratic of its height. Every
+        # cut line is read straight off it, so the run time does not depend on the tolerance. The pieces are written
+        # with one pass of the geoprocessing chain. Cached cut lines that already meet the tolerance skip the sort.
+        if cached is not None:
+            cut_ys = np.array(cached["cut_ys"])
+            areas = np.diff(np.concatenate([[0.0], EqualAreaEngine.areaBelow(edge_table, cut_ys), [total_area]]))
+            ratio = areas.min() / areas.max()
+
+        if cached is None or ratio <= tolerance:
+            with telemetry.stage("build_profile"):
+                area_profile = EqualAreaEngine.buildAreaProfile(edge_table)
+                targets = [total_area * k / float(parts) for k in range(1, parts)]
+                cut_ys = EqualAreaEngine.heightForArea(area_profile, targets)
+
+            areas = np.diff(np.concatenate([[0.0], EqualAreaEngine.areaBelow(edge_table, cut_ys), [total_area]]))
+            ratio = areas.min() / areas.max()
+        telemetry.iteration(ratio=ratio, high=areas.max(), low=areas.min())
+
+        arcpy.AddMessage("The cut lines are at {0}, the area ratio is {1}".format(
+            ", ".join(str(y) for y in cut_ys), ratio))
+        if ratio <= tolerance:
+            arcpy.AddWarning("The area ratio {0} is at the limit of floating point precision and does not meet the "
+                             "tolerance {1}".format(ratio, tolerance))
+
+        partitionAtY(line_fc_path, line_fc_filename, in_fc_spatialref, ftop_fc, clip_fc, split_fc,
+                     x_max, x_min, y_max, y_min, cut_ys, angle, telemetry)
+
+    elif solver in ("BISECTION", "BRENT"):
+
+        # The line at the bottom of the extent has all the area to the north and the line at the top has all the area to
+        # the south, so the balanced line is always bracketed by the extent without running any geoprocessing.
+        last_split = {"y": None}
+
+        def imbalanceAtY(cut_y):
+            ratio, direction, high, low = splitAtY(line_fc_path, line_fc_filename, in_fc_spatialref, ftop_fc, clip_fc,
+                                                   split_fc, x_max, x_min, y_max, y_min, cut_y, telemetry)
+            telemetry.iteration(increment=abs(cut_y - last_split["y"]) if last_split["y"] is not None else None,
+                                ratio=ratio, high=high, low=low, cut_y=cut_y)
+            last_split["y"] = cut_y
+            arcpy.AddMessage("The area ratio is {0}, adjusting bisect line {1}".format(ratio, direction))
+            return getImbalance(direction, high, low)
+
+        last_guess = {"y": None}
+
+        def measureAtY(cut_y):
+            # Every guess is measured in process from the rings loaded above without touching the workspace.
+            with telemetry.stage("measure"):
+                above, below = EqualAreaEngine.areaAboveBelow(edge_table, cut_y)
+            ratio = min(above, below) / max(above, below)
+            telemetry.iteration(increment=abs(cut_y - last_guess["y"]) if last_guess["y"] is not None else None,
+                                ratio=ratio, high=max(above, below), low=min(above, below), cut_y=cut_y)
+            last_guess["y"] = cut_y
+            arcpy.AddMessage("The area ratio is {0}".format(ratio))
+            return below - above
+
+        measure = measureAtY if area_engine == "NUMPY" else imbalanceAtY
+        imbalance_tolerance = toleranceToImbalance(total_area, tolerance)
+        bracket = y_min, y_max, -total_area, total_area
+
+        # A cached line is checked first. If it is not good enough, the solver starts from a small bracket around it.
+        cut_y = None
+        if cached is not None:
+            cached_y = cached["cut_ys"][0]
+            f_cached = measure(cached_y)
+            if abs(f_cached) <= imbalance_tolerance:
+                cut_y = cached_y
+            else:
+                bracket = warmStartBracket(measure, cached_y, f_cached, (y_max - y_min) * warm_start_step,
+                                           y_min, y_max, -total_area, total_area)
+
+        if cut_y is None:
+            solve = solveBrent if solver == "BRENT" else solveBisection
+            cut_y = solve(measure, bracket[0], bracket[1], bracket[2], bracket[3], 0.000000001, imbalance_tolerance)
+        cut_ys = [cut_y]
+
+        if area_engine == "NUMPY":
+            partitionAtY(line_fc_path, line_fc_filename, in_fc_spatialref, ftop_fc, clip_fc, split_fc,
+                         x_max, x_min, y_max, y_min, [cut_y], angle, telemetry)
+
+        # The solver may settle on a line other than the last one it tried. Make sure the clip matches the answer.
+        elif last_split["y"] != cut_y:
+            imbalanceAtY(cut_y)
 
-    started = True
+    else:
 
-arcpy.CopyFeatures_management(clip_fc, save_location)
+        # A cached line is checked first and the line is moved from there in small steps.
+        if cached is not None:
+            start_y = end_y = cached["cut_ys"][0]
+            increment = (y_max - y_min) * warm_start_step
+
+        # While the ratio is less than the tolerance, move the bisecting line towards the polygon with the greatest
+        # area.
+        started = False
+        moving = "nowhere"
+        while ratio <= tolerance:
+
+            # Make the polyline feature class that will have the bisecting line.
+            with telemetry.stage("create_featureclass"):
+                arcpy.CreateFeatureclass_management(line_fc_path, line_fc_filename, "POLYLINE", None, None, None,
+                                                    in_fc_spatialref)
+
+            # Insert lines into the line_fc that represent the perimeter of the extent with a bisecting line through the
+            # middle.
+            with telemetry.stage("bisect_extent"):
+                bisectExtent(line_fc, x_max, x_min, y_max, y_min, start_x, start_y, end_x, end_y)
+
+            # Convert the lines to polygons
+            with telemetry.stage("feature_to_polygon"):
+                arcpy.FeatureToPolygon_management(line_fc, ftop_fc)
+
+            # Clip the polygons with the original feature class
+            with telemetry.stage("clip"):
+                arcpy.Clip_analysis(ftop_fc, split_fc, clip_fc)
+
+            # Find the ratio of area between the two polygons and the direction we need to move the bisecting line to
+            # make them equal.
+            with telemetry.stage("check_equality"):
+                ratio, direction, high, low = checkEquality(clip_fc)
+
+            arcpy.AddMessage("The area ratio is {0}, adjusting bisect line {1}".format(ratio, direction))
+            cut_ys = [start_y]
+            telemetry.iteration(increment=increment, ratio=ratio, high=high, low=low, cut_y=start_y)
+
+            # Each time the line changes direction reduce the amount the line is incremented by. The precision of
+            # feature class extents is 9. If the increment value drops below this the tool will get hung. Therefore, we
+            # add clause that breaks the loop if the precision drops below 9.
+            if started:
+                if moving != direction:
+                    increment = increment / 10
+                    if 0.00000001 > increment > 0.000000001:
+                        increment = 0.000000001
+                    elif increment < 0.000000001:
+                        break
+                    arcpy.AddMessage("Reducing line increment to {0}".format(increment))
+
+            if direction == "up":
+                start_y += increment
+                end_y += increment
+            else:
+                start_y -= increment
+                end_y -= increment
+
+            moving = direction
+
+            started = True
+
+    if use_cache:
+        EqualAreaEngine.storeCachedCut(cut_cache_path, cache_key, cut_ys, angle, cut_cache_size)
+
+    with telemetry.stage("write_output"):
+        arcpy.CopyFeatures_management(clip_fc, save_location)
+    telemetry.summary(mode="dissolved", solver=solver, area_engine=area_engine, parts=max(parts, 2), angle=angle,
+                      cut_ys=[float(y) for y in cut_ys])
 
 
 ########################################################################################################################
@@ -0,0 +1,184 @@
+"""
+EqualAreaTelemetry.py: Iteration telemetry for the Equal Area Polygon tool.
+
+Records how long every stage of every iteration takes, along with the state of the solver and the peak memory of the
+process, and writes it as JSON lines next to the tool output. The last line is a summary of the run with the number of
+iterations and the share of the time spent in each stage. Used to find where the time goes on slow runs and to compare
+runs when looking for regressions.
+
+Each line is one JSON object. Iteration lines look like:
+
+    {"type": "iteration", "iteration": 3, "stages": {"clip": 0.41, ...}, "increment": 12.5, "high": ..., "low": ...,
+     "peak_memory": 183500800}
+
+and the summary line looks like:
+
+    {"type": "summary", "iterations": 14, "wall_time": 9.8, "stage_time": {"clip": 5.6, ...},
+     "stage_share": {"clip": 0.57, ...}, "peak_memory": 190152704}
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import contextlib
+import json
+import os
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def peakMemory():
+    """
+    Return the peak memory used by this process in bytes.
+
+    Uses psutil when it is installed, which reports the peak working set on Windows. Otherwise falls back to the
+    resource module on Linux and macOS.
+
+    :return: INT the peak memory in bytes, or None if it cannot be measured.
+    """
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return int(getattr(info, "peak_wset", info.rss))
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS reports bytes.
+        return int(peak if os.uname()[0] == "Darwin" else peak * 1024)
+
+    return None
+
+
+def telemetryPath(save_location):
+    """
+    Return the path of the telemetry file for a tool output.
+
+    The file is written in the folder that holds the output. Outputs inside a geodatabase are written next to the
+    geodatabase, because a geodatabase cannot hold other files.
+
+    :param save_location: STRING the path of the tool output.
+    :return: STRING the path of the telemetry file.
+    """
+    name = os.path.splitext(os.path.basename(save_location))[0]
+    folder = os.path.dirname(save_location)
+
+    # Walk up out of the geodatabase and any feature dataset inside it.
+    path = folder
+    while os.path.dirname(path) != path:
+        if os.path.splitext(path)[1].lower() in (".gdb", ".mdb", ".sde"):
+            folder = os.path.dirname(path)
+        path = os.path.dirname(path)
+
+    return os.path.join(folder, name + "_telemetry.jsonl")
+
+
+class Telemetry(object):
+    """
+    Collects stage timings and solver state and writes them as JSON lines.
+
+    A Telemetry without a path records nothing, so the tool can time its stages the same way whether or not
+    telemetry was asked for.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: STRING the path of the JSON lines file. Overwritten if it exists. None turns telemetry off.
+        """
+        self.path = path
+        self.iterations = 0
+        self.stage_time = {}
+        self.pending = {}
+        self.started = time.time()
+        self.file = open(path, "w") if path else None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Time a stage of the current iteration.
+
+            with telemetry.stage("clip"):
+                arcpy.Clip_analysis(...)
+
+        :param name: STRING the name of the stage.
+        """
+        if self.file is None:
+            yield
+            return
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - start
+            self.pending[name] = self.pending.get(name, 0.0) + elapsed
+            self.stage_time[name] = self.stage_time.get(name, 0.0) + elapsed
+
+    def iteration(self, **state):
+        """
+        Close the current iteration and write its line with the stages timed since the last one.
+
+        :param state: the solver state to record, such as increment, high and low.
+        :return: VOID
+        """
+        if self.file is None:
+            return
+
+        self.iterations += 1
+        record = {"type": "iteration", "iteration": self.iterations, "stages": self.pending,
+                  "peak_memory": peakMemory()}
+        record.update(state)
+        self.write(record)
+        self.pending = {}
+
+    def summary(self, **state):
+        """
+        Write the summary line and close the file.
+
+        :param state: anything else to record about the run, such as the solver.
+        :return: VOID
+        """
+        if self.file is None:
+            return
+
+        wall_time = time.time() - self.started
+        record = {
+            "type": "summary",
+            "iterations": self.iterations,
+            "wall_time": wall_time,
+            "stage_time": self.stage_time,
+            "stage_share": dict((name, seconds / wall_time if wall_time else 0.0)
+                                for name, seconds in self.stage_time.items()),
+            "peak_memory": peakMemory()
+        }
+        record.update(state)
+        self.write(record)
+        self.file.close()
+        self.file = None
+
+    def write(self, record):
+        """
+        Write one JSON line and flush it, so the file is useful even if the tool fails part way.
+
+        :param record: DICT the line to write.
+        :return: VOID
+        """
+        self.file.write(json.dumps(record, default=float) + "\n")
+        self.file.flush()
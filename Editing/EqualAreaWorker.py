@@ -0,0 +1,89 @@
+"""
+EqualAreaWorker.py: The worker processes of the per-feature mode of the Equal Area Polygon tool.
+
+Worker processes on Windows do not fork. They start a new interpreter that imports the main module of the parent before
+it runs any job. Inside a script tool the main module is the tool script, and Python 2.7 finds it through sys.argv[0]
+even when its __file__ is hidden, so every worker would import arcpy and run the whole tool again. While the pool starts
+this module stands in as the main module, so the workers import it instead. It imports nothing but NumPy and
+EqualAreaEngine and has no script body, so importing it does nothing.
+
+This module does not import arcpy.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import multiprocessing
+import numpy as np
+import os
+import sys
+
+import EqualAreaEngine
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def splitFeature(job):
+    """
+    Find the equal area cut lines of one feature. Runs in the worker processes of splitFeaturesInPool.
+
+    :param job: TUPLE (oid, edges, parts, angle, minimize_cut) where edges is the (n, 4) array of the feature's edges
+        from ringsToEdges and the rest are the tool parameters.
+    :return: TUPLE (oid, angle, cut_ys, extent) where cut_ys are the heights of the cut lines and extent is
+        (x_max, x_min, y_max, y_min), both in the feature's cut frame.
+    """
+    oid, edges, parts, angle, minimize_cut = job
+
+    if minimize_cut:
+        angle, cut_length = EqualAreaEngine.minimumCutAngle(edges, parts)
+
+    table = EqualAreaEngine.buildEdgeTable(EqualAreaEngine.rotateEdges(edges, angle))
+    profile = EqualAreaEngine.buildAreaProfile(table)
+    cut_ys = EqualAreaEngine.heightForArea(profile, [table["total"] * k / float(parts) for k in range(1, parts)])
+
+    return oid, angle, [float(y) for y in np.atleast_1d(cut_ys)], \
+        (table["x_max"], table["x_min"], table["y_max"], table["y_min"])
+
+
+def splitFeaturesInPool(jobs, processes=None, chunksize=16):
+    """
+    Run splitFeature over a stream of jobs in a pool of worker processes.
+
+    Jobs are pulled from the iterator as the workers need them, so the caller can stream features straight out of a
+    cursor. Results come back in the order they finish, not the order of the jobs.
+
+    This module is the main module while the workers start, so they import it instead of the tool script. ArcMap and
+    ArcCatalog are also not Python interpreters, so the workers are started with the pythonw.exe that ships with them.
+
+    :param jobs: ITERABLE of job tuples for splitFeature.
+    :param processes: INT the number of worker processes. Defaults to the number of cores.
+    :param chunksize: INT the number of jobs sent to a worker at a time.
+    :return: GENERATOR of splitFeature results.
+    """
+    if os.path.basename(sys.executable).lower() in ("arcmap.exe", "arccatalog.exe"):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, "pythonw.exe"))
+
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = sys.modules[__name__]
+    try:
+        pool = multiprocessing.Pool(processes or multiprocessing.cpu_count())
+    finally:
+        sys.modules["__main__"] = main
+
+    try:
+        for result in pool.imap_unordered(splitFeature, jobs, chunksize):
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
@@ -23,6 +23,9 @@ __status__ = "Production"
 import arcpy
 import os
 
+import SpatialIndex
+import USNG
+
 ########################################################################################################################
 #
 #                                                  TOOL PARAMETERS
@@ -48,6 +51,33 @@ import os
 #     USNGCoord field in save_path
 #
 # in_grid_field: FIELD The field in in_grid_layer that contains the data to append to the USNGCoord field.
+#
+# calculate_usng: BOOLEAN An optional switch to calculate the USNG label of each parcel from the coordinates of its
+#     label point instead of joining to in_grid_layer. No grid layer is needed.
+#
+# usng_precision: LONG The size of the calculated USNG grid cells in meters: 1, 10, 100, 1000, 10000 or 100000.
+#     Defaults to 1000.
+#
+# in_overlays: VALUE TABLE Optional polygon overlay layers, like floodplains or council districts, each with the field
+#     to read and the field of save_path to write it to. Each parcel gets the value of the overlay polygon its label
+#     point falls in. A field that is not already in save_path is added with the type of the overlay field.
+
+
+def optionalParameter(index, as_text=True):
+    """
+    Returns an optional tool parameter, or an empty value when the toolbox does not declare it. A toolbox saved before
+    the parameter was added still runs the tool, with the parameter's default.
+
+    :param index: INT
+        The position of the parameter.
+    :param as_text: BOOLEAN
+        True for the text of the parameter, false for its value.
+    :return: STRING
+        The parameter, or "" as text and None as a value when the toolbox does not declare it.
+    """
+    if index >= arcpy.GetArgumentCount():
+        return "" if as_text else None
+    return arcpy.GetParameterAsText(index) if as_text else arcpy.GetParameter(index)
 
 
 save_path = arcpy.GetParameterAsText(0)
@@ -57,6 +87,9 @@ in_zone_layer = arcpy.GetParameterAsText(3)
 in_zone_field = arcpy.GetParameterAsText(4)
 in_grid_layer = arcpy.GetParameterAsText(5)
 in_grid_field = arcpy.GetParameterAsText(6)
+calculate_usng = optionalParameter(7, as_text=False)
+usng_precision = int(optionalParameter(8) or 1000)
+in_overlays = optionalParameter(9, as_text=False)
 
 
 ########################################################################################################################
@@ -90,10 +123,81 @@ def pathToOutpath(path):
     return path
 
 
+def addFieldsToTable(in_table, fields, keep_precision=False):
+    """
+    Adds fields from a dictionary to a table.
+
+    Where the AddFields tool is available (ArcGIS Pro) all the fields are added in one call. AddFields has no precision
+    or scale, so with keep_precision the fields are added one at a time with AddField instead.
+
+    :param in_table: STRING
+        The table to add the fields to.
+    :param fields: DICT
+        A dictionary of fields, as described in createFeature.
+    :param keep_precision: BOOLEAN
+        Apply the precision and scale of the fields.
+    :return: VOID
+    """
+    if hasattr(arcpy, "AddFields_management") and not keep_precision:
+        arcpy.AddFields_management(in_table, [[fields[index].get("name"), fields[index].get("type"),
+                                               fields[index].get("alias"), fields[index].get("length")]
+                                              for index in sorted(fields)])
+    else:
+        for index in sorted(fields):
+            attributes = fields[index]
+            arcpy.AddField_management(in_table=in_table,
+                                      field_name=attributes.get("name"), field_type=attributes.get("type"),
+                                      field_precision=attributes.get("precision"), field_scale=attributes.get("scale"),
+                                      field_length=attributes.get("length"), field_alias=attributes.get("alias"))
+
+
+def createTemplate(geometry_type, spatial_reference, fields):
+    """
+    Materializes the schema of a feature class in memory, to be used as the template of the real feature class.
+
+    Fields are added to the in_memory workspace, where there are no schema locks or database round trips. The
+    in_memory workspace does not keep the precision and scale of numeric fields, so neither does a feature class
+    created from the template.
+
+    :param geometry_type: STRING
+        The geometry type of the feature class.
+    :param spatial_reference: SPATIAL REFERENCE
+        The spatial reference of the feature class.
+    :param fields: DICT
+        A dictionary of fields, as described in createFeature.
+    :return: STRING
+        The path of the template feature class.
+    """
+    template = os.path.join("in_memory", "building_assessment_template")
+    if arcpy.Exists(template):
+        arcpy.Delete_management(template)
+    arcpy.CreateFeatureclass_management("in_memory", "building_assessment_template", geometry_type,
+                                        spatial_reference=spatial_reference)
+    addFieldsToTable(template, fields)
+    return template
+
+
+def isEnterpriseWorkspace(workspace):
+    """
+    Returns true if a workspace is an enterprise geodatabase, the only kind that applies field precision and scale.
+
+    :param workspace: STRING
+        The workspace to be checked.
+    :return: BOOLEAN
+        True if the workspace is an enterprise geodatabase.
+    """
+    return getattr(arcpy.Describe(workspace), "workspaceType", None) == "RemoteDatabase"
+
+
 def createFeature(out_path, out_name, geometry_type, spatial_reference, fields):
     """
     Creates a feature class and optionally add fields from a dictionary.
 
+    The fields are first built into an in-memory template with createTemplate, and the feature class is then created
+    from the template in a single call. File and personal geodatabases ignore field precision and scale, so nothing is
+    lost. An enterprise geodatabase applies them, so when any field sets a precision or scale there the fields are
+    added to the new feature class one at a time instead, at the cost of one round trip per field.
+
     :param out_path: STRING
         The ArcSDE, file, or personal geodatabase, or the folder in which the output feature class
         will be created. This workspace must already exist.
@@ -135,20 +239,19 @@ def createFeature(out_path, out_name, geometry_type, spatial_reference, fields):
     # Send message to tool console.
     arcpy.AddMessage("\n\nCreating feature class {0} in location:{1}".format(out_path, out_name))
 
-    # Create the feature class
-    arcpy.CreateFeatureclass_management(out_path, out_name, geometry_type, spatial_reference=spatial_reference)
-
-    fc = os.path.join(out_path, out_name)
-
-    # Add the fields
-    for index in fields:
-        attributes = fields[index]
+    # The in_memory template drops precision and scale, which only an enterprise geodatabase would apply.
+    if any(f.get("precision") or f.get("scale") for f in fields.values()) and isEnterpriseWorkspace(out_path):
+        arcpy.AddMessage("    Adding {0} fields with their precision and scale...".format(len(fields)))
+        arcpy.CreateFeatureclass_management(out_path, out_name, geometry_type, spatial_reference=spatial_reference)
+        addFieldsToTable(os.path.join(out_path, out_name), fields, keep_precision=True)
+        return
 
-        arcpy.AddMessage("    Adding field {0} to {1}...".format(attributes.get("name"), out_name))
-        arcpy.AddField_management(in_table=fc,
-                                  field_name=attributes.get("name"), field_type=attributes.get("type"),
-                                  field_precision=attributes.get("precision"), field_scale=attributes.get("scale"),
-                                  field_length=attributes.get("length"), field_alias=attributes.get("alias"))
+    # Build the schema in memory, then create the feature class with every field in one operation.
+    arcpy.AddMessage("    Building schema with {0} fields...".format(len(fields)))
+    template = createTemplate(geometry_type, spatial_reference, fields)
+    arcpy.CreateFeatureclass_management(out_path, out_name, geometry_type, template=template,
+                                        spatial_reference=spatial_reference)
+    arcpy.Delete_management(template)
 
 
 def addSubtypes(in_table, field, in_subtypes, default_code):
@@ -285,113 +388,228 @@ def assignDomainToLayer(in_table, domains):
                 )
 
 
-def updatedFieldFromSpatialJoin(parent_fc, join_field, child_fc, update_field, source_field):
+def readLabelPoints(in_fc, spatial_reference=None):
+    """
+    Reads the label point of every feature of a polygon feature class in one SearchCursor pass. The label point is
+    used rather than the centroid because it is always inside the polygon.
+
+    :param in_fc: STRING
+        The polygon feature class or layer.
+    :param spatial_reference: SPATIAL REFERENCE
+        The spatial reference to read the points in. The spatial reference of in_fc when None.
+    :return: LIST
+        The object id of every feature with a shape.
+    :return: LIST
+        The x coordinate of the label point of every feature.
+    :return: LIST
+        The y coordinate of the label point of every feature.
     """
-    Updates a field in a parent feature class with a field from a child feature class based on a spatial join.
+    oids, x, y = [], [], []
+    with arcpy.da.SearchCursor(in_fc, ["OID@", "SHAPE@"], spatial_reference=spatial_reference) as cursor:
+        for oid, shape in cursor:
+            if shape is None:
+                continue
+            point = shape.labelPoint
+            oids.append(oid)
+            x.append(point.X)
+            y.append(point.Y)
 
-    The parent feature class is first converted to points before performing the spatial join with the child feature
-    class and finally using Field Calculator to update the update_field.
+    return oids, x, y
+
+
+def valuesFromOverlays(parent_fc, overlays):
+    """
+    Reads the field of the overlay polygon that the label point of each feature of a parent feature class falls in,
+    for several overlay layers at once.
+
+    The label points of the parent are read once. Each overlay is read in the spatial reference of the parent, packed
+    into an STR-tree and every point is located in it at once by SpatialIndex, in memory and without a spatial join or
+    scratch feature class. Where overlay polygons overlap, the first one is used.
 
     :param parent_fc: STRING
-        The polygon feature class who's field will be updated.
-    :param join_field: STRING
-        The field that will be used to join resulting spatial join back to the parent feature class.
-    :param child_fc:  STRING
-        The feature class containing the source field that will update the parent feature class.
-    :param update_field: STRING
-        The field from the parent feature class to be updated.
-    :param source_field: STRING
-        The field from the child feature class that will be the source.
-    :return: VOID
+        The polygon feature class or layer to be enriched.
+    :param overlays: LIST
+        A list of (overlay feature class, source field) pairs.
+    :return: LIST
+        A dictionary for every overlay with the value of the source field for the object id of every parent feature
+        that falls in one of its polygons.
     """
-    arcpy.AddMessage("\nUpdating field from spatial join...")
-    arcpy.AddMessage("    Converting parent feature class to points...")
-    arcpy.FeatureToPoint_management(parent_fc, r"in_memory\parcel_pnt")
-
-    arcpy.AddMessage("    Creating spatial join...")
-    spatial_out = os.path.join(arcpy.env.scratchGDB, "scratch_spatial_out")
-
-    arcpy.SpatialJoin_analysis(
-        target_features=r"in_memory\parcel_pnt",
-        join_features=child_fc,
-        out_feature_class=spatial_out
-    )
-
-    arcpy.AddIndex_management(
-        in_table=spatial_out,
-        fields=join_field,
-        index_name=join_field
-    )
-
-    arcpy.AddMessage("    Joining back to parent feature class...")
-    arcpy.AddJoin_management(
-        in_layer_or_view=parent_fc,
-        in_field=join_field,
-        join_table=spatial_out,
-        join_field=join_field,
-        join_type="KEEP_ALL"
-    )
-
-    arcpy.AddMessage("    Calculating field...this may take a while...")
-    arcpy.CalculateField_management(
-        in_table=parent_fc,
-        field=update_field,
-        expression="!" + source_field + "!",
-        expression_type="PYTHON"
-    )
-
-    arcpy.AddMessage("    Removing join and cleaning workspace...")
-    arcpy.RemoveJoin_management("in_memory\parcel")
-    arcpy.Delete_management(r"in_memory\parcel_pnt")
-    arcpy.Delete_management(r"in_memory\parcel_pnt_U_in_grid")
-    arcpy.Delete_management(spatial_out)
-
-
-def updateFieldFromJoin(in_layer, in_field, join_layer, join_field, calc_field, expression):
-    """
-    Updates a field in a parent feature class with a field in the joined child feature class.
-
-    :param in_layer: STRING
-        The parent feature class who's field will be updated.
-    :param in_field: STRING
-        The parent feature class field to join on.
-    :param join_layer: STRING
-        The child feature class.
-    :param join_field: STRING
-        The child feature class field to join on.
-    :param calc_field: STRING
-        The field that will be updated.
-    :param expression: PYTHON EXPRESSION
-        The expression used to update the field. Note that fields from the joined table
-        must be preceded with the child feature class name. For example:
-
-            <name of feature class>.<field name>
-    :return: VOID
+    arcpy.AddMessage("\nReading overlay fields from parcel label points...")
+    spatial_reference = arcpy.Describe(parent_fc).spatialReference
+    oids, x, y = readLabelPoints(parent_fc, spatial_reference)
+
+    overlay_values = []
+    for child_fc, source_field in overlays:
+        arcpy.AddMessage("    Indexing {0}...".format(child_fc))
+        rings, values = [], []
+        with arcpy.da.SearchCursor(child_fc, ["SHAPE@", source_field], spatial_reference=spatial_reference) as cursor:
+            for shape, value in cursor:
+                rings.append(SpatialIndex.polygonRings(shape))
+                values.append(value)
+
+        polygon = SpatialIndex.polygonAt(SpatialIndex.buildIndex(rings), x, y)
+        overlay_values.append(dict((oids[i], values[p]) for i, p in enumerate(polygon.tolist()) if p >= 0))
+        arcpy.AddMessage("    {0} of {1} parcels fall in {2}".format(len(overlay_values[-1]), len(oids), child_fc))
+
+    return overlay_values
+
+
+def usngLabelsFromLabelPoints(in_fc, precision):
+    """
+    Calculates the USNG label of every feature from the latitude and longitude of its label point.
+
+    The label points are read in one SearchCursor pass, projected to WGS84 by the cursor, and labeled all at once by
+    USNG.usngLabels.
+
+    :param in_fc: STRING
+        The polygon feature class or layer to label.
+    :param precision: INT
+        The size of the grid cells in meters: 1, 10, 100, 1000, 10000 or 100000.
+    :return: DICT
+        The USNG label of every object id. Features without a shape, or outside the UTM latitudes, are left out.
+    """
+    arcpy.AddMessage("    Reading label points...")
+    oids, longitudes, latitudes = readLabelPoints(in_fc, arcpy.SpatialReference(4326))
+
+    arcpy.AddMessage("    Calculating {0} USNG labels at {1} meter precision...".format(len(oids), precision))
+    labels = USNG.usngLabels(latitudes, longitudes, precision)
+
+    return dict((oid, label) for oid, label in zip(oids, labels) if label)
+
+
+def readValues(in_table, key_field, value_field):
+    """
+    Reads a dictionary of values keyed by another field in one SearchCursor pass. Where a key is repeated the first
+    value is kept, as a join would.
+
+    :param in_table: STRING
+        The table or layer to read.
+    :param key_field: STRING
+        The field of the keys.
+    :param value_field: STRING
+        The field of the values.
+    :return: DICT
+        The value of every key.
+    """
+    values = {}
+    with arcpy.da.SearchCursor(in_table, [key_field, value_field]) as cursor:
+        for key, value in cursor:
+            if key is not None and key not in values:
+                values[key] = value
+
+    return values
+
+
+def updateFields(in_table, enrichments, defaults=None):
+    """
+    Writes every derived field of a feature class in a single UpdateCursor pass.
+
+    The values of every field are gathered beforehand, each into a dictionary keyed by a field of the feature class, so
+    the table is rewritten once however many fields are derived. Rows whose values are already current are not
+    written at all.
+
+    :param in_table: STRING
+        The table or layer to be updated.
+    :param enrichments: LIST
+        A list of dictionaries describing each derived field:
+
+            enrichments = [
+                {
+                    "field": "FULL_ZONE",          # The field to be updated.
+                    "key": "ACCOUNT_NUM",           # The field the values are keyed on, OID@ for the object id.
+                    "values": {"123": "R-1"},       # The value of every key.
+                    "clear_unmatched": True         # Set the field to null on rows whose key is not in values.
+                }
+            ]
+
+    :param defaults: DICT
+        Values to set on every row, where the key is the field name.
+    :return: INT
+        The number of rows written.
+    :return: DICT
+        The number of rows whose key was found, for the field of every enrichment.
+    :return: DICT
+        The number of rows whose key was not found, for the field of every enrichment.
+    """
+    defaults = defaults or {}
+
+    fields = []
+    for field in [e["key"] for e in enrichments] + [e["field"] for e in enrichments] + list(defaults):
+        if field not in fields:
+            fields.append(field)
+    position = dict((field, index) for index, field in enumerate(fields))
+
+    written = 0
+    matched = dict((e["field"], 0) for e in enrichments)
+    unmatched = dict((e["field"], 0) for e in enrichments)
+    with arcpy.da.UpdateCursor(in_table, fields) as cursor:
+        for row in cursor:
+            new_row = list(row)
+            for enrichment in enrichments:
+                key = row[position[enrichment["key"]]]
+                if key in enrichment["values"]:
+                    new_row[position[enrichment["field"]]] = enrichment["values"][key]
+                    matched[enrichment["field"]] += 1
+                else:
+                    unmatched[enrichment["field"]] += 1
+                    if enrichment.get("clear_unmatched"):
+                        new_row[position[enrichment["field"]]] = None
+            for field in defaults:
+                new_row[position[field]] = defaults[field]
+
+            if new_row != list(row):
+                cursor.updateRow(new_row)
+                written += 1
+
+    return written, matched, unmatched
+
+
+def overlayTable(value_table):
+    """
+    Returns the rows of the in_overlays value table.
+
+    :param value_table: VALUE TABLE
+        A value table of overlay layer, source field and target field, or None.
+    :return: LIST
+        A list of (overlay layer, source field, target field).
     """
-    arcpy.AddMessage("\nUpdating field from join...")
+    if not value_table:
+        return []
 
-    arcpy.AddJoin_management(
-        in_layer_or_view=in_layer,
-        in_field=in_field,
-        join_table=join_layer,
-        join_field=join_field,
-        join_type="KEEP_ALL"
-    )
+    return [tuple(str(value_table.getValue(row, column)) for column in range(3)) for row in range(value_table.rowCount)]
 
-    scratch_zoning = os.path.join(arcpy.env.scratchGDB, "scratch_buildingassessment")
-    arcpy.CopyFeatures_management(in_layer, scratch_zoning)
 
+def overlayFields(fields, overlays):
+    """
+    Adds the target fields of the overlays that are not already in a dictionary of fields, with the type and length of
+    their source field.
 
-    arcpy.AddMessage("    Calculating field...this may take a while...")
-    arcpy.CalculateField_management(
-        in_table=in_layer,
-        field=calc_field,
-        expression=expression,
-        expression_type="PYTHON"
-    )
+    Every overlay is checked for its source field first, so a misspelled field stops the tool with an error before
+    anything is created.
 
-    arcpy.AddMessage("....Removing Join and cleaning workspace...")
-    arcpy.RemoveJoin_management(in_layer)
+    :param fields: DICT
+        A dictionary of fields, as described in createFeature. It is updated in place.
+    :param overlays: LIST
+        A list of (overlay layer, source field, target field).
+    :return: VOID
+    """
+    field_types = {"String": "TEXT", "Integer": "LONG", "SmallInteger": "SHORT", "Double": "DOUBLE",
+                   "Single": "FLOAT", "Date": "DATE"}
+    names = [fields[index]["name"].upper() for index in fields]
+
+    for child_fc, source_field, target_field in overlays:
+        source = arcpy.ListFields(child_fc, source_field)
+        if not source:
+            message = "The overlay layer {0} has no field {1}".format(child_fc, source_field)
+            arcpy.AddError(message)
+            raise arcpy.ExecuteError(message)
+        if target_field.upper() in names:
+            continue
+        source = source[0]
+        fields[max(fields) + 1] = {'name': target_field, 'type': field_types.get(source.type, 'TEXT'),
+                                   'precision': None, 'scale': None, 'length': source.length if
+                                   source.type == "String" else None, 'alias': target_field, 'domain': None}
+        names.append(target_field.upper())
 
 
 def isSDE(input_fc):
@@ -431,9 +649,11 @@ arcpy.env.workspace = 'in_memory'
 # addFields: DICT A dictionary containing all the fields to be added to the created feature class defined by save_path.
 # subtypes: DICT A dictionary of coded values where the key is the subtype code and the value is the subtype description
 # addDomains: DICT A dictionary of domains to be added to the geodtabase and fields that will be assigned the domain.
+# overlays: LIST Derived from the in_overlays parameter, the overlay layer, source field and target field of each row.
 
 fc_path = pathToOutpath(save_path)
 fc_name = pathToFilename(save_path)
+overlays = overlayTable(in_overlays)
 
 addFields = {
     0: {'name': 'InspectorId', 'type': 'TEXT', 'precision': None, 'scale': None, 'length': 50, 'alias': 'Inspector ID', 'domain': None},
@@ -575,6 +795,10 @@ addDomains = {
 
 
 
+# Add a field for every overlay whose target field is not one of the BuildingAssessment fields.
+overlayFields(addFields, overlays)
+
+
 # Create the feature class, hereafter called the BuildingAssessment feature class, and add the necessary fields that
 # will be used to evaluate parcel property damage. The resulting feature class will be published as a service for use in
 # Collector App and to display data in an Operational Dashboard.
@@ -614,11 +838,8 @@ arcpy.Append_management(
 # type for the parcel.
 
 
-# Add an index to the BuildingAssessment feature class. To add the USNG grid label to the BuildingAssessment feature
-# class we convert the BuildingAssessment feature class to points, do a spatial join on the USNG grid, then join the
-# resulting feature class back on the original BuildingAssessment feature class on the ACCOUNT_NUM field before using
-# the Field Calculator to transfer the data from the joined USNG label to the BuildingAssessment USNG label. Having an
-# index on the join field greatly improves the performance of both the join and the Field Calculator.
+# Add an index to the BuildingAssessment feature class. The derived fields below are matched to the parcels on the
+# ACCOUNT_NUM field, and the published service is searched by it.
 arcpy.AddIndex_management(
     in_table=save_path,
     fields="ACCOUNT_NUM",
@@ -626,46 +847,68 @@ arcpy.AddIndex_management(
 )
 
 
-# Create a feature layer of the BuildingAssessment feature class. ArcPy requires a feature layer to perform joins.
+# Create a feature layer of the BuildingAssessment feature class. Any updates we do on the feature layer will be honored
+# in the feature class.
 arcpy.MakeFeatureLayer_management(
     in_features=save_path,
     out_layer="in_memory\parcel"
 )
 
 
+# The derived fields are gathered first from each of their sources, and then written together in a single pass over
+# the BuildingAssessment feature class. Each entry of enrichments holds the values of one field, see updateFields.
+enrichments = []
+
+
+# If the user has chosen to calculate the USNG labels, the grid layer is not needed at all. The U.S. National Grid is
+# laid out on the UTM projection, so the label of each parcel is worked out from the coordinates of its label point.
+if calculate_usng:
+
+    arcpy.AddMessage("\nCalculating USNG labels from parcel label points...")
+    enrichments.append({"field": "USNGCoord", "key": "OID@", "clear_unmatched": False,
+                        "values": usngLabelsFromLabelPoints("in_memory\parcel", usng_precision)})
+
 # If the user has included a USNG layer, then update the specified BuildingAssessment field with the specified USNG
-# field. Note, that we are pointing to the BuildingAssessment feature layer. Any field calculations we do on the feature
-# layer will be honored in the feature class.
+# field. The USNG layer is joined with any other overlay layers below.
 # The latest USNG layer can be downloaded from https://www.arcgis.com/home/item.html?id=dc352c5f18854d82b32bce92c0b6656b
-if in_grid_layer:
+elif in_grid_layer:
+
+    overlays.insert(0, (in_grid_layer, in_grid_field, "USNGCoord"))
+
 
-    updatedFieldFromSpatialJoin("in_memory\parcel", "ACCOUNT_NUM", in_grid_layer, "USNGCoord", in_grid_field)
+# Join the label point of every parcel to each overlay layer, all in one pass over the parcels, and update the target
+# field with the field of the overlay polygon it falls in. Parcels that fall in no polygon are set to null.
+if overlays:
 
+    overlay_values = valuesFromOverlays("in_memory\parcel", [(child_fc, source_field)
+                                                             for child_fc, source_field, target_field in overlays])
+    for (child_fc, source_field, target_field), values in zip(overlays, overlay_values):
+        enrichments.append({"field": target_field, "key": "OID@", "clear_unmatched": True, "values": values})
 
-# If the user has included a Zoning layer, then update the specidied BuildingAssessment field with the expression. Again,
-# we are point to the BuildingAssessment feature layer. Any field calculations we do on the feature layer will be
-# honored in the feature class.
+
+# If the user has included a Zoning layer, then update the specidied BuildingAssessment field with the zoning field of
+# the matching account.
 if in_zone_layer:
 
-    zone_field = in_zone_layer + "." + in_zone_field
-    expression = "!" + zone_field + "!"
+    arcpy.AddMessage("\nReading {0} from {1}...".format(in_zone_field, in_zone_layer))
+    enrichments.append({"field": "FULL_ZONE", "key": "ACCOUNT_NUM", "clear_unmatched": True,
+                        "values": readValues(in_zone_layer, "ACCT_", in_zone_field)})
+
+
+# Write the derived fields and the default values to the feature class in one pass.
+arcpy.AddMessage("\nWriting derived fields and default values...")
+rows_written, rows_matched, rows_unmatched = updateFields("in_memory\parcel", enrichments, {"Placard": 0})
+for enrichment in enrichments:
+    arcpy.AddMessage("    {0}: {1} rows matched, {2} rows did not match".format(
+        enrichment["field"], rows_matched[enrichment["field"]], rows_unmatched[enrichment["field"]]))
+arcpy.AddMessage("    {0} rows written".format(rows_written))
 
-    updateFieldFromJoin("in_memory\parcel", "ACCOUNT_NUM",
-                        in_zone_layer, "ACCT_",
-                        "FULL_ZONE", expression)
 
 # If the feature class was saved to an enterprise geodatabase, register the feature class as versioned so that it can
-# be edited.
+# be edited. This is done after the derived fields are written, which would otherwise need an edit session.
 if isSDE(save_path):
     arcpy.RegisterAsVersioned_management(save_path)
 
-# Add any default values to the feature class.
-cursor = arcpy.da.UpdateCursor("in_memory\parcel", ["Placard"])
-
-for row in cursor:
-    row[0] = "0"
-    cursor.updateRow(row)
-
 ########################################################################################################################
 #
 #                                                      DONE
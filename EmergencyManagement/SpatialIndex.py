@@ -0,0 +1,230 @@
+"""
+SpatialIndex.py: Finds the polygons that hold each of a set of points, with NumPy.
+
+The tools that look up the polygon a point falls in, like the collection zone of an address or the zoning district of a
+parcel, share this module instead of each keeping their own spatial index:
+
+    polygons -> Sort-Tile-Recursive tree (STR-tree) of their bounding boxes
+    points   -> walk down the tree together, keeping the polygons whose boxes hold each point
+             -> even-odd point in polygon test against the edges of those polygons only
+
+Every level of the tree is stored as arrays of node boxes and the range of children each node holds in the level below,
+so a whole batch of points walks the tree together without a Python loop per point. The tree is built once and can be
+queried with any number of points.
+
+This file is the only source of the module. Every tool folder that uses it ships a copy, so each folder can still be
+downloaded on its own. Edit this file and copy it over the copies, the tests check that they match.
+
+This module does not import arcpy.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import numpy as np
+
+# NODE_CAPACITY: INT the largest number of children of a node in the STR-tree.
+# MAX_EDGES: INT the largest number of point and edge pairs tested at once, which bounds the memory of a query.
+NODE_CAPACITY = 16
+MAX_EDGES = 2000000
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def polygonRings(shape):
+    """
+    Return the rings of an arcpy polygon, outer rings and holes alike.
+
+    :param shape: POLYGON the polygon, or None.
+    :return: LIST a list of (x, y) vertices for every ring.
+    """
+    rings = []
+    for part in shape or []:
+        ring = []
+        for pnt in part:
+            # A None point separates the outer ring of a part from its holes.
+            if pnt is None:
+                rings.append(ring)
+                ring = []
+            else:
+                ring.append((pnt.X, pnt.Y))
+        rings.append(ring)
+    return rings
+
+
+def strOrder(boxes, capacity):
+    """
+    Return the Sort-Tile-Recursive order of a set of boxes.
+
+    The boxes are sorted by the x of their centers and cut into vertical slices, then each slice is sorted by the y of
+    the centers. Taking the boxes capacity at a time in this order gives nodes that are compact and rarely overlap.
+
+    :param boxes: ARRAY an (n, 4) array of x_min, y_min, x_max, y_max.
+    :param capacity: INT the number of children of a node.
+    :return: ARRAY the order of the boxes.
+    """
+    n = len(boxes)
+    slice_size = max(1, int(np.ceil(np.sqrt(np.ceil(n / float(capacity)))))) * capacity
+
+    # The box of a polygon without rings is inverted infinities. Its center is NaN, which sorts last.
+    with np.errstate(invalid="ignore"):
+        order = np.argsort((boxes[:, 0] + boxes[:, 2]) / 2.0, kind="mergesort")
+        center_y = (boxes[:, 1] + boxes[:, 3]) / 2.0
+    for start in range(0, n, slice_size):
+        tile = order[start:start + slice_size]
+        order[start:start + slice_size] = tile[np.argsort(center_y[tile], kind="mergesort")]
+    return order
+
+
+def buildIndex(polygons, capacity=NODE_CAPACITY):
+    """
+    Build the STR-tree of a set of polygons.
+
+    :param polygons: LIST the rings of every polygon, each a list or (n, 2) array of (x, y) vertices. Outer rings and
+        holes are treated alike, and a polygon without rings never holds a point.
+    :param capacity: INT the largest number of children of a node.
+    :return: DICT the index:
+
+            index = {
+                "edges": (m, 4) array of x1, y1, x2, y2 of every ring edge, polygon by polygon,
+                "edge_start", "edge_count": where the edges of each polygon are in edges,
+                "levels": list of {"boxes", "start", "end"} from the leaves to the root. The leaf level holds the
+                    polygon boxes and start is the polygon number.
+            }
+    """
+    edges = []
+    edge_count = np.zeros(len(polygons), dtype=np.int64)
+    boxes = np.tile([np.inf, np.inf, -np.inf, -np.inf], (len(polygons), 1))
+
+    for number, rings in enumerate(polygons):
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+            if len(ring) < 3:
+                continue
+            edges.append(np.hstack([ring, np.roll(ring, -1, axis=0)]))
+            edge_count[number] += len(ring)
+            boxes[number] = [min(boxes[number, 0], ring[:, 0].min()), min(boxes[number, 1], ring[:, 1].min()),
+                             max(boxes[number, 2], ring[:, 0].max()), max(boxes[number, 3], ring[:, 1].max())]
+
+    # The leaves are the polygons. Each level above groups capacity nodes of the level below, in STR order.
+    order = strOrder(boxes, capacity).astype(np.int64)
+    levels = [{"boxes": boxes[order], "start": order, "end": order + 1}]
+    while len(levels[-1]["boxes"]) > capacity:
+        below = levels[-1]["boxes"]
+        start = np.arange(0, len(below), capacity)
+        boxes = np.column_stack([np.minimum.reduceat(below[:, 0], start), np.minimum.reduceat(below[:, 1], start),
+                                 np.maximum.reduceat(below[:, 2], start), np.maximum.reduceat(below[:, 3], start)])
+        order = strOrder(boxes, capacity)
+        levels.append({"boxes": boxes[order], "start": start[order],
+                       "end": np.minimum(start + capacity, len(below))[order]})
+
+    return {
+        "edges": np.vstack(edges) if edges else np.zeros((0, 4)),
+        "edge_start": np.cumsum(edge_count) - edge_count,
+        "edge_count": edge_count,
+        "levels": levels
+    }
+
+
+def candidatePairs(index, x, y):
+    """
+    Walk a set of points down the tree together and return every polygon whose box holds each point.
+
+    :param index: DICT the index from buildIndex.
+    :param x: ARRAY the x coordinate of every point.
+    :param y: ARRAY the y coordinate of every point.
+    :return: ARRAY the number of the point of every pair.
+    :return: ARRAY the number of the polygon of every pair.
+    """
+    levels = index["levels"]
+    root = len(levels[-1]["boxes"])
+    point = np.repeat(np.arange(len(x)), root)
+    node = np.tile(np.arange(root), len(x))
+
+    for level in reversed(levels):
+        boxes = level["boxes"]
+        px, py = x[point], y[point]
+        inside = (boxes[node, 0] <= px) & (px <= boxes[node, 2]) & (boxes[node, 1] <= py) & (py <= boxes[node, 3])
+        point, node = point[inside], node[inside]
+
+        # Expand every pair into one pair for each child of the node. At the leaves the only child is the polygon.
+        start = level["start"][node]
+        count = level["end"][node] - start
+        point = np.repeat(point, count)
+        node = np.repeat(start - (np.cumsum(count) - count), count) + np.arange(int(count.sum()))
+
+    return point, node
+
+
+def queryPoints(index, x, y, max_edges=MAX_EDGES):
+    """
+    Return every polygon that holds each of a set of points.
+
+    The pairs from candidatePairs are tested with the even-odd rule against the edges of their polygon, a block of
+    pairs at a time so no more than max_edges edges are tested at once. Holes and multipart polygons are handled by the
+    even-odd rule.
+
+    :param index: DICT the index from buildIndex.
+    :param x: ARRAY the x coordinate of every point, in the spatial reference of the polygons.
+    :param y: ARRAY the y coordinate of every point.
+    :param max_edges: INT the largest number of point and edge pairs to test at once.
+    :return: ARRAY the number of each point, once for every polygon that holds it, sorted by point then polygon.
+    :return: ARRAY the number of the polygon that holds it.
+    """
+    x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+    y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+
+    point, node = candidatePairs(index, x, y)
+    edge_start = index["edge_start"][node]
+    edge_count = index["edge_count"][node]
+    hits = np.zeros(len(point), dtype=bool)
+
+    pair = 0
+    while pair < len(point):
+        # Take as many pairs as fit under max_edges, but always at least one.
+        stop = pair + max(1, int(np.searchsorted(np.cumsum(edge_count[pair:]), max_edges, side="right")))
+
+        counts = edge_count[pair:stop]
+        owner = np.repeat(np.arange(stop - pair), counts)
+        edges = index["edges"][np.repeat(edge_start[pair:stop] - (np.cumsum(counts) - counts), counts) +
+                               np.arange(int(counts.sum()))]
+        px, py = x[point[pair:stop]][owner], y[point[pair:stop]][owner]
+
+        crosses = (edges[:, 1] > py) != (edges[:, 3] > py)
+        dy = np.where(crosses, edges[:, 3] - edges[:, 1], 1.0)
+        x_at = edges[:, 0] + (py - edges[:, 1]) * (edges[:, 2] - edges[:, 0]) / dy
+        hits[pair:stop] = np.bincount(owner, crosses & (px < x_at), stop - pair) % 2 == 1
+        pair = stop
+
+    point, node = point[hits], node[hits]
+    order = np.lexsort([node, point])
+    return point[order], node[order]
+
+
+def polygonAt(index, x, y, max_edges=MAX_EDGES):
+    """
+    Return the polygon that holds each of a set of points. Where polygons overlap the point gets the first of them, in
+    the order they were given.
+
+    :param index: DICT the index from buildIndex.
+    :param x: ARRAY the x coordinate of every point, in the spatial reference of the polygons.
+    :param y: ARRAY the y coordinate of every point.
+    :param max_edges: INT the largest number of point and edge pairs to test at once.
+    :return: ARRAY the number of the polygon that holds every point, or -1 where none does.
+    """
+    x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+    polygon = np.full(len(x), -1, dtype=np.int64)
+
+    # The pairs are sorted by point then polygon, so the first pair of every point has its first polygon.
+    point, node = queryPoints(index, x, y, max_edges)
+    point, first = np.unique(point, return_index=True)
+    polygon[point] = node[first]
+    return polygon
@@ -0,0 +1,178 @@
+"""
+USNG.py: Computes U.S. National Grid labels from latitude and longitude with NumPy.
+
+The U.S. National Grid is the Military Grid Reference System on the UTM projection, so a label can be worked out from
+the coordinates alone. There is no need for a grid layer or a spatial join. Every step works on whole arrays, so a
+county of parcels is labeled at once:
+
+    latitude, longitude -> UTM zone, easting and northing (WGS84 / NAD83 ellipsoid)
+                        -> grid zone designation, like 14S
+                        -> 100,000 meter square identifier, like PB
+                        -> easting and northing within the square, truncated to the precision
+
+A label looks like 14S PB 123 456 at 100 meter precision. Points outside the UTM latitudes, north of 84N or south of
+80S, get no label.
+
+This module does not import arcpy.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import numpy as np
+
+# SEMI_MAJOR_AXIS: DOUBLE the equatorial radius of the WGS84 ellipsoid in meters. NAD83 differs by less than a
+#   millimeter.
+# FLATTENING: DOUBLE the flattening of the WGS84 ellipsoid.
+# SCALE_FACTOR: DOUBLE the UTM scale factor on the central meridian.
+# FALSE_EASTING: DOUBLE the UTM false easting in meters.
+# FALSE_NORTHING: DOUBLE the UTM false northing of the southern hemisphere in meters.
+# BAND_LETTERS: STRING the latitude band letters from 80S, 8 degrees each. X covers 72N to 84N.
+# COLUMN_LETTERS: LIST the 100,000 meter column letters of zones 1, 2 and 3, repeating every three zones.
+# ROW_LETTERS: STRING the 100,000 meter row letters, repeating every 2,000,000 meters.
+SEMI_MAJOR_AXIS = 6378137.0
+FLATTENING = 1 / 298.257223563
+SCALE_FACTOR = 0.9996
+FALSE_EASTING = 500000.0
+FALSE_NORTHING = 10000000.0
+BAND_LETTERS = "CDEFGHJKLMNPQRSTUVWX"
+COLUMN_LETTERS = ["ABCDEFGH", "JKLMNPQR", "STUVWXYZ"]
+ROW_LETTERS = "ABCDEFGHJKLMNPQRSTUV"
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def utmZone(latitude, longitude):
+    """
+    Returns the UTM zone of every point, with the exceptions for southern Norway and Svalbard.
+
+    :param latitude: ARRAY
+        The latitude of every point in decimal degrees.
+    :param longitude: ARRAY
+        The longitude of every point in decimal degrees.
+    :return: ARRAY
+        The zone number, 1 to 60.
+    """
+    longitude = (longitude + 180.0) % 360.0 - 180.0
+    zone = np.floor((longitude + 180.0) / 6.0).astype(np.int64) + 1
+    zone = np.where(zone > 60, 1, zone)
+
+    # Southern Norway is in a wider zone 32.
+    zone = np.where((latitude >= 56) & (latitude < 64) & (longitude >= 3) & (longitude < 12), 32, zone)
+
+    # Svalbard only uses the odd zones 31 to 37.
+    svalbard = (latitude >= 72) & (latitude < 84)
+    for west, east, svalbard_zone in ((0, 9, 31), (9, 21, 33), (21, 33, 35), (33, 42, 37)):
+        zone = np.where(svalbard & (longitude >= west) & (longitude < east), svalbard_zone, zone)
+    return zone
+
+
+def toUTM(latitude, longitude, zone=None):
+    """
+    Projects points to UTM with the transverse Mercator series of Snyder, accurate to well under a meter inside the
+    zone.
+
+    :param latitude: ARRAY
+        The latitude of every point in decimal degrees.
+    :param longitude: ARRAY
+        The longitude of every point in decimal degrees.
+    :param zone: ARRAY
+        The UTM zone of every point. The zone of each point when None.
+    :return: ARRAY
+        The zone of every point.
+    :return: ARRAY
+        The easting of every point in meters.
+    :return: ARRAY
+        The northing of every point in meters, with the false northing added in the southern hemisphere.
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    if zone is None:
+        zone = utmZone(latitude, longitude)
+
+    e2 = FLATTENING * (2 - FLATTENING)
+    ep2 = e2 / (1 - e2)
+    phi = np.radians(latitude)
+    central_meridian = np.radians((zone - 1) * 6.0 - 180.0 + 3.0)
+
+    sin_phi, cos_phi, tan_phi = np.sin(phi), np.cos(phi), np.tan(phi)
+    n = SEMI_MAJOR_AXIS / np.sqrt(1 - e2 * sin_phi ** 2)
+    t = tan_phi ** 2
+    c = ep2 * cos_phi ** 2
+    a = cos_phi * ((np.radians(longitude) - central_meridian + np.pi) % (2 * np.pi) - np.pi)
+    m = SEMI_MAJOR_AXIS * ((1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256) * phi -
+                           (3 * e2 / 8 + 3 * e2 ** 2 / 32 + 45 * e2 ** 3 / 1024) * np.sin(2 * phi) +
+                           (15 * e2 ** 2 / 256 + 45 * e2 ** 3 / 1024) * np.sin(4 * phi) -
+                           (35 * e2 ** 3 / 3072) * np.sin(6 * phi))
+
+    easting = FALSE_EASTING + SCALE_FACTOR * n * (a + (1 - t + c) * a ** 3 / 6 +
+                                                   (5 - 18 * t + t ** 2 + 72 * c - 58 * ep2) * a ** 5 / 120)
+    northing = SCALE_FACTOR * (m + n * tan_phi * (a ** 2 / 2 + (5 - t + 9 * c + 4 * c ** 2) * a ** 4 / 24 +
+                                                  (61 - 58 * t + t ** 2 + 600 * c - 330 * ep2) * a ** 6 / 720))
+    northing = np.where(latitude < 0, northing + FALSE_NORTHING, northing)
+    return zone, easting, northing
+
+
+def usngLabels(latitude, longitude, precision=1000):
+    """
+    Returns the U.S. National Grid label of every point.
+
+    :param latitude: ARRAY
+        The latitude of every point in decimal degrees.
+    :param longitude: ARRAY
+        The longitude of every point in decimal degrees.
+    :param precision: INT
+        The size of the grid cells in meters: 1, 10, 100, 1000, 10000 or 100000.
+    :return: LIST
+        The label of every point, like 14S PB 12 34 at 1000 meter precision, or None for points outside the UTM
+        latitudes.
+    """
+    if precision not in (1, 10, 100, 1000, 10000, 100000):
+        raise ValueError("The USNG precision must be a power of ten from 1 to 100000 meters, not {0}".format(precision))
+
+    latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+    longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+    if not len(latitude):
+        return []
+    zone, easting, northing = toUTM(latitude, longitude)
+
+    band = np.clip(np.floor((latitude + 80.0) / 8.0).astype(np.int64), 0, len(BAND_LETTERS) - 1)
+    column = np.clip(np.floor(easting / 100000.0).astype(np.int64) - 1, 0, 7)
+    row = (np.floor(northing / 100000.0).astype(np.int64) + np.where(zone % 2 == 0, 5, 0)) % len(ROW_LETTERS)
+
+    digits = 5 - int(round(np.log10(precision)))
+    cell_easting = (np.floor(easting % 100000.0 / precision)).astype(np.int64)
+    cell_northing = (np.floor(northing % 100000.0 / precision)).astype(np.int64)
+    valid = (latitude >= -80.0) & (latitude <= 84.0) & np.isfinite(easting) & np.isfinite(northing)
+
+    # Parcels are far more numerous than grid cells, so every distinct cell is labeled once and the labels are spread
+    # back out to the points. The cell is packed into one integer to find the distinct ones.
+    size = 10 ** digits
+    cell = (((zone * 20 + band) * 8 + column) * 20 + row) * size * size + cell_easting * size + cell_northing
+    cells, inverse = np.unique(np.where(valid, cell, -1), return_inverse=True)
+
+    number = "{0:0" + str(digits) + "d}"
+    cell_labels = []
+    for value in cells:
+        if value < 0:
+            cell_labels.append(None)
+            continue
+        value, cell_n = divmod(int(value), size)
+        value, cell_e = divmod(value, size)
+        value, r = divmod(value, 20)
+        value, col = divmod(value, 8)
+        z, b = divmod(value, 20)
+        label = "{0}{1} {2}{3}".format(z, BAND_LETTERS[b], COLUMN_LETTERS[(z - 1) % 3][col], ROW_LETTERS[r])
+        if digits:
+            label += " " + number.format(cell_e) + " " + number.format(cell_n)
+        cell_labels.append(label)
+
+    return [cell_labels[i] for i in inverse.ravel()]
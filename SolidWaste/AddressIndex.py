@@ -0,0 +1,273 @@
+"""
+AddressIndex.py: A normalized trigram index of the address points for the Identify Recycle Date By Address tool.
+
+The tool used to find an address with "ADDRESS" LIKE '%<input>%'. The leading wildcard keeps the database from using any
+index, so every query scanned the whole address layer. This module builds an index of the addresses once, after the
+addresses that are not collected have been left out, and answers exact, substring and fuzzy queries by probing it.
+
+Addresses are normalized before they are indexed or queried: upper case, punctuation removed, single spaces, and street
+types and directions spelled out, so 123 N. Main St matches 123 NORTH MAIN STREET. Every normalized address is split
+into overlapping three letter pieces, its trigrams. The index maps every trigram to the sorted numbers of the addresses
+that hold it.
+
+    exact     - a dictionary lookup of the normalized address.
+    substring - intersects the postings of the query's trigrams, rarest first, and checks the few addresses left.
+    fuzzy     - counts the trigrams every address shares with the query and ranks them by the Dice coefficient.
+
+This module does not import arcpy.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import json
+import numpy as np
+import re
+
+import CollectionZoneIndex
+
+# STREET_TYPES: DICT the spelled out form of common USPS street type abbreviations.
+# DIRECTIONS: DICT the spelled out form of direction abbreviations.
+# MIN_SCORE: DOUBLE the lowest Dice coefficient a fuzzy match can have.
+STREET_TYPES = {
+    "AV": "AVENUE", "AVE": "AVENUE", "BLVD": "BOULEVARD", "CIR": "CIRCLE", "CT": "COURT", "CV": "COVE",
+    "DR": "DRIVE", "EXPY": "EXPRESSWAY", "FWY": "FREEWAY", "HWY": "HIGHWAY", "LN": "LANE", "PKWY": "PARKWAY",
+    "PL": "PLACE", "PLZ": "PLAZA", "RD": "ROAD", "SQ": "SQUARE", "ST": "STREET", "TER": "TERRACE", "TRL": "TRAIL",
+    "WY": "WAY", "XING": "CROSSING"
+}
+DIRECTIONS = {
+    "N": "NORTH", "S": "SOUTH", "E": "EAST", "W": "WEST", "NE": "NORTHEAST", "NW": "NORTHWEST", "SE": "SOUTHEAST",
+    "SW": "SOUTHWEST"
+}
+MIN_SCORE = 0.5
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def normalizeAddress(address, partial=False):
+    """
+    Return an address in the form it is indexed and matched in.
+
+    :param address: STRING the address.
+    :param partial: BOOLEAN true if the last word may be cut short, as it can be in a substring query. The last word is
+        then left as it is, so MAIN S still finds MAIN SPRINGS.
+    :return: STRING the normalized address.
+    """
+    tokens = re.sub(r"[^A-Z0-9 ]", " ", (address or "").upper()).split()
+    for i, token in enumerate(tokens):
+        if partial and i == len(tokens) - 1:
+            break
+        tokens[i] = STREET_TYPES.get(token) or DIRECTIONS.get(token) or token
+    return " ".join(tokens)
+
+
+def trigrams(text, pad=True):
+    """
+    Return the trigrams of a normalized address.
+
+    :param text: STRING the normalized address.
+    :param pad: BOOLEAN true to pad the ends with spaces, so the start and end of the address have trigrams of their
+        own. Substring queries are not padded, because the text can fall anywhere in an address.
+    :return: SET the trigrams.
+    """
+    if pad:
+        text = "  " + text + " "
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def buildAddressIndex(addresses, xy, fields, attributes, fingerprint=None):
+    """
+    Build the trigram index of a set of address points.
+
+    :param addresses: LIST the address of every point.
+    :param xy: ARRAY an (n, 2) array of the point coordinates.
+    :param fields: LIST of field dicts, {"name": ..., "type": ..., "length": ...}, describing the attributes.
+    :param attributes: LIST of the attribute values of every point in the order of fields.
+    :param fingerprint: STRING what the addresses were read from, used to tell when the index is out of date.
+    :return: DICT the index:
+
+            index = {
+                "normalized": the normalized address of every point,
+                "exact": DICT the numbers of the points of each normalized address,
+                "postings": DICT the sorted numbers of the points that hold each trigram,
+                "trigram_count": ARRAY the number of trigrams of every address,
+                "xy", "fields", "attributes", "fingerprint": as given
+            }
+    """
+    normalized = [normalizeAddress(address) for address in addresses]
+
+    exact = {}
+    postings = {}
+    trigram_count = np.zeros(len(normalized), dtype=np.int64)
+    for i, text in enumerate(normalized):
+        exact.setdefault(text, []).append(i)
+        grams = trigrams(text)
+        trigram_count[i] = len(grams)
+        for gram in grams:
+            postings.setdefault(gram, []).append(i)
+
+    return {
+        "normalized": normalized,
+        "exact": exact,
+        "postings": dict((gram, np.array(ids, dtype=np.int64)) for gram, ids in postings.items()),
+        "trigram_count": trigram_count,
+        "xy": np.asarray(xy, dtype=np.float64).reshape(-1, 2),
+        "fields": list(fields),
+        "attributes": [list(values) for values in attributes],
+        "fingerprint": fingerprint
+    }
+
+
+def exactMatches(index, address):
+    """
+    Return the points whose normalized address is the same as the query.
+
+    :param index: DICT the index from buildAddressIndex.
+    :param address: STRING the address.
+    :return: LIST the numbers of the points.
+    """
+    return list(index["exact"].get(normalizeAddress(address), []))
+
+
+def substringMatches(index, text):
+    """
+    Return the points whose normalized address holds the normalized query, like LIKE '%text%'.
+
+    :param index: DICT the index from buildAddressIndex.
+    :param text: STRING any part of an address.
+    :return: LIST the numbers of the points, in order.
+    """
+    matches = set()
+    for query in set([normalizeAddress(text), normalizeAddress(text, partial=True)]):
+        if not query:
+            continue
+
+        if len(query) < 3:
+            # Too short to have a trigram. The query matches a good part of the city anyway.
+            candidates = range(len(index["normalized"]))
+        else:
+            lists = [index["postings"].get(gram) for gram in trigrams(query, pad=False)]
+            if any(ids is None for ids in lists):
+                continue
+            lists.sort(key=len)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+
+        # Sharing every trigram does not mean the trigrams are in the right order, so the candidates are checked.
+        matches.update(int(i) for i in candidates if query in index["normalized"][i])
+
+    return sorted(matches)
+
+
+def fuzzyMatches(index, text, limit=10, min_score=MIN_SCORE):
+    """
+    Return the points whose address is most like the query, for misspelled addresses.
+
+    :param index: DICT the index from buildAddressIndex.
+    :param text: STRING the address.
+    :param limit: INT the largest number of points to return.
+    :param min_score: DOUBLE the lowest Dice coefficient of the trigrams a match can have.
+    :return: LIST the numbers of the points, best first.
+    """
+    grams = trigrams(normalizeAddress(text))
+    lists = [index["postings"][gram] for gram in grams if gram in index["postings"]]
+    if not lists:
+        return []
+
+    shared = np.bincount(np.concatenate(lists), minlength=len(index["normalized"]))
+    candidates = np.nonzero(shared)[0]
+    score = 2.0 * shared[candidates] / (len(grams) + index["trigram_count"][candidates])
+
+    best = np.argsort(-score, kind="mergesort")[:limit]
+    return [int(candidates[i]) for i in best if score[i] >= min_score]
+
+
+def searchAddresses(index, text, fuzzy=True):
+    """
+    Return the points that match a query the way LIKE '%text%' does, falling back to the fuzzy matches when nothing
+    holds the text.
+
+    :param index: DICT the index from buildAddressIndex.
+    :param text: STRING the address or any part of it.
+    :param fuzzy: BOOLEAN true to fall back to fuzzy matches when nothing else matches.
+    :return: LIST the numbers of the points.
+    :return: BOOLEAN true if they are fuzzy matches, which only look like the query.
+    """
+    matches = substringMatches(index, text)
+    if matches or not fuzzy:
+        return matches, False
+    matches = fuzzyMatches(index, text)
+    return matches, bool(matches)
+
+
+def saveAddressIndex(index, path):
+    """
+    Save an index to a NumPy .npz file. The postings are stored end to end in one array with the offset of each
+    trigram's list, so loading them back does not rebuild anything.
+
+    :param index: DICT the index from buildAddressIndex.
+    :param path: STRING the path of the file.
+    :return: VOID
+    """
+    grams = sorted(index["postings"])
+    lengths = [len(index["postings"][gram]) for gram in grams]
+    meta = {
+        "normalized": index["normalized"],
+        "grams": grams,
+        "fields": index["fields"],
+        "attributes": index["attributes"],
+        "fingerprint": index["fingerprint"]
+    }
+
+    posting_ids = np.concatenate([index["postings"][gram] for gram in grams]) if grams else np.zeros(0)
+    CollectionZoneIndex.saveArrays(path,
+                                   xy=index["xy"],
+                                   trigram_count=index["trigram_count"],
+                                   posting_ids=posting_ids,
+                                   posting_offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+                                   meta=np.array(json.dumps(meta, default=str)))
+
+
+def loadAddressIndex(path):
+    """
+    Load an index saved by saveAddressIndex.
+
+    The file holds only numeric and text arrays, so it never needs pickle. np.load is called without allow_pickle,
+    which ArcMap's NumPy 1.9 does not accept.
+
+    :param path: STRING the path of the file.
+    :return: DICT the index, or None if the file is missing or unreadable.
+    """
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            ids = data["posting_ids"].astype(np.int64)
+            offsets = data["posting_offsets"]
+
+            exact = {}
+            for i, text in enumerate(meta["normalized"]):
+                exact.setdefault(text, []).append(i)
+
+            return {
+                "normalized": meta["normalized"],
+                "exact": exact,
+                "postings": dict((gram, ids[offsets[k]:offsets[k + 1]]) for k, gram in enumerate(meta["grams"])),
+                "trigram_count": data["trigram_count"],
+                "xy": data["xy"],
+                "fields": meta["fields"],
+                "attributes": meta["attributes"],
+                "fingerprint": meta["fingerprint"]
+            }
+    except (IOError, OSError, KeyError, ValueError):
+        return None
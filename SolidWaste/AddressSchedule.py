@@ -0,0 +1,190 @@
+"""
+AddressSchedule.py: A materialized table of the collection zone of every collected address, refreshed incrementally.
+
+The Identify Recycle Date By Address tool intersects the address points with the collection zones on every query. This
+module joins every collected address with the zones once and keeps the result as a table keyed by the object id of the
+address. The table remembers a hash of the geometry and attributes of every address and zone it was built from, so a
+refresh only evaluates again:
+
+    - the addresses that were added or changed,
+    - the addresses that were in a zone that changed or was deleted,
+    - the addresses that fall in the new shape of a zone that was added or changed.
+
+The rows of deleted addresses are dropped. Everything else is kept as it was. Like Intersect_analysis, an address gets
+a row for every zone it falls in and none if it falls in no zone.
+
+This module does not import arcpy. CollectionLookup reads the layers and saves the table.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import hashlib
+import json
+import numpy as np
+
+import CollectionZoneIndex
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def rowHash(*values):
+    """
+    Return a short hash of the geometry and attributes of a row.
+
+    :param values: the values to hash. Arrays are hashed by their coordinates.
+    :return: STRING 16 hex digits.
+    """
+    text = json.dumps([v.tolist() if isinstance(v, np.ndarray) else v for v in values], default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def emptySchedule(fields, schema):
+    """
+    Return a schedule with no rows.
+
+    :param fields: LIST the names of the values of every row, the address fields then the zone fields.
+    :param schema: STRING a hash of what the rows are made from. A schedule with another schema is rebuilt.
+    :return: DICT the schedule:
+
+            schedule = {
+                "fields", "schema": as given,
+                "rows": DICT the rows of every address object id, [zone object id] + values for each zone it is in,
+                "address_hash": DICT the hash of every address object id,
+                "zone_hash": DICT the hash of every zone object id
+            }
+    """
+    return {"fields": list(fields), "schema": schema, "rows": {}, "address_hash": {}, "zone_hash": {}}
+
+
+def refreshSchedule(schedule, addresses, zones, fields, schema):
+    """
+    Bring a schedule up to date with the address points and collection zones.
+
+    :param schedule: DICT the schedule from the last refresh, or None to build it from nothing.
+    :param addresses: DICT (x, y, values) of every collected address point, keyed by object id. values are the
+        address fields of the rows.
+    :param zones: DICT (rings, values) of every collection zone, keyed by object id. rings is a list of (n, 2) vertex
+        arrays and values are the zone fields of the rows.
+    :param fields: LIST the names of the values of every row, the address fields then the zone fields.
+    :param schema: STRING a hash of what the rows are made from: the fields, the address query and the spatial
+        reference. When it differs from the schedule's, every address is evaluated again.
+    :return: DICT the schedule, updated in place unless it was rebuilt.
+    :return: DICT the number of addresses added, changed and deleted, zones changed and addresses evaluated.
+    """
+    if schedule is None or schedule["schema"] != schema or schedule["fields"] != list(fields):
+        schedule = emptySchedule(fields, schema)
+    rows = schedule["rows"]
+
+    # Zones that were added, changed or deleted since the last refresh.
+    zone_hash = dict((oid, rowHash(rings, values)) for oid, (rings, values) in zones.items())
+    changed_zones = sorted(oid for oid in zone_hash if schedule["zone_hash"].get(oid) != zone_hash[oid])
+    stale_zones = set(changed_zones) | (set(schedule["zone_hash"]) - set(zone_hash))
+
+    # Addresses that were added, changed or deleted.
+    address_hash = dict((oid, rowHash(x, y, values)) for oid, (x, y, values) in addresses.items())
+    dirty = set(oid for oid in address_hash if schedule["address_hash"].get(oid) != address_hash[oid])
+    deleted = set(schedule["address_hash"]) - set(address_hash)
+    counts = {
+        "added": len(set(address_hash) - set(schedule["address_hash"])),
+        "changed": len(dirty & set(schedule["address_hash"])),
+        "deleted": len(deleted),
+        "zones_changed": len(stale_zones)
+    }
+
+    # Addresses that were in a zone that changed, and addresses in the new shape of a zone.
+    if stale_zones:
+        dirty.update(oid for oid, address_rows in rows.items() if any(row[0] in stale_zones for row in address_rows))
+    address_oids = np.array(sorted(addresses), dtype=np.int64)
+    if changed_zones and len(address_oids):
+        xy = np.array([addresses[oid][:2] for oid in address_oids], dtype=np.float64)
+        changed_index = CollectionZoneIndex.buildZoneIndex([(zones[oid][0], []) for oid in changed_zones], [])
+        points, zone = CollectionZoneIndex.queryPoints(changed_index, xy[:, 0], xy[:, 1])
+        dirty.update(int(oid) for oid in address_oids[points])
+
+    for oid in deleted:
+        rows.pop(oid, None)
+
+    # Evaluate the dirty addresses against every zone.
+    dirty = sorted(oid for oid in dirty if oid in addresses)
+    zone_oids = sorted(zones)
+    for oid in dirty:
+        rows.pop(oid, None)
+    if dirty and zone_oids:
+        index = CollectionZoneIndex.buildZoneIndex([(zones[oid][0], []) for oid in zone_oids], [])
+        xy = np.array([addresses[oid][:2] for oid in dirty], dtype=np.float64)
+        points, zone = CollectionZoneIndex.queryPoints(index, xy[:, 0], xy[:, 1])
+        for point, z in zip(points, zone):
+            oid, zone_oid = dirty[point], zone_oids[z]
+            rows.setdefault(oid, []).append([zone_oid] + list(addresses[oid][2]) + list(zones[zone_oid][1]))
+
+    schedule["address_hash"] = address_hash
+    schedule["zone_hash"] = zone_hash
+    counts["evaluated"] = len(dirty)
+    return schedule, counts
+
+
+def scheduleRows(schedule):
+    """
+    Return every row of a schedule in the order of the address object ids.
+
+    :param schedule: DICT the schedule.
+    :return: LIST of [address object id, zone object id] + values.
+    """
+    return [[oid] + row for oid in sorted(schedule["rows"]) for row in schedule["rows"][oid]]
+
+
+def saveSchedule(schedule, path):
+    """
+    Save a schedule to a NumPy .npz file. The object ids and hashes are stored as arrays and the values of the rows as
+    JSON.
+
+    :param schedule: DICT the schedule.
+    :param path: STRING the path of the file.
+    :return: VOID
+    """
+    rows = scheduleRows(schedule)
+    address_oids = sorted(schedule["address_hash"])
+    zone_oids = sorted(schedule["zone_hash"])
+    meta = {"fields": schedule["fields"], "schema": schedule["schema"], "values": [row[2:] for row in rows]}
+
+    CollectionZoneIndex.saveArrays(path,
+                                   row_address=np.array([row[0] for row in rows], dtype=np.int64),
+                                   row_zone=np.array([row[1] for row in rows], dtype=np.int64),
+                                   address_oid=np.array(address_oids, dtype=np.int64),
+                                   address_hash=np.array([schedule["address_hash"][oid] for oid in address_oids],
+                                                         dtype="U16"),
+                                   zone_oid=np.array(zone_oids, dtype=np.int64),
+                                   zone_hash=np.array([schedule["zone_hash"][oid] for oid in zone_oids], dtype="U16"),
+                                   meta=np.array(json.dumps(meta, default=str)))
+
+
+def loadSchedule(path):
+    """
+    Load a schedule saved by saveSchedule.
+
+    The file holds only numeric and text arrays, so it never needs pickle. np.load is called without allow_pickle,
+    which ArcMap's NumPy 1.9 does not accept.
+
+    :param path: STRING the path of the file.
+    :return: DICT the schedule, or None if the file is missing or unreadable.
+    """
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            schedule = emptySchedule(meta["fields"], meta["schema"])
+            for oid, zone_oid, values in zip(data["row_address"].tolist(), data["row_zone"].tolist(), meta["values"]):
+                schedule["rows"].setdefault(oid, []).append([zone_oid] + values)
+            schedule["address_hash"] = dict(zip(data["address_oid"].tolist(), data["address_hash"].tolist()))
+            schedule["zone_hash"] = dict(zip(data["zone_oid"].tolist(), data["zone_hash"].tolist()))
+            return schedule
+    except (IOError, OSError, KeyError, ValueError):
+        return None
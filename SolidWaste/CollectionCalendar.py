@@ -0,0 +1,193 @@
+"""
+CollectionCalendar.py: Computes the next garbage and recycling pickup of every address at once with NumPy dates.
+
+The Identify Recycle Date By Address tool returns the collection DAY of an address, and the next pickup, with holiday
+shifts and the every other week recycling cycle, used to be worked out in a spreadsheet. This module works it out for
+every address of the city in one set of array operations.
+
+Every address is described by an anchor, any date it was or will be collected on, and a period: 7 days for garbage,
+14 for recycling. Garbage anchors come from the DAY field. Recycling anchors come from a table of the first pickup of
+every recycling area's cycle, which also fixes its week.
+
+Holidays come from a table of dates and the number of days they push collection back. A holiday pushes back every
+collection in its week, Monday to Sunday, on or after the holiday.
+
+    holidays.csv                recycle_cycles.csv
+    DATE,SHIFT                  RCDAREA,START
+    2026-11-26,1                A,2026-01-05
+    2026-12-25,1                B,2026-01-12
+
+This module does not import arcpy.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import csv
+import datetime
+import numpy as np
+
+# WEEKDAYS: DICT the number of each day of the week, Monday first, by the first three letters of its name.
+# MONDAY: datetime64 a Monday, the anchor of every weekly collection.
+# GARBAGE_PERIOD: INT the days between garbage pickups.
+# RECYCLE_PERIOD: INT the days between recycling pickups.
+WEEKDAYS = {"MON": 0, "TUE": 1, "WED": 2, "THU": 3, "FRI": 4, "SAT": 5, "SUN": 6}
+MONDAY = np.datetime64("1970-01-05", "D")
+GARBAGE_PERIOD = 7
+RECYCLE_PERIOD = 14
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def weekday(dates):
+    """
+    Return the day of the week of a set of dates, Monday as 0.
+
+    :param dates: ARRAY of datetime64[D].
+    :return: ARRAY of INT.
+    """
+    return (dates - MONDAY).astype(np.int64) % 7
+
+
+def weekdayAnchors(days):
+    """
+    Return an anchor date for every collection day name.
+
+    Only the distinct names are parsed, so a city of addresses costs as much as the handful of names in it.
+
+    :param days: LIST the collection day of every address, like MONDAY, Mon or MON.
+    :return: ARRAY of datetime64[D], NaT where the name is not a day of the week.
+    """
+    names, inverse = np.unique(np.array([str(day or "").strip().upper()[:3] for day in days], dtype="U3"),
+                               return_inverse=True)
+    offsets = np.array([WEEKDAYS.get(name, -1) for name in names], dtype=np.int64)[inverse]
+    anchors = MONDAY + np.maximum(offsets, 0).astype("timedelta64[D]")
+    anchors[offsets < 0] = np.datetime64("NaT")
+    return anchors
+
+
+def holidayShift(dates, holidays, shifts):
+    """
+    Return the number of days a set of regular collection dates are pushed back by holidays.
+
+    A date is pushed back by every holiday that falls in its week on or before it. The holidays are sorted once and
+    every date is answered with two binary searches into the running total of the shifts.
+
+    :param dates: ARRAY of datetime64[D] the regular collection dates.
+    :param holidays: ARRAY of datetime64[D] the holidays.
+    :param shifts: ARRAY of INT the days each holiday pushes collection back.
+    :return: ARRAY of INT.
+    """
+    if holidays is None or not len(holidays):
+        return np.zeros(dates.shape, dtype=np.int64)
+
+    order = np.argsort(holidays)
+    holidays = holidays[order]
+    total = np.concatenate([[0], np.cumsum(np.asarray(shifts, dtype=np.int64)[order])])
+
+    week_start = dates - weekday(dates).astype("timedelta64[D]")
+    return total[np.searchsorted(holidays, dates, side="right")] - \
+        total[np.searchsorted(holidays, week_start, side="left")]
+
+
+def nextCollectionDates(anchors, today, period, holidays=None, shifts=None):
+    """
+    Return the next pickup on or after today of every address.
+
+    The regular dates before and after today are found from the anchor and period, shifted for holidays, and the first
+    that does not fall before today is kept. The date before today is checked too, because a holiday can push it past
+    today.
+
+    :param anchors: ARRAY of datetime64[D] any regular collection date of every address. NaT for addresses with none.
+    :param today: datetime64[D] the first day a pickup can fall on.
+    :param period: INT the days between pickups.
+    :param holidays: ARRAY of datetime64[D] the holidays, or None.
+    :param shifts: ARRAY of INT the days each holiday pushes collection back.
+    :return: ARRAY of datetime64[D], NaT where the anchor is NaT.
+    """
+    anchors = np.asarray(anchors, dtype="datetime64[D]")
+    today = np.datetime64(today, "D")
+    # NaT is stored as the smallest int64. np.isnat needs NumPy 1.13, and NaT == NaT is true before NumPy 1.16, so the
+    # integers are compared instead. ArcMap ships NumPy 1.9.
+    missing = anchors.astype(np.int64) == np.iinfo(np.int64).min
+    anchors = np.where(missing, today, anchors)
+
+    # The last regular date before today, and the two after it.
+    before = (today - anchors).astype(np.int64) // period * period
+    before = np.where(before == (today - anchors).astype(np.int64), before - period, before)
+    candidates = anchors[:, None] + (before[:, None] + np.array([0, period, 2 * period])).astype("timedelta64[D]")
+    candidates = candidates + holidayShift(candidates, holidays, shifts).astype("timedelta64[D]")
+
+    first = np.argmax(candidates >= today, axis=1)
+    dates = candidates[np.arange(len(anchors)), first]
+    dates[missing] = np.datetime64("NaT")
+    return dates
+
+
+def readHolidays(path):
+    """
+    Read a holiday table, a CSV file with a DATE column of YYYY-MM-DD dates and an optional SHIFT column of the days
+    collection is pushed back, 1 when it is missing.
+
+    :param path: STRING the path of the file.
+    :return: ARRAY of datetime64[D] the holidays.
+    :return: ARRAY of INT the shift of every holiday.
+    """
+    dates, shifts = [], []
+    with open(path, "r") as csv_file:
+        for row in csv.DictReader(csv_file):
+            row = dict((name.strip().upper(), (value or "").strip()) for name, value in row.items() if name)
+            if row.get("DATE"):
+                dates.append(row["DATE"])
+                shifts.append(int(row.get("SHIFT") or 1))
+    return np.array(dates, dtype="datetime64[D]"), np.array(shifts, dtype=np.int64)
+
+
+def readRecycleCycles(path, area_field="RCDAREA"):
+    """
+    Read a recycling cycle table, a CSV file with the recycling area and a START column with the date of any pickup in
+    the area's cycle.
+
+    :param path: STRING the path of the file.
+    :param area_field: STRING the column of the area.
+    :return: DICT the START date of every area, as datetime64[D].
+    """
+    cycles = {}
+    with open(path, "r") as csv_file:
+        for row in csv.DictReader(csv_file):
+            row = dict((name.strip().upper(), (value or "").strip()) for name, value in row.items() if name)
+            if row.get(area_field.upper()) and row.get("START"):
+                cycles[row[area_field.upper()]] = np.datetime64(row["START"], "D")
+    return cycles
+
+
+def nextPickups(days, areas, cycles, today=None, holidays=None, shifts=None):
+    """
+    Return the next garbage and recycling pickup of every address.
+
+    :param days: LIST the garbage collection day of every address.
+    :param areas: LIST the recycling area of every address.
+    :param cycles: DICT the START date of every recycling area, from readRecycleCycles.
+    :param today: date or datetime64 the first day a pickup can fall on. Today when None.
+    :param holidays: ARRAY of datetime64[D] the holidays, or None.
+    :param shifts: ARRAY of INT the days each holiday pushes collection back.
+    :return: ARRAY of datetime64[D] the next garbage pickup, NaT where the day is not known.
+    :return: ARRAY of datetime64[D] the next recycling pickup, NaT where the area is not in cycles.
+    """
+    today = np.datetime64(today or datetime.date.today(), "D")
+
+    names, inverse = np.unique(np.array([str(area or "").strip() for area in areas], dtype=object).astype("U"),
+                               return_inverse=True)
+    recycle_anchors = np.array([cycles.get(name, np.datetime64("NaT")) for name in names],
+                               dtype="datetime64[D]")[inverse]
+
+    return (nextCollectionDates(weekdayAnchors(days), today, GARBAGE_PERIOD, holidays, shifts),
+            nextCollectionDates(recycle_anchors, today, RECYCLE_PERIOD, holidays, shifts))
@@ -0,0 +1,663 @@
+"""
+CollectionLookup.py: Looks up the Solid Waste collection zones of address points through CollectionZoneIndex.
+
+Reads the collection zones out of the recycle layer and the collected addresses out of the address layer, keeps the
+STR-tree of CollectionZoneIndex and the trigram index of AddressIndex up to date with them, and answers the same
+question the address query and Intersect_analysis answer for the Identify Recycle Date By Address tool, without scanning
+either layer.
+
+The indexes are saved to files and kept in memory once loaded, so a process that runs the tool many times, like a
+geoprocessing service, only reads them once. Each is rebuilt only when the fingerprint of its layer changes.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import arcpy
+import collections
+import csv
+import hashlib
+import json
+import numpy as np
+import os
+import re
+
+import AddressIndex
+import AddressSchedule
+import CollectionCalendar
+import CollectionZoneIndex
+import SpatialIndex
+
+# EXCLUSION_SQL: STRING the query that leaves out the addresses the city does not collect from.
+# OUTPUT_FIELDS: LIST the fields returned for an address.
+# JSON_FIELDS: LIST the fields of every JSON record, the output fields and FUZZY. The FID_ field of the address layer
+#   and the X and Y of the address point are not included.
+EXCLUSION_SQL = '"MUNIS_CLAS" NOT IN(\'UTILITY_ADDRESS\', \'OUTSIDE_CITY\') ' \
+                'AND "MESQ_CLASS" NOT IN (\'OUTSIDE_CITY\', \'OUTSIDE_CITY_MISD\', \'OUTSIDE_CITY_MISD_TAX\') '
+OUTPUT_FIELDS = ['ADDRESS', 'FID_MESQ_GARB_ROTO_RECYCLE', 'FID_MESQ_ROTO_BOOM', 'DAY',
+                 'ROUTE', 'FID_MESQ_GARBAGE_COLLECTION', 'GCDAREA', 'FID_MESQ_RECYCLING',
+                 'RCDAREA']
+JSON_FIELDS = OUTPUT_FIELDS + ["FUZZY"]
+
+# FIELD_TYPES: DICT the AddField_management type of each field type returned by ListFields.
+FIELD_TYPES = {
+    "String": "TEXT",
+    "Integer": "LONG",
+    "SmallInteger": "SHORT",
+    "Double": "DOUBLE",
+    "Single": "FLOAT",
+    "Date": "DATE",
+    "GUID": "GUID"
+}
+
+# CACHE_SIZE: INT the number of address lookups kept in the lookup cache.
+# INDEX_VERSION: INT part of the fingerprint of both indexes. Changed whenever the fields the indexes keep change, so
+#   indexes saved by an older version are rebuilt.
+CACHE_SIZE = 1024
+INDEX_VERSION = 2
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+class LookupCache(object):
+    """
+    A least recently used cache of address lookups.
+
+    The cache is emptied whenever the fingerprint of either index changes, which happens when the address layer or the
+    recycle layer changes on disk, its row count changes or its fields change. The hits and misses are counted so the
+    cache can be sized.
+
+    :param size: INT the largest number of lookups to keep.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.fingerprints = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, fingerprints):
+        """
+        Return a cached lookup, or None.
+
+        :param key: the key of the lookup.
+        :param fingerprints: TUPLE the fingerprints of the indexes the lookup is made against.
+        :return: the cached lookup, or None if it is not cached.
+        """
+        if fingerprints != self.fingerprints:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.fingerprints = fingerprints
+
+        value = self.entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+
+        # Put it back as the most recently used.
+        self.entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Cache a lookup, dropping the least recently used one when the cache is full.
+
+        :param key: the key of the lookup.
+        :param value: the lookup.
+        :return: VOID
+        """
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every cached lookup, as when the indexes are replaced.
+
+        :return: VOID
+        """
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.fingerprints = None
+
+    def stats(self):
+        """
+        Return the size and counters of the cache.
+
+        :return: DICT
+        """
+        total = self.hits + self.misses
+        return {"size": self.size, "entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / float(total) if total else 0.0, "invalidations": self.invalidations}
+
+
+# zone_indexes: DICT the zone indexes loaded by this process, keyed by the path of their file.
+# address_indexes: DICT the address indexes loaded by this process, keyed by the path of their file.
+# lookup_cache: LookupCache the address lookups made by this process.
+zone_indexes = {}
+address_indexes = {}
+lookup_cache = LookupCache()
+
+
+def attributeFields(layer):
+    """
+    Return the attribute fields of a layer that can be copied to another feature class.
+
+    :param layer: LAYER the layer or feature class.
+    :return: LIST of field dicts, {"name": ..., "type": ..., "length": ...}. Object id and geometry fields are left out.
+    """
+    return [{"name": f.name, "type": f.type, "length": f.length} for f in arcpy.ListFields(layer)
+            if f.type in FIELD_TYPES]
+
+
+def fidField(layer):
+    """
+    Return the field Intersect_analysis adds to hold the object id of the features of a layer, FID_<feature class>.
+
+    :param layer: LAYER the layer or feature class.
+    :return: DICT the field dict, as returned by attributeFields.
+    """
+    name = os.path.splitext(os.path.basename(arcpy.Describe(layer).catalogPath))[0]
+    return {"name": "FID_" + name, "type": "Integer", "length": 4}
+
+
+def datasetFiles(catalog_path):
+    """
+    Return the name, modification time and size of the files on disk that hold a feature class.
+
+    A feature class in a file geodatabase is checked through every file of the geodatabase folder and a shapefile
+    through every file that shares its name. Only os calls are made, so this is cheap enough to poll.
+
+    :param catalog_path: STRING the catalog path of the feature class.
+    :return: LIST of [name, modification time, size]. Empty for data that has no files, like an enterprise
+        geodatabase.
+    """
+    # Walk up from the feature class to the file geodatabase folder or shapefile that holds it.
+    files = []
+    path = catalog_path
+    while path and not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    if path != catalog_path and os.path.splitext(path)[1].lower() not in (".gdb", ".mdb"):
+        path = None
+    if path and os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    elif path and os.path.isfile(path):
+        stem = os.path.splitext(path)[0]
+        folder = os.path.dirname(path)
+        files = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                 if os.path.splitext(os.path.join(folder, name))[0] == stem]
+
+    stats = []
+    for name in files:
+        if name.lower().endswith(".lock"):
+            # Lock files come and go with every process that opens the data, including this one.
+            continue
+        try:
+            stat = os.stat(name)
+            stats.append([os.path.basename(name), stat.st_mtime, stat.st_size])
+        except OSError:
+            pass
+    return stats
+
+
+def datasetFingerprint(layer):
+    """
+    Return a fingerprint that changes whenever the data behind a layer changes.
+
+    The fingerprint is made from the path of the data, the modification time and size of its files on disk, the number
+    of rows and the field names and types. Data in an enterprise geodatabase has no files to check, so only the row
+    count and the fields are used for it.
+
+    :param layer: LAYER the layer or feature class.
+    :return: STRING a SHA-1 hex digest.
+    """
+    catalog_path = arcpy.Describe(layer).catalogPath
+    parts = {
+        "path": catalog_path,
+        "files": datasetFiles(catalog_path),
+        "rows": int(arcpy.GetCount_management(catalog_path).getOutput(0)),
+        "fields": [[f.name, f.type] for f in arcpy.ListFields(catalog_path)]
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def readZones(zone_layer):
+    """
+    Return the rings and attributes of every collection zone.
+
+    :param zone_layer: POLYGON the collection zone layer.
+    :return: LIST of (rings, attributes) for every zone, as buildZoneIndex expects.
+    :return: LIST the attribute fields, in the order of the attributes. The first is the FID_ field of the zone layer,
+        which holds the object id of the zone as it does in the output of Intersect_analysis.
+    """
+    fields = attributeFields(zone_layer)
+    zones = []
+    for row in arcpy.da.SearchCursor(zone_layer, ["SHAPE@", "OID@"] + [f["name"] for f in fields]):
+        zones.append((SpatialIndex.polygonRings(row[0]), list(row[1:])))
+    return zones, [fidField(zone_layer)] + fields
+
+
+def zoneIndex(zone_layer, index_path):
+    """
+    Return the STR-tree of the collection zones, building it only when the zones have changed.
+
+    The index already loaded by this process is used first, then the index saved at index_path. Either is only used
+    if its fingerprint matches the zone layer. Otherwise the index is rebuilt and saved.
+
+    :param zone_layer: POLYGON the collection zone layer.
+    :param index_path: STRING the path of the saved index. None keeps the index in memory only.
+    :return: DICT the index from CollectionZoneIndex.buildZoneIndex.
+    """
+    fingerprint = hashlib.sha1(json.dumps([datasetFingerprint(zone_layer), INDEX_VERSION]).encode("utf-8")).hexdigest()
+    key = index_path or arcpy.Describe(zone_layer).catalogPath
+
+    index = zone_indexes.get(key)
+    if index_path and (index is None or index["fingerprint"] != fingerprint):
+        index = CollectionZoneIndex.loadZoneIndex(index_path)
+
+    if index is None or index["fingerprint"] != fingerprint:
+        arcpy.AddMessage("Building the collection zone index...")
+        zones, fields = readZones(zone_layer)
+        index = CollectionZoneIndex.buildZoneIndex(zones, fields, fingerprint)
+        try:
+            if index_path:
+                CollectionZoneIndex.saveZoneIndex(index, index_path)
+        except (IOError, OSError):
+            # An index that cannot be saved is rebuilt by the next process, it only makes that run slower.
+            arcpy.AddWarning("Could not save the collection zone index to {0}".format(index_path))
+
+    zone_indexes[key] = index
+    return index
+
+
+def zoneFieldNames(address_index, zone_index):
+    """
+    Return the names the zone fields get next to the address fields, the way Intersect names them. Zone fields that
+    share a name with an address field get a _1 suffix.
+
+    :param address_index: DICT the address index.
+    :param zone_index: DICT the zone index.
+    :return: LIST the name of every zone field.
+    """
+    names = set(f["name"].upper() for f in address_index["fields"])
+    zone_names = []
+    for f in zone_index["fields"]:
+        name = f["name"]
+        while name.upper() in names:
+            name += "_1"
+        names.add(name.upper())
+        zone_names.append(name)
+    return zone_names
+
+
+def matchAddress(address_index, zone_index, address_string, fuzzy=True):
+    """
+    Return the address points that match a query and the collection zones that hold them, through the lookup cache.
+
+    The cache is keyed by the normalized query, so 123 N. Main St and 123 NORTH MAIN STREET share an entry.
+
+    :param address_index: DICT the address index from addressIndex.
+    :param zone_index: DICT the zone index from zoneIndex.
+    :param address_string: STRING the address or any part of it.
+    :param fuzzy: BOOLEAN true to fall back to the closest matches when no address holds the query.
+    :return: ARRAY the numbers of the matching address points.
+    :return: ARRAY the position in the first array of each point, once for every zone that holds it.
+    :return: ARRAY the number of the zone that holds it.
+    :return: BOOLEAN true if no address holds the query and the points are only the closest matches.
+    """
+    key = (AddressIndex.normalizeAddress(address_string), AddressIndex.normalizeAddress(address_string, True), fuzzy)
+    fingerprints = (address_index["fingerprint"], zone_index["fingerprint"])
+    match = lookup_cache.get(key, fingerprints)
+    if match is None:
+        matches, is_fuzzy = AddressIndex.searchAddresses(address_index, address_string, fuzzy)
+        matches = np.array(matches, dtype=np.int64)
+        xy = address_index["xy"][matches]
+        points, zones = CollectionZoneIndex.queryPoints(zone_index, xy[:, 0], xy[:, 1])
+        match = (matches, points, zones, is_fuzzy)
+        lookup_cache.put(key, match)
+    return match
+
+
+def warnFuzzy(address_string):
+    """
+    Warn that no address holds a query and the results are only the addresses most like it.
+
+    :param address_string: STRING the address or any part of it.
+    :return: VOID
+    """
+    arcpy.AddWarning("No address holds {0}. The results are the closest matches and may not be the address you "
+                     "meant.".format(address_string))
+
+
+def findCollectionZones(address_index, zone_index, address_string, fields=None, fuzzy=True):
+    """
+    Return the collection zones of the addresses that match a query as records, without writing anything.
+
+    :param address_index: DICT the address index from addressIndex.
+    :param zone_index: DICT the zone index from zoneIndex.
+    :param address_string: STRING the address or any part of it.
+    :param fields: LIST the fields to return, from either index. None returns every field and the X and Y of the
+        address point.
+    :param fuzzy: BOOLEAN true to fall back to the closest matches when no address holds the query.
+    :return: LIST a dict of field values for every matching address and the zone that holds it. Every dict also has
+        FUZZY, true when no address holds the query and the record is one of the closest matches.
+    """
+    matches, points, zones, is_fuzzy = matchAddress(address_index, zone_index, address_string, fuzzy)
+    xy = address_index["xy"][matches]
+
+    names = [f["name"] for f in address_index["fields"]] + zoneFieldNames(address_index, zone_index)
+    keep = [i for i, name in enumerate(names) if fields is None or name in fields]
+
+    records = []
+    for point, zone in zip(points, zones):
+        values = address_index["attributes"][matches[point]] + zone_index["attributes"][zone]
+        record = dict((names[i], values[i]) for i in keep)
+        if fields is None:
+            record["X"], record["Y"] = float(xy[point][0]), float(xy[point][1])
+        record["FUZZY"] = is_fuzzy
+        records.append(record)
+    return records
+
+
+def lookupRecords(address_layer, zone_layer, address_string, where_clause, index_path):
+    """
+    Return the collection zones of the addresses that match a query as records, writing nothing to disk.
+
+    Every record has JSON_FIELDS and nothing else, whether or not the fields are in the layers, so the JSON has the same
+    fields as the result_lyr output for every query. Fields missing from both layers are None.
+
+    :param address_layer: POINT the address points.
+    :param zone_layer: POLYGON the collection zone layer.
+    :param address_string: STRING the address or any part of it. Misspelled addresses fall back to the closest matches.
+    :param where_clause: STRING the query that leaves out addresses that are not collected.
+    :param index_path: STRING the path of the saved zone index, or None to keep the indexes in memory only.
+    :return: LIST an ordered dict of JSON_FIELDS for every matching address and zone.
+    """
+    zone_index = zoneIndex(zone_layer, index_path)
+    address_index = addressIndex(address_layer, where_clause, zone_layer, index_path)
+    records = findCollectionZones(address_index, zone_index, address_string, OUTPUT_FIELDS)
+    arcpy.AddMessage("Found {0} collection zones for {1}".format(len(records), address_string))
+    if records and records[0]["FUZZY"]:
+        warnFuzzy(address_string)
+    return [collections.OrderedDict((name, record.get(name)) for name in JSON_FIELDS) for record in records]
+
+
+def addressIndexPath(index_path):
+    """
+    Return the path the address index is saved at, next to the zone index.
+
+    :param index_path: STRING the path of the saved zone index, or None.
+    :return: STRING the path of the saved address index, or None.
+    """
+    return os.path.splitext(index_path)[0] + "_addresses.npz" if index_path else None
+
+
+def addressIndex(address_layer, where_clause, zone_layer, index_path):
+    """
+    Return the trigram index of the collected address points, building it only when the addresses have changed.
+
+    The addresses that are not collected are left out with where_clause once, when the index is built. The points are
+    kept in the spatial reference of the zone layer, ready to look up in the zone index.
+
+    :param address_layer: POINT the address points.
+    :param where_clause: STRING the query that leaves out addresses that are not collected.
+    :param zone_layer: POLYGON the collection zone layer.
+    :param index_path: STRING the path of the saved zone index. The address index is saved next to it. None keeps the
+        index in memory only.
+    :return: DICT the index from AddressIndex.buildAddressIndex.
+    """
+    spatial_ref = arcpy.Describe(zone_layer).spatialReference
+    fingerprint = hashlib.sha1(json.dumps([datasetFingerprint(address_layer), where_clause,
+                                           spatial_ref.exportToString(), INDEX_VERSION]).encode("utf-8")).hexdigest()
+    path = addressIndexPath(index_path)
+    key = path or arcpy.Describe(address_layer).catalogPath
+
+    index = address_indexes.get(key)
+    if path and (index is None or index["fingerprint"] != fingerprint):
+        index = AddressIndex.loadAddressIndex(path)
+
+    if index is None or index["fingerprint"] != fingerprint:
+        arcpy.AddMessage("Building the address index...")
+        fields = attributeFields(address_layer)
+        addresses, xy, attributes = [], [], []
+        for row in arcpy.da.SearchCursor(address_layer, ["SHAPE@XY", "ADDRESS", "OID@"] + [f["name"] for f in fields],
+                                         where_clause, spatial_ref):
+            xy.append(row[0])
+            addresses.append(row[1])
+            attributes.append(row[2:])
+
+        # The object id is kept as the FID_ field of the address layer, as Intersect_analysis writes it.
+        index = AddressIndex.buildAddressIndex(addresses, xy, [fidField(address_layer)] + fields, attributes,
+                                               fingerprint)
+        try:
+            if path:
+                AddressIndex.saveAddressIndex(index, path)
+        except (IOError, OSError):
+            arcpy.AddWarning("Could not save the address index to {0}".format(path))
+
+    address_indexes[key] = index
+    return index
+
+
+def intersectWithIndex(address_layer, zone_layer, address_string, where_clause, index_path, out_fc):
+    """
+    Write the address points that match a query with the attributes of the collection zones that hold them.
+
+    The address points are found through the address index and their zones through the zone index, so neither layer is
+    scanned. Gives the same rows and fields as Intersect_analysis of the matching address points and the zone layer,
+    including the FID_ fields that hold the object ids of the address point and the zone. Every address is written once
+    for each zone it falls in and zone fields that share a name with an address field get a _1 suffix.
+
+    :param address_layer: POINT the address points.
+    :param zone_layer: POLYGON the collection zone layer.
+    :param address_string: STRING the address or any part of it. Misspelled addresses fall back to the closest matches.
+    :param where_clause: STRING the query that leaves out addresses that are not collected.
+    :param index_path: STRING the path of the saved zone index. The address index is saved next to it.
+    :param out_fc: STRING the path of the point feature class to write.
+    :return: STRING out_fc.
+    """
+    zone_index = zoneIndex(zone_layer, index_path)
+    address_index = addressIndex(address_layer, where_clause, zone_layer, index_path)
+    spatial_ref = arcpy.Describe(zone_layer).spatialReference
+
+    matches, points, zones, is_fuzzy = matchAddress(address_index, zone_index, address_string)
+    xy = address_index["xy"][matches]
+    if is_fuzzy:
+        warnFuzzy(address_string)
+
+    address_fields = address_index["fields"]
+    zone_names = zoneFieldNames(address_index, zone_index)
+
+    out_path, out_name = os.path.split(out_fc)
+    arcpy.CreateFeatureclass_management(out_path, out_name, "POINT", None, None, None, spatial_ref)
+    for f, name in zip(address_fields + zone_index["fields"], [f["name"] for f in address_fields] + zone_names):
+        arcpy.AddField_management(out_fc, name, FIELD_TYPES[f["type"]], field_length=f["length"])
+
+    cursor = arcpy.da.InsertCursor(out_fc, ["SHAPE@XY"] + [f["name"] for f in address_fields] + zone_names)
+    for point, zone in zip(points, zones):
+        match = matches[point]
+        cursor.insertRow([(float(xy[point][0]), float(xy[point][1]))] + address_index["attributes"][match] +
+                         zone_index["attributes"][zone])
+    del cursor
+
+    arcpy.AddMessage("Found {0} collection zones for {1} addresses".format(len(points), len(matches)))
+    arcpy.AddMessage("Lookup cache: {hits} hits, {misses} misses, {entries} of {size} entries".format(
+        **lookup_cache.stats()))
+    return out_fc
+
+
+def readAddressList(address_list):
+    """
+    Return the addresses of a batch request.
+
+    :param address_list: STRING the path of a CSV file, or the addresses themselves separated by semicolons or new
+        lines. A CSV file uses its ADDRESS column, or its first column if it has none.
+    :return: LIST the addresses, in order.
+    """
+    if os.path.isfile(address_list):
+        with open(address_list, "r") as csv_file:
+            rows = [row for row in csv.reader(csv_file) if row]
+        if not rows:
+            return []
+        header = [name.strip().upper() for name in rows[0]]
+        if "ADDRESS" in header:
+            column = header.index("ADDRESS")
+            rows = rows[1:]
+        else:
+            column = 0
+        return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+    return [address.strip().strip("'") for address in re.split(r"[;\r\n]+", address_list) if address.strip()]
+
+
+def resolveAddresses(address_layer, zone_layer, addresses, where_clause, index_path, fields):
+    """
+    Return the collection zones of many addresses at once.
+
+    Every address is matched through the address index and all the matched points are looked up in the zone index
+    together, so the cost is one probe per address instead of a scan of the address layer.
+
+    :param address_layer: POINT the address points.
+    :param zone_layer: POLYGON the collection zone layer.
+    :param addresses: LIST the requested addresses. They are matched exactly after both are normalized.
+    :param where_clause: STRING the query that leaves out addresses that are not collected.
+    :param index_path: STRING the path of the saved zone index, or None to keep the indexes in memory.
+    :param fields: LIST the fields to return, from either the address layer or the zone layer.
+    :return: LIST a row for every requested address and collection zone, the requested address followed by fields.
+        Addresses that are not found get one row of None.
+    """
+    zone_index = zoneIndex(zone_layer, index_path)
+    address_index = addressIndex(address_layer, where_clause, zone_layer, index_path)
+
+    found = [AddressIndex.exactMatches(address_index, address) for address in addresses]
+    matches = np.array(sorted(set(point for matched in found for point in matched)), dtype=np.int64)
+    xy = address_index["xy"][matches]
+    points, zones = CollectionZoneIndex.queryPoints(zone_index, xy[:, 0], xy[:, 1])
+
+    point_zones = {}
+    for point, zone in zip(points, zones):
+        point_zones.setdefault(int(matches[point]), []).append(zone_index["attributes"][zone])
+
+    address_columns = dict((f["name"], i) for i, f in enumerate(address_index["fields"]))
+    zone_columns = dict((f["name"], i) for i, f in enumerate(zone_index["fields"]))
+
+    results = []
+    for address, matched in zip(addresses, found):
+        rows = [(address_index["attributes"][point], attributes)
+                for point in matched for attributes in point_zones.get(point, [])]
+        if not rows:
+            results.append([address] + [None] * len(fields))
+        for values, attributes in rows:
+            results.append([address] + [values[address_columns[name]] if name in address_columns
+                                        else attributes[zone_columns[name]] if name in zone_columns else None
+                                        for name in fields])
+
+    arcpy.AddMessage("Found {0} of {1} addresses".format(sum(1 for matched in found if matched), len(addresses)))
+    return results
+
+
+def writeTable(rows, fields, field_types, out_table):
+    """
+    Write rows to a new table.
+
+    :param rows: LIST the rows, one value for every field.
+    :param fields: LIST the field names.
+    :param field_types: DICT the field dict of each field name, as returned by attributeFields. Missing fields are
+        written as text.
+    :param out_table: STRING the path of the table.
+    :return: STRING out_table.
+    """
+    out_path, out_name = os.path.split(out_table)
+    arcpy.CreateTable_management(out_path, out_name)
+    for name in fields:
+        field = field_types.get(name, {"type": "String", "length": 255})
+        arcpy.AddField_management(out_table, name, FIELD_TYPES[field["type"]], field_length=field["length"])
+
+    cursor = arcpy.da.InsertCursor(out_table, fields)
+    for row in rows:
+        cursor.insertRow(row)
+    del cursor
+    return out_table
+
+
+def refreshSchedule(address_layer, zone_layer, where_clause, schedule_path, fields):
+    """
+    Bring the materialized schedule of every collected address up to date and save it.
+
+    Both layers are read, but only the addresses that were added or changed, or whose zone was added, changed or
+    deleted, are looked up again. The first refresh, or one after the fields change, joins every address.
+
+    :param address_layer: POINT the address points.
+    :param zone_layer: POLYGON the collection zone layer.
+    :param where_clause: STRING the query that leaves out addresses that are not collected.
+    :param schedule_path: STRING the path of the saved schedule, a .npz file.
+    :param fields: LIST the fields to keep for every address, from either layer. Fields in neither are left out.
+    :return: DICT the schedule from AddressSchedule.refreshSchedule.
+    :return: LIST the field dicts of the schedule fields, as returned by attributeFields.
+    """
+    spatial_ref = arcpy.Describe(zone_layer).spatialReference
+    address_fields = [f for f in attributeFields(address_layer) if f["name"] in fields]
+    address_names = set(f["name"] for f in address_fields)
+    zone_fields = [f for f in attributeFields(zone_layer) if f["name"] in fields and f["name"] not in address_names]
+    names = [f["name"] for f in address_fields + zone_fields]
+    schema = hashlib.sha1(json.dumps([address_fields, zone_fields, where_clause,
+                                      spatial_ref.exportToString()]).encode("utf-8")).hexdigest()
+
+    addresses = {}
+    for row in arcpy.da.SearchCursor(address_layer, ["OID@", "SHAPE@XY"] + [f["name"] for f in address_fields],
+                                     where_clause, spatial_ref):
+        addresses[row[0]] = (row[1][0], row[1][1], list(row[2:]))
+    zones = {}
+    for row in arcpy.da.SearchCursor(zone_layer, ["OID@", "SHAPE@"] + [f["name"] for f in zone_fields]):
+        rings = SpatialIndex.polygonRings(row[1])
+        zones[row[0]] = ([np.array(ring, dtype=np.float64) for ring in rings], list(row[2:]))
+
+    schedule, counts = AddressSchedule.refreshSchedule(AddressSchedule.loadSchedule(schedule_path), addresses, zones,
+                                                       names, schema)
+    arcpy.AddMessage("Schedule refreshed: {added} addresses added, {changed} changed, {deleted} deleted, "
+                     "{zones_changed} zones changed, {evaluated} addresses looked up".format(**counts))
+    try:
+        AddressSchedule.saveSchedule(schedule, schedule_path)
+    except (IOError, OSError):
+        arcpy.AddWarning("Could not save the schedule to {0}".format(schedule_path))
+    return schedule, address_fields + zone_fields
+
+
+def addPickupDates(rows, fields, holiday_table, cycle_table, day_field="DAY", area_field="RCDAREA"):
+    """
+    Add the next garbage and recycling pickup to every row, computed for all the rows at once.
+
+    :param rows: LIST the rows, one value for every field.
+    :param fields: LIST the field names of the rows.
+    :param holiday_table: STRING the path of the holiday CSV file read by CollectionCalendar.readHolidays, or None.
+    :param cycle_table: STRING the path of the recycling cycle CSV file read by CollectionCalendar.readRecycleCycles,
+        or None. Without it no recycling pickups are computed.
+    :param day_field: STRING the field of the garbage collection day.
+    :param area_field: STRING the field of the recycling area.
+    :return: LIST the rows with NEXT_GARBAGE and NEXT_RECYCLING added, as dates or None.
+    :return: LIST the field names with NEXT_GARBAGE and NEXT_RECYCLING added.
+    """
+    holidays, shifts = CollectionCalendar.readHolidays(holiday_table) if holiday_table else (None, None)
+    cycles = CollectionCalendar.readRecycleCycles(cycle_table, area_field) if cycle_table else {}
+
+    def column(name):
+        return [row[fields.index(name)] for row in rows] if name in fields else [None] * len(rows)
+
+    garbage, recycling = CollectionCalendar.nextPickups(column(day_field), column(area_field), cycles, None, holidays,
+                                                        shifts)
+    rows = [row + [g, r] for row, g, r in zip(rows, garbage.astype(object), recycling.astype(object))]
+    return rows, fields + ["NEXT_GARBAGE", "NEXT_RECYCLING"]
@@ -0,0 +1,263 @@
+"""
+CollectionLookupService.py: A local lookup service that keeps the Solid Waste collection data in memory.
+
+Every run of the Identify Recycle Date By Address tool imports arcpy, opens both layers and writes its result to the
+scratch geodatabase to answer one question. This service loads the collected address points and the collection zones
+into the indexes of CollectionLookup once and answers lookups over HTTP on localhost from memory, in milliseconds.
+
+    python CollectionLookupService.py <address layer> <recycle layer> [--index D:\\SolidWaste\\CollectionZones.npz]
+                                      [--host 127.0.0.1] [--port 8086] [--poll 10]
+
+    GET /lookup?address=123%20N%20Galloway  {"address": ..., "results": [{"ADDRESS": ..., "DAY": ...}], "ms": ...}
+    GET /status                             what is loaded, when, how many lookups have been answered and the hit
+                                            and miss counts of the lookup cache
+
+The address must be URL encoded, for example with curl -G --data-urlencode "address=123 N Galloway". The service runs
+on asyncio, so it keeps accepting connections and reading requests while a lookup runs. The lookups themselves run one
+at a time in a worker thread, because the lookup cache is not thread safe. Every poll seconds the files of both layers
+are checked and the indexes are rebuilt in another worker thread when they have changed. The old indexes keep
+answering until the new ones are ready.
+
+Requires Python 3, as shipped with ArcGIS Pro.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import arcpy
+
+import CollectionLookup
+
+# DEFAULT_PORT: INT the port the service listens on.
+# DEFAULT_POLL: DOUBLE the seconds between checks of the source files.
+# STATUS_TEXT: DICT the reason phrase of every status code the service sends.
+DEFAULT_PORT = 8086
+DEFAULT_POLL = 10.0
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+class LookupService(object):
+    """
+    The indexes of the address and recycle layers, and the HTTP handler that answers lookups from them.
+
+    :param address_layer: STRING the path of the address points.
+    :param zone_layer: STRING the path of the collection zones.
+    :param index_path: STRING the path of the saved zone index, or None to keep the indexes in memory only.
+    :param fields: LIST the fields to return for every address.
+    """
+
+    def __init__(self, address_layer, zone_layer, index_path=None, fields=CollectionLookup.OUTPUT_FIELDS):
+        self.address_layer = address_layer
+        self.zone_layer = zone_layer
+        self.index_path = index_path
+        self.fields = fields
+        self.indexes = None
+        self.sources = None
+        self.loaded = None
+        self.lookups = 0
+        self.lookup_thread = ThreadPoolExecutor(max_workers=1)
+
+    def sourceState(self):
+        """
+        Return what the source layers look like on disk. The file stats are cheap to read, so they are used whenever
+        the data has files. Data in an enterprise geodatabase is fingerprinted through arcpy instead.
+
+        :return: LIST the state of each layer.
+        """
+        state = []
+        for layer in (self.address_layer, self.zone_layer):
+            files = CollectionLookup.datasetFiles(arcpy.Describe(layer).catalogPath)
+            state.append(files or CollectionLookup.datasetFingerprint(layer))
+        return state
+
+    def load(self):
+        """
+        Load or rebuild both indexes and swap them in together. Called in a worker thread once the service is running.
+
+        The indexes are built in the calling thread, so lookups are answered from the old ones meanwhile. They are
+        swapped in on the lookup thread, between two lookups, so a lookup never sees one old and one new index.
+
+        :return: VOID
+        """
+        sources = self.sourceState()
+        zone_index = CollectionLookup.zoneIndex(self.zone_layer, self.index_path)
+        address_index = CollectionLookup.addressIndex(self.address_layer, CollectionLookup.EXCLUSION_SQL,
+                                                      self.zone_layer, self.index_path)
+        self.lookup_thread.submit(self.swap, (address_index, zone_index)).result()
+        self.sources = sources
+        self.loaded = time.time()
+
+    def swap(self, indexes):
+        """
+        Replace both indexes at once and empty the lookup cache, which holds lookups made against the old ones. Runs on
+        the lookup thread.
+
+        :param indexes: TUPLE the address index and the zone index.
+        :return: VOID
+        """
+        self.indexes = indexes
+        CollectionLookup.lookup_cache.clear()
+
+    async def watch(self, poll):
+        """
+        Reload the indexes whenever the source layers change, until the service stops.
+
+        :param poll: DOUBLE the seconds between checks.
+        :return: VOID
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(poll)
+            try:
+                if await loop.run_in_executor(None, self.sourceState) != self.sources:
+                    arcpy.AddMessage("The collection data changed, reloading...")
+                    await loop.run_in_executor(None, self.load)
+            except Exception as e:
+                # Keep answering from the indexes already loaded, the next check tries again.
+                arcpy.AddWarning("Could not reload the collection data: {0}".format(e))
+
+    def lookup(self, address):
+        """
+        Return the collection zones of the addresses that match a query.
+
+        :param address: STRING the address or any part of it.
+        :return: LIST of records.
+        """
+        self.lookups += 1
+        address_index, zone_index = self.indexes
+        return CollectionLookup.findCollectionZones(address_index, zone_index, address, self.fields)
+
+    def respond(self, method, target):
+        """
+        Return the answer to a request.
+
+        :param method: STRING the HTTP method.
+        :param target: STRING the path and query of the request.
+        :return: INT the status code.
+        :return: DICT the body.
+        """
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+
+        if url.path == "/status":
+            address_index, zone_index = self.indexes or (None, None)
+            return 200, {"loaded": self.loaded, "lookups": self.lookups,
+                         "addresses": len(address_index["xy"]) if address_index else 0,
+                         "zones": len(zone_index["attributes"]) if zone_index else 0,
+                         "cache": CollectionLookup.lookup_cache.stats()}
+
+        if url.path == "/lookup":
+            if self.indexes is None:
+                return 503, {"error": "the collection data is still loading"}
+            if not query.get("address"):
+                return 400, {"error": "address is required"}
+            start = time.time()
+            results = self.lookup(query["address"][0])
+            return 200, {"address": query["address"][0], "results": results,
+                         "fuzzy": any(record["FUZZY"] for record in results),
+                         "ms": round((time.time() - start) * 1000.0, 3)}
+
+        return 404, {"error": "{0} not found".format(url.path)}
+
+    async def handle(self, reader, writer):
+        """
+        Answer one HTTP request and close the connection.
+
+        :param reader: StreamReader of the connection.
+        :param writer: StreamWriter of the connection.
+        :return: VOID
+        """
+        request_line = ""
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+        except ValueError:
+            # A line longer than the limit of the reader. It is answered as malformed below.
+            pass
+
+        # A request line is exactly METHOD TARGET VERSION. A target with spaces in it was not URL encoded.
+        parts = request_line.split()
+        if len(parts) != 3:
+            status, body = 400, {"error": "malformed request"}
+        else:
+            try:
+                status, body = await asyncio.get_running_loop().run_in_executor(self.lookup_thread, self.respond,
+                                                                                parts[0].upper(), parts[1])
+            except Exception as e:
+                arcpy.AddWarning("Could not answer {0}: {1}".format(request_line.strip(), e))
+                status, body = 500, {"error": "the lookup failed"}
+
+        payload = json.dumps(body, default=str).encode("utf-8")
+        writer.write("HTTP/1.1 {0} {1}\r\nContent-Type: application/json\r\nContent-Length: {2}\r\n"
+                     "Connection: close\r\n\r\n".format(status, STATUS_TEXT[status], len(payload)).encode("latin-1"))
+        writer.write(payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(service, host, port, poll):
+    """
+    Load the indexes, then answer requests and watch the source layers until the service is stopped.
+
+    :param service: LookupService
+    :param host: STRING the address to listen on.
+    :param port: INT the port to listen on.
+    :param poll: DOUBLE the seconds between checks of the source layers.
+    :return: VOID
+    """
+    loop = asyncio.get_running_loop()
+    server = await asyncio.start_server(service.handle, host, port)
+    await loop.run_in_executor(None, service.load)
+    arcpy.AddMessage("Answering collection lookups on http://{0}:{1}/lookup?address=".format(host, port))
+    watcher = asyncio.ensure_future(service.watch(poll))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("address_layer", help="the address points")
+    parser.add_argument("recycle_layer", help="the collection zones")
+    parser.add_argument("--index", help="the path of the saved zone index, as in the Zone Index parameter")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL, help="seconds between checks of the source files")
+    args = parser.parse_args(argv)
+
+    service = LookupService(args.address_layer, args.recycle_layer, args.index)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.poll))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+CollectionZoneIndex.py: A persistent spatial index of the Solid Waste collection zones.
+
+Finding the collection zone of an address with Intersect_analysis compares the address points with every collection
+polygon and writes the result to disk, every time the tool runs. The collection zones hardly ever change, so this
+module packs them into an STR-tree once and saves it to a file. A lookup walks the tree down to the few zones whose
+boxes hold the point and runs a vectorized point in polygon test against their edges only.
+
+The tree is the Sort-Tile-Recursive packing of the zone bounding boxes built by SpatialIndex, which the Emergency
+Management tools share. This module adds the zone attributes and saves the tree to a file.
+
+This module does not import arcpy. CollectionLookup reads the zones out of the feature class and decides when the
+saved index is out of date.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import json
+import numpy as np
+import os
+import tempfile
+
+import SpatialIndex
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def buildZoneIndex(zones, fields, fingerprint=None, capacity=SpatialIndex.NODE_CAPACITY):
+    """
+    Build the STR-tree of a set of collection zones with SpatialIndex.buildIndex.
+
+    :param zones: LIST of (rings, attributes) for every zone. rings is a list of (n, 2) vertex arrays, outer rings and
+        holes alike. attributes is a list of the zone's field values in the order of fields.
+    :param fields: LIST of field dicts, {"name": ..., "type": ..., "length": ...}, describing the attributes.
+    :param fingerprint: STRING what the zones were read from, used to tell when the index is out of date.
+    :param capacity: INT the largest number of children of a node.
+    :return: DICT the index from SpatialIndex.buildIndex, where the polygon numbers are the zone numbers, with the
+        fields, attributes and fingerprint as given.
+    """
+    index = SpatialIndex.buildIndex([rings for rings, attributes in zones], capacity)
+    index["fields"] = list(fields)
+    index["attributes"] = [list(attributes) for rings, attributes in zones]
+    index["fingerprint"] = fingerprint
+    return index
+
+
+def queryPoints(index, x, y):
+    """
+    Return every zone that holds each of a set of points, with SpatialIndex.queryPoints.
+
+    :param index: DICT the index from buildZoneIndex.
+    :param x: ARRAY the x coordinates of the points, in the spatial reference of the zones.
+    :param y: ARRAY the y coordinates of the points.
+    :return: ARRAY the number of each point, once for every zone that holds it, in order.
+    :return: ARRAY the number of the zone that holds it.
+    """
+    return SpatialIndex.queryPoints(index, x, y)
+
+
+def zonesAt(index, x, y):
+    """
+    Return the zones that hold a single point.
+
+    :param index: DICT the index from buildZoneIndex.
+    :param x: DOUBLE the x coordinate of the point, in the spatial reference of the zones.
+    :param y: DOUBLE the y coordinate of the point.
+    :return: LIST the numbers of the zones, usually one.
+    """
+    point, zone = queryPoints(index, [x], [y])
+    return [int(z) for z in zone]
+
+
+def saveArrays(path, **arrays):
+    """
+    Save arrays to a NumPy .npz file.
+
+    The file is written under a unique temporary name in the folder of its final path and then replaced over it in one
+    step, so a lookup running at the same time never reads half a file and two saves at once never share a file.
+
+    :param path: STRING the path of the file.
+    :param arrays: ARRAY the arrays to save, by name.
+    :return: VOID
+    """
+    handle, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(handle, "wb") as npz_file:
+            np.savez(npz_file, **arrays)
+        # mkstemp makes the file readable by its owner only, and the lookup service may run as another user.
+        os.chmod(temp_path, 0o644)
+        if hasattr(os, "replace"):
+            os.replace(temp_path, path)
+        else:
+            # Python 2 has no os.replace and cannot rename over a file on Windows, so the old file is removed first.
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def saveZoneIndex(index, path):
+    """
+    Save an index to a NumPy .npz file with saveArrays.
+
+    :param index: DICT the index from buildZoneIndex.
+    :param path: STRING the path of the file.
+    :return: VOID
+    """
+    arrays = {
+        "edges": index["edges"],
+        "edge_start": index["edge_start"],
+        "edge_count": index["edge_count"],
+        "meta": np.array(json.dumps({"fields": index["fields"], "attributes": index["attributes"],
+                                     "fingerprint": index["fingerprint"], "levels": len(index["levels"])},
+                                    default=str))
+    }
+    for depth, level in enumerate(index["levels"]):
+        for name in ("boxes", "start", "end"):
+            arrays["level{0}_{1}".format(depth, name)] = level[name]
+
+    saveArrays(path, **arrays)
+
+
+def loadZoneIndex(path):
+    """
+    Load an index saved by saveZoneIndex.
+
+    The file holds only numeric and text arrays, so it never needs pickle. np.load is called without allow_pickle,
+    which ArcMap's NumPy 1.9 does not accept.
+
+    :param path: STRING the path of the file.
+    :return: DICT the index, or None if the file is missing or unreadable.
+    """
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            return {
+                "edges": data["edges"],
+                "edge_start": data["edge_start"],
+                "edge_count": data["edge_count"],
+                "levels": [dict((name, data["level{0}_{1}".format(depth, name)]) for name in ("boxes", "start", "end"))
+                           for depth in range(meta["levels"])],
+                "fields": meta["fields"],
+                "attributes": meta["attributes"],
+                "fingerprint": meta["fingerprint"]
+            }
+    except (IOError, OSError, KeyError, ValueError):
+        return None
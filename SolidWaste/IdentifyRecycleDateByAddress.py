@@ -14,17 +14,64 @@ __status__ = "Development"
 
 import arcinfo
 import arcpy
+import json
 import os
 
+import AddressSchedule
+import CollectionLookup
+
 ########################################################################################################################
 #
 #                                                  TOOL PARAMETERS
 #
 ########################################################################################################################
 
+# zoneIndexPath: STRING (optional) the path of a file to keep a spatial index of the recycleLayer in, such as
+#   D:\SolidWaste\CollectionZones.npz. When set, the address points are looked up in the index instead of being
+#   intersected with the recycleLayer. An index of the collected addresses is kept next to it, as
+#   CollectionZones_addresses.npz, and replaces the LIKE query. Misspelled addresses fall back to the closest matches.
+#   Each index is built on the first run and rebuilt only when its layer changes.
+# addressList: STRING (optional) a batch of addresses to look up at once, for the call center and the utility billing
+#   export. Either the path of a CSV file with an ADDRESS column, or the addresses separated by semicolons. Addresses
+#   are matched exactly after normalizing case, spaces, punctuation, street types and directions. When set,
+#   addressString is ignored and the tool output is a table of batch_fields with a row for every address.
+# scheduleTablePath: STRING (optional) the path of a file to keep the materialized schedule in, such as
+#   D:\SolidWaste\Schedule.npz. When set, the tool joins every collected address with the recycleLayer, keeping
+#   output_fields, and writes the whole schedule as its output. The first run joins every address. Later runs only look
+#   up the addresses and zones that were added, changed or deleted since, so it can be refreshed nightly.
+# outputJSON: BOOLEAN (optional) true to return the matching rows as JSON in resultJSON, parameter 8, instead of writing
+#   a feature class to the scratch geodatabase. Only output_fields are returned and nothing is written to disk. The
+#   indexes are kept at zoneIndexPath when it is set and in memory otherwise.
+# holidayTablePath: FILE (optional) a CSV file of holidays with a DATE column and an optional SHIFT column, the days the
+#   holiday pushes back collection in its week. Used with scheduleTablePath to add the NEXT_GARBAGE and NEXT_RECYCLING
+#   date of every address to the schedule.
+# recycleCycleTablePath: FILE (optional) a CSV file with the RCDAREA of every recycling area and the START date of any
+#   pickup in its every other week cycle. Used with scheduleTablePath.
+
+
+def optionalParameter(index, as_text=True):
+    """
+    Returns an optional tool parameter, or an empty value when the toolbox does not declare it. A toolbox saved before
+    the parameter was added still runs the tool, with the parameter's default.
+
+    :param index: INT the position of the parameter.
+    :param as_text: BOOLEAN true for the text of the parameter, false for its value.
+    :return: the parameter, or "" as text and None as a value when the toolbox does not declare it.
+    """
+    if index >= arcpy.GetArgumentCount():
+        return "" if as_text else None
+    return arcpy.GetParameterAsText(index) if as_text else arcpy.GetParameter(index)
+
+
 addressLayer = arcpy.GetParameterAsText(0)
 recycleLayer = arcpy.GetParameterAsText(1)
 addressString = arcpy.GetParameterAsText(2)
+zoneIndexPath = optionalParameter(4)
+addressList = optionalParameter(5)
+scheduleTablePath = optionalParameter(6)
+outputJSON = optionalParameter(7, as_text=False)
+holidayTablePath = optionalParameter(9)
+recycleCycleTablePath = optionalParameter(10)
 
 
 ########################################################################################################################
@@ -42,15 +89,14 @@ output_path = arcpy.env.scratchGDB
 #
 ########################################################################################################################
 
-address_SQL = '"MUNIS_CLAS" NOT IN(\'UTILITY_ADDRESS\', \'OUTSIDE_CITY\') ' \
-              'AND "MESQ_CLASS" NOT IN (\'OUTSIDE_CITY\', \'OUTSIDE_CITY_MISD\', \'OUTSIDE_CITY_MISD_TAX\') ' \
-              'AND "ADDRESS" LIKE '
+exclusion_SQL = CollectionLookup.EXCLUSION_SQL
+address_SQL = exclusion_SQL + 'AND "ADDRESS" LIKE '
 input_address_SQL = '\'%' + addressString + '%\''
 where_clause = address_SQL + input_address_SQL
 
-output_fields = ['ADDRESS', 'FID_MESQ_GARB_ROTO_RECYCLE', 'FID_MESQ_ROTO_BOOM', 'DAY',
-                 'ROUTE', 'FID_MESQ_GARBAGE_COLLECTION', 'GCDAREA', 'FID_MESQ_RECYCLING',
-                 'RCDAREA']
+output_fields = CollectionLookup.OUTPUT_FIELDS
+
+batch_fields = ['ADDRESS', 'DAY', 'ROUTE', 'GCDAREA', 'RCDAREA']
 
 
 ########################################################################################################################
@@ -59,30 +105,85 @@ output_fields = ['ADDRESS', 'FID_MESQ_GARB_ROTO_RECYCLE', 'FID_MESQ_ROTO_BOOM',
 #
 ########################################################################################################################
 
-# Query the address points using the user input parameters.
-address_lyr = arcpy.MakeFeatureLayer_management(addressLayer, "#", where_clause)
+if scheduleTablePath:
+
+    # Refresh the keyed table of every collected address and its collection zone.
+    schedule, schedule_fields = CollectionLookup.refreshSchedule(addressLayer, recycleLayer, exclusion_SQL,
+                                                                 scheduleTablePath, output_fields)
+
+    rows = AddressSchedule.scheduleRows(schedule)
+    fields = ["ADDRESS_OID", "ZONE_OID"] + schedule["fields"]
+    field_types = dict((f["name"], f) for f in schedule_fields)
+    field_types["ADDRESS_OID"] = field_types["ZONE_OID"] = {"type": "Integer", "length": 4}
+
+    # Work out the next pickup of every address at once.
+    if holidayTablePath or recycleCycleTablePath:
+        rows, fields = CollectionLookup.addPickupDates(rows, fields, holidayTablePath or None,
+                                                       recycleCycleTablePath or None)
+        field_types["NEXT_GARBAGE"] = field_types["NEXT_RECYCLING"] = {"type": "Date", "length": 8}
+
+    schedule_table = CollectionLookup.writeTable(rows, fields, field_types,
+                                                 os.path.join(output_path, "schedule_result"))
+
+    # Tool output.
+    arcpy.SetParameterAsText(3, schedule_table)
+
+elif addressList:
+
+    # Resolve every address in one pass over the address layer and one lookup of all the points in the zone index.
+    addresses = CollectionLookup.readAddressList(addressList)
+    rows = CollectionLookup.resolveAddresses(addressLayer, recycleLayer, addresses, exclusion_SQL,
+                                             zoneIndexPath or None, batch_fields)
+
+    field_types = dict((f["name"], f) for f in CollectionLookup.attributeFields(addressLayer) +
+                       CollectionLookup.attributeFields(recycleLayer))
+    batch_table = CollectionLookup.writeTable(rows, ["INPUT_ADDRESS"] + batch_fields, field_types,
+                                              os.path.join(output_path, "batch_result"))
+
+    # Tool output.
+    arcpy.SetParameterAsText(3, batch_table)
+
+elif outputJSON:
+
+    # Project the output fields and FUZZY straight out of the indexes and hand the rows back without writing anything.
+    records = CollectionLookup.lookupRecords(addressLayer, recycleLayer, addressString, exclusion_SQL,
+                                             zoneIndexPath or None)
+
+    # Tool output.
+    arcpy.SetParameterAsText(8, json.dumps(records, default=str))
+
+else:
 
-intersect = arcpy.Intersect_analysis([address_lyr, recycleLayer], "#")
+    # Find the address points and their collection zones. With a zone index the address is found in a trigram index
+    # of the collected addresses and the points are looked up in the saved STR-tree of the collection zones. Both are
+    # only rebuilt when their layer changes, so neither layer is scanned.
+    if zoneIndexPath:
+        intersect = CollectionLookup.intersectWithIndex(addressLayer, recycleLayer, addressString, exclusion_SQL,
+                                                        zoneIndexPath, os.path.join("in_memory", "intersect"))
+    else:
+        # Query the address points using the user input parameters.
+        address_lyr = arcpy.MakeFeatureLayer_management(addressLayer, "#", where_clause)
+        intersect = arcpy.Intersect_analysis([address_lyr, recycleLayer], "#")
 
-# We need the intersect results to be a feature layer so we can apply the Field Info.
-intersect_lyr = arcpy.MakeFeatureLayer_management(intersect, "#")
+    # We need the intersect results to be a feature layer so we can apply the Field Info.
+    intersect_lyr = arcpy.MakeFeatureLayer_management(intersect, "#")
 
-# Create Field Info to hide unnecessary fields.
-desc = arcpy.Describe(intersect_lyr)
-arcpy.AddMessage(desc.dataType)
-field_info = desc.fieldInfo
-for i in range(0, field_info.count):
-    if field_info.getFieldName(i) not in output_fields:
-        field_info.setVisible(i, "HIDDEN")
+    # Create Field Info to hide unnecessary fields.
+    desc = arcpy.Describe(intersect_lyr)
+    arcpy.AddMessage(desc.dataType)
+    field_info = desc.fieldInfo
+    for i in range(0, field_info.count):
+        if field_info.getFieldName(i) not in output_fields:
+            field_info.setVisible(i, "HIDDEN")
 
-# Apply Field Info
-result_lyr = arcpy.MakeFeatureLayer_management(intersect_lyr, "#", "", "", field_info)
+    # Apply Field Info
+    result_lyr = arcpy.MakeFeatureLayer_management(intersect_lyr, "#", "", "", field_info)
 
-# Convert layer in to Feature Class.
-arcpy.FeatureClassToFeatureClass_conversion(result_lyr, output_path, "result_lyr")
+    # Convert layer in to Feature Class.
+    arcpy.FeatureClassToFeatureClass_conversion(result_lyr, output_path, "result_lyr")
 
-# Tool output.
-arcpy.SetParameterAsText(3, os.path.join(output_path, "result_lyr"))
+    # Tool output.
+    arcpy.SetParameterAsText(3, os.path.join(output_path, "result_lyr"))
 
 
 ########################################################################################################################
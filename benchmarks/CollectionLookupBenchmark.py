@@ -0,0 +1,219 @@
+"""
+CollectionLookupBenchmark.py: Query replay load benchmark for the Identify Recycle Date By Address lookup.
+
+Replays a stream of address queries against the lookup path of SolidWaste/IdentifyRecycleDateByAddress.py and reports
+the throughput, the 50th, 95th and 99th percentile latency and the hit rate of the lookup cache. The stream is either
+recorded, a text file with one query per line, or synthetic from SyntheticAddresses, with repeats and partial and
+misspelt addresses. The address and zone layers are generated and served by the arcpy stand-in in arcpy_standin, so the
+benchmark needs nothing but NumPy and runs headless on Linux.
+
+Two lookup paths can be replayed:
+
+    tool     - CollectionLookup.lookupRecords, what the tool runs for each request with Output JSON checked. Every
+               query checks the fingerprints of both layers before it looks anything up.
+    service  - CollectionLookup.findCollectionZones against indexes already in memory, what CollectionLookupService
+               runs for each request.
+
+    python benchmarks/CollectionLookupBenchmark.py
+    python benchmarks/CollectionLookupBenchmark.py --queries 100000 --addresses 200000 --path service
+    python benchmarks/CollectionLookupBenchmark.py --replay queries.txt --cache-size 0
+
+The first query builds the indexes. Its time is reported on its own and left out of the percentiles.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+STANDIN_DIR = os.path.join(BENCHMARK_DIR, "arcpy_standin")
+SOLID_WASTE_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "SolidWaste")
+sys.path.insert(0, STANDIN_DIR)
+sys.path.insert(1, SOLID_WASTE_DIR)
+
+import arcpy  # noqa: E402
+import CollectionLookup  # noqa: E402
+import SyntheticAddresses  # noqa: E402
+
+# ADDRESS_LAYER: STRING the path the generated address points are served at.
+# ZONE_LAYER: STRING the path the generated collection zones are served at.
+ADDRESS_LAYER = os.path.join("synthetic.gdb", "Addresses")
+ZONE_LAYER = os.path.join("synthetic.gdb", "Recycle")
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def registerLayers(address_count, grid, seed):
+    """
+    Generate the address and zone layers and add them to the arcpy stand-in.
+
+    :param address_count: INT the number of address points.
+    :param grid: INT the number of zones along each side of the grid.
+    :param seed: INT the seed of the random generator.
+    :return: LIST the stored address of every point.
+    """
+    spatial_ref = arcpy.SpatialReference(2276)
+
+    rings, zone_attributes = SyntheticAddresses.syntheticZones(grid)
+    arcpy.registerFeatureClass(ZONE_LAYER, "Polygon", [arcpy.Polygon._fromParts([[ring]], spatial_ref)
+                                                      for ring in rings], spatial_ref,
+                               [arcpy.Field(name, "String", 16) for name in ("DAY", "ROUTE", "GCDAREA", "RCDAREA")],
+                               zone_attributes)
+
+    xy, address_attributes = SyntheticAddresses.syntheticAddresses(address_count, grid, seed=seed)
+    arcpy.registerFeatureClass(ADDRESS_LAYER, "Point", [arcpy.PointGeometry(arcpy.Point(x, y), spatial_ref)
+                                                       for x, y in xy], spatial_ref,
+                               [arcpy.Field(name, "String", 64) for name in ("ADDRESS", "MUNIS_CLAS", "MESQ_CLASS")],
+                               address_attributes)
+    return [attributes["ADDRESS"] for attributes in address_attributes]
+
+
+def lookupFunction(path):
+    """
+    Return the function that answers one query on a lookup path.
+
+    :param path: STRING tool or service.
+    :return: FUNCTION taking the query and returning the matching records.
+    """
+    if path == "tool":
+        return lambda query: CollectionLookup.lookupRecords(ADDRESS_LAYER, ZONE_LAYER, query,
+                                                            CollectionLookup.EXCLUSION_SQL, None)
+
+    state = {}
+
+    def lookup(query):
+        if not state:
+            state["zones"] = CollectionLookup.zoneIndex(ZONE_LAYER, None)
+            state["addresses"] = CollectionLookup.addressIndex(ADDRESS_LAYER, CollectionLookup.EXCLUSION_SQL,
+                                                               ZONE_LAYER, None)
+        return CollectionLookup.findCollectionZones(state["addresses"], state["zones"], query,
+                                                    CollectionLookup.OUTPUT_FIELDS)
+    return lookup
+
+
+def replay(queries, lookup):
+    """
+    Run every query in order and time each one.
+
+    :param queries: LIST of (kind, query).
+    :param lookup: FUNCTION from lookupFunction.
+    :return: ARRAY the seconds every query took.
+    :return: ARRAY the number of records every query returned.
+    """
+    seconds = np.zeros(len(queries))
+    found = np.zeros(len(queries), dtype=np.int64)
+    for i, (kind, query) in enumerate(queries):
+        start = time.time()
+        found[i] = len(lookup(query))
+        seconds[i] = time.time() - start
+
+        # The stand-in keeps every message, which would grow without bound over a long replay.
+        del arcpy.messages[:]
+    return seconds, found
+
+
+def summarize(queries, seconds, found, total):
+    """
+    Return the measurements of a replay.
+
+    :param queries: LIST of (kind, query).
+    :param seconds: ARRAY the seconds every query took. The first is the cold query that built the indexes.
+    :param found: ARRAY the number of records every query returned.
+    :param total: DOUBLE the wall time of the whole replay.
+    :return: DICT
+    """
+    warm = seconds[1:] * 1000.0
+    kinds = np.array([kind for kind, query in queries])
+    result = {
+        "queries": len(queries),
+        "distinct": len(set(query for kind, query in queries)),
+        "wall_time": total,
+        "throughput": len(queries) / total if total else 0.0,
+        "cold_ms": seconds[0] * 1000.0 if len(seconds) else 0.0,
+        "p50_ms": float(np.percentile(warm, 50)) if len(warm) else 0.0,
+        "p95_ms": float(np.percentile(warm, 95)) if len(warm) else 0.0,
+        "p99_ms": float(np.percentile(warm, 99)) if len(warm) else 0.0,
+        "max_ms": float(warm.max()) if len(warm) else 0.0,
+        "not_found": int(np.count_nonzero(found == 0)),
+        "cache": CollectionLookup.lookup_cache.stats(),
+        "kinds": {}
+    }
+    for kind in sorted(set(kinds)):
+        kind_ms = seconds[kinds == kind] * 1000.0
+        result["kinds"][kind] = {"queries": len(kind_ms), "p50_ms": float(np.percentile(kind_ms, 50)),
+                                 "p99_ms": float(np.percentile(kind_ms, 99)),
+                                 "not_found": int(np.count_nonzero(found[kinds == kind] == 0))}
+    return result
+
+
+def formatReport(result):
+    """
+    Return the measurements of a replay as text.
+    """
+    lines = [
+        "{queries} queries ({distinct} distinct) in {wall_time:.2f}s: {throughput:.0f} queries/s".format(**result),
+        "cold first query {cold_ms:.1f}ms, then p50 {p50_ms:.3f}ms  p95 {p95_ms:.3f}ms  p99 {p99_ms:.3f}ms  "
+        "max {max_ms:.1f}ms".format(**result),
+        "cache hit rate {hit_rate:.1%} ({hits} hits, {misses} misses, {entries} of {size} entries)".format(
+            **result["cache"]),
+        "{0} queries found nothing".format(result["not_found"]),
+        "",
+        "{0:<10} {1:>8} {2:>10} {3:>10} {4:>10}".format("kind", "queries", "p50_ms", "p99_ms", "not_found")
+    ]
+    for kind, stats in sorted(result["kinds"].items()):
+        lines.append("{0:<10} {queries:>8} {p50_ms:>10.3f} {p99_ms:>10.3f} {not_found:>10}".format(kind, **stats))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--queries", type=int, default=100000, help="the number of synthetic queries")
+    parser.add_argument("--replay", help="a text file of recorded queries, one per line, instead of synthetic ones")
+    parser.add_argument("--addresses", type=int, default=100000, help="the number of generated address points")
+    parser.add_argument("--grid", type=int, default=20, help="the number of zones along each side of the grid")
+    parser.add_argument("--zipf", type=float, default=1.2, help="how skewed the repeats are, higher is more skewed")
+    parser.add_argument("--path", choices=("tool", "service"), default="tool", help="the lookup path to replay")
+    parser.add_argument("--cache-size", type=int, default=CollectionLookup.CACHE_SIZE,
+                        help="the size of the lookup cache, 0 to turn it off")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the measurements to this JSON file")
+    args = parser.parse_args(argv)
+
+    arcpy.reset()
+    addresses = registerLayers(args.addresses, args.grid, args.seed)
+    if args.replay:
+        with open(args.replay) as replay_file:
+            queries = [("recorded", line.strip()) for line in replay_file if line.strip()]
+    else:
+        queries = SyntheticAddresses.queryStream(addresses, args.queries, args.seed, args.zipf)
+
+    CollectionLookup.lookup_cache = CollectionLookup.LookupCache(args.cache_size)
+    start = time.time()
+    seconds, found = replay(queries, lookupFunction(args.path))
+    result = summarize(queries, seconds, found, time.time() - start)
+    result.update({"path": args.path, "addresses": args.addresses, "zones": args.grid * args.grid})
+
+    print(formatReport(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
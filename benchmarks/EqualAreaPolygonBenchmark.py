@@ -0,0 +1,293 @@
+"""
+EqualAreaPolygonBenchmark.py: Benchmark suite for the Equal Area Polygon tool.
+
+Runs Editing/EqualAreaPolygon.py on synthetic polygons of every shape in SyntheticPolygons, from 10 to 1,000,000
+vertices, at several tolerances and solvers, and records the wall time, the number of iterations, the peak memory and
+the final area ratio of every run. The script runs against the arcpy stand-in in arcpy_standin, so it needs nothing but
+NumPy and works headless on Linux.
+
+Every case runs in its own process, so the peak memory of one case does not leak into the next. The iteration count and
+peak memory come from the tool's own telemetry.
+
+With --features the polygon is copied side by side into that many features and split in per-feature mode. The worker
+pool is started with the spawn start method, as it is on Windows, so a worker that ran the tool script again would
+fail the case.
+
+The results are compared against a stored baseline and every case that got slower, used more iterations or more memory,
+or missed its tolerance is flagged. The exit code is 1 when anything is flagged, so the suite can gate a change.
+
+    python benchmarks/EqualAreaPolygonBenchmark.py --save-baseline     # record the baseline on this machine
+    python benchmarks/EqualAreaPolygonBenchmark.py                     # compare against it
+    python benchmarks/EqualAreaPolygonBenchmark.py --sizes 10,1000 --solvers BRENT:NUMPY,SWEEP
+    python benchmarks/EqualAreaPolygonBenchmark.py --features 8 --sizes 1000 --solvers SWEEP
+
+Timings only compare with a baseline recorded on the same machine.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+STANDIN_DIR = os.path.join(BENCHMARK_DIR, "arcpy_standin")
+SCRIPT = os.path.join(os.path.dirname(BENCHMARK_DIR), "Editing", "EqualAreaPolygon.py")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baselines", "EqualAreaPolygon.json")
+
+# DEFAULT_SIZES: the vertex counts of the synthetic polygons.
+# DEFAULT_TOLERANCES: the tolerances every polygon is split at.
+# DEFAULT_SOLVERS: SOLVER:AREA_ENGINE pairs. The area engine defaults to GEOPROCESSING.
+# SLOWDOWN: DOUBLE how much slower than the baseline a case can run before it is flagged, as a fraction.
+# NOISE_FLOOR: DOUBLE differences in wall time below this many seconds are never flagged.
+# AREA_ERROR: DOUBLE the largest relative difference between the area of the pieces and the polygon.
+DEFAULT_SIZES = "10,1000,100000,1000000"
+DEFAULT_TOLERANCES = "0.99,0.9999,0.999999"
+DEFAULT_SOLVERS = "INCREMENT,BRENT,BRENT:NUMPY,SWEEP"
+SLOWDOWN = 0.25
+NOISE_FLOOR = 0.05
+AREA_ERROR = 0.000001
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def caseKey(case):
+    """
+    Return the key a case is stored under in the baseline.
+
+    :param case: DICT the case.
+    :return: STRING shape/vertices/tolerance/solver/area_engine, with /features for per-feature cases.
+    """
+    key = "{shape}/{vertices}/{tolerance}/{solver}/{area_engine}".format(**case)
+    return key + "/{0}".format(case["features"]) if case.get("features") else key
+
+
+def buildCases(shapes, sizes, tolerances, solvers, features=0):
+    """
+    Return every combination of shape, size, tolerance and solver.
+
+    :param shapes: LIST the shape names.
+    :param sizes: LIST the vertex counts.
+    :param tolerances: LIST the tolerances.
+    :param solvers: LIST SOLVER or SOLVER:AREA_ENGINE strings.
+    :param features: INT the number of features to split in per-feature mode, or 0 to split one polygon.
+    :return: LIST of case dicts.
+    """
+    cases = []
+    for shape in shapes:
+        for vertices in sizes:
+            for tolerance in tolerances:
+                for solver in solvers:
+                    solver, _, area_engine = solver.upper().partition(":")
+                    cases.append({"shape": shape, "vertices": vertices, "tolerance": tolerance, "solver": solver,
+                                  "area_engine": area_engine or "GEOPROCESSING", "features": features})
+    return cases
+
+
+def runCase(case):
+    """
+    Run the tool once on a synthetic polygon against the arcpy stand-in. Called in the child process.
+
+    :param case: DICT the case.
+    :return: DICT the case with wall_time, iterations, peak_memory, ratio and area_error added.
+    """
+    sys.path.insert(0, STANDIN_DIR)
+    sys.path.insert(1, os.path.dirname(SCRIPT))
+    sys.path.insert(2, BENCHMARK_DIR)
+    import arcpy
+    import SyntheticPolygons
+
+    scratch = tempfile.mkdtemp(prefix="equal_area_benchmark_")
+    arcpy.reset(scratch)
+
+    parts = SyntheticPolygons.syntheticPolygon(case["shape"], case["vertices"], case.get("seed", 0))
+    spatial_ref = arcpy.SpatialReference(2276)
+    in_fc = os.path.join(scratch, "input.gdb", "polygon")
+    save_location = os.path.join(scratch, "output.gdb", "split")
+
+    # Per-feature cases lay copies of the polygon side by side. The workers are spawned, not forked, as on Windows.
+    features = case.get("features") or 0
+    if features:
+        if hasattr(multiprocessing, "set_start_method"):
+            multiprocessing.set_start_method("spawn", force=True)
+        step = 3.0 * SyntheticPolygons.SCALE
+        copies = [[[ring + [k * step, 0.0] for ring in part] for part in parts] for k in range(features)]
+        arcpy.registerFeatureClass(in_fc, "Polygon", [arcpy.Polygon._fromParts(copy, spatial_ref) for copy in copies],
+                                   spatial_ref)
+    else:
+        arcpy.registerFeatureClass(in_fc, "Polygon", [arcpy.Polygon._fromParts(parts, spatial_ref)], spatial_ref)
+
+    # Parameters in the order of the tool. The cache is off so every run starts cold.
+    arcpy.parameters[:] = [in_fc, case["tolerance"], save_location, case["solver"], case["area_engine"], 2, 0,
+                           "false", "true" if features else "false", "false", "false", "true"]
+
+    start = time.time()
+    runpy.run_path(SCRIPT, run_name="__main__")
+    wall_time = time.time() - start
+
+    pieces = {}
+    for area, oid in arcpy.da.SearchCursor(save_location, ["SHAPE@AREA", "SRC_OID" if features else "OID@"]):
+        pieces.setdefault(oid if features else 0, []).append(area)
+    ratio = min(min(areas) / max(areas) if len(areas) > 1 else 0.0 for areas in pieces.values())
+    total_area = sum(sum(areas) for areas in pieces.values())
+    expected_area = SyntheticPolygons.polygonArea(parts) * max(features, 1)
+
+    summary = {}
+    with open(os.path.join(scratch, "split_telemetry.jsonl")) as telemetry:
+        for line in telemetry:
+            record = json.loads(line)
+            if record["type"] == "summary":
+                summary = record
+
+    result = dict(case)
+    result.update({
+        "wall_time": wall_time,
+        "iterations": summary.get("iterations"),
+        "peak_memory": summary.get("peak_memory"),
+        "ratio": ratio,
+        "area_error": abs(total_area - expected_area) / expected_area
+    })
+    return result
+
+
+def runCaseInProcess(case, timeout):
+    """
+    Run a case in a new Python process and return its result.
+
+    :param case: DICT the case.
+    :param timeout: DOUBLE the most seconds to wait.
+    :return: DICT the result, with an error instead of the measurements if the run failed.
+    """
+    try:
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--run-case", json.dumps(case)],
+                                         stderr=subprocess.STDOUT, timeout=timeout)
+        return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+    except subprocess.TimeoutExpired:
+        return dict(case, error="timed out after {0} seconds".format(timeout))
+    except subprocess.CalledProcessError as e:
+        lines = e.output.decode("utf-8", "replace").strip().splitlines()
+        return dict(case, error=lines[-1] if lines else "exit code {0}".format(e.returncode))
+
+
+def compareToBaseline(result, baseline):
+    """
+    Return the reasons a result is worse than its baseline.
+
+    :param result: DICT the result of a case.
+    :param baseline: DICT the stored result of the same case, or None.
+    :return: LIST of strings, empty when nothing regressed.
+    """
+    flags = []
+    if "error" in result:
+        return ["failed: " + result["error"]]
+    if result["ratio"] <= result["tolerance"]:
+        flags.append("ratio {0:.9f} misses the tolerance".format(result["ratio"]))
+    if result["area_error"] > AREA_ERROR:
+        flags.append("the pieces are off the polygon area by {0:.2e}".format(result["area_error"]))
+    if baseline is None or "error" in baseline:
+        return flags
+
+    slower = result["wall_time"] - baseline["wall_time"]
+    if slower > NOISE_FLOOR and result["wall_time"] > baseline["wall_time"] * (1 + SLOWDOWN):
+        flags.append("{0:.0%} slower".format(slower / baseline["wall_time"]))
+    if (result["iterations"] or 0) > (baseline["iterations"] or 0):
+        flags.append("{0} more iterations".format(result["iterations"] - baseline["iterations"]))
+    if result["peak_memory"] and baseline["peak_memory"] and \
+            result["peak_memory"] > baseline["peak_memory"] * (1 + SLOWDOWN):
+        flags.append("{0:.0%} more memory".format(result["peak_memory"] / float(baseline["peak_memory"]) - 1))
+    return flags
+
+
+def formatRow(result, flags):
+    """
+    Return one line of the results table.
+    """
+    name = "{shape:<9} {vertices:>8} {tolerance:<9} {solver:<9} {area_engine:<13}".format(**result)
+    if result.get("features"):
+        name += " x{0}".format(result["features"])
+    if "error" in result:
+        return "{0} {1}".format(name, "; ".join(flags))
+    return "{0} {1:>9.3f}s {2:>6} {3:>8.1f}MB {4:.9f}  {5}".format(
+        name, result["wall_time"], result["iterations"], (result["peak_memory"] or 0) / 1048576.0, result["ratio"],
+        "; ".join(flags))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shapes", default="convex,concave,holes,multipart")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--tolerances", default=DEFAULT_TOLERANCES)
+    parser.add_argument("--solvers", default=DEFAULT_SOLVERS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="the stored baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--output", help="also write every result to this JSON file")
+    parser.add_argument("--timeout", type=float, default=900.0, help="the most seconds a case may run")
+    parser.add_argument("--features", type=int, default=0,
+                        help="split this many copies of each polygon in per-feature mode, with spawned workers")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        print(json.dumps(runCase(json.loads(args.run_case))))
+        return 0
+
+    cases = buildCases(args.shapes.split(","), [int(s) for s in args.sizes.split(",")],
+                       [float(t) for t in args.tolerances.split(",")], args.solvers.split(","), args.features)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    elif not args.save_baseline:
+        print("No baseline at {0}, run with --save-baseline to record one.".format(args.baseline))
+
+    print("{0:<9} {1:>8} {2:<9} {3:<9} {4:<13} {5:>10} {6:>6} {7:>10} {8}".format(
+        "shape", "vertices", "tolerance", "solver", "area_engine", "wall_time", "iters", "peak_mem", "ratio"))
+
+    results = {}
+    regressed = 0
+    for case in cases:
+        result = runCaseInProcess(case, args.timeout)
+        flags = compareToBaseline(result, baseline.get(caseKey(case)))
+        regressed += bool(flags)
+        results[caseKey(case)] = result
+        print(formatRow(result, flags))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        if not os.path.isdir(os.path.dirname(args.baseline)):
+            os.makedirs(os.path.dirname(args.baseline))
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f)["results"]
+        stored.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({"results": stored}, f, indent=2, sort_keys=True)
+        print("Stored {0} results in {1}".format(len(results), args.baseline))
+
+    print("{0} of {1} cases flagged".format(regressed, len(cases)))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
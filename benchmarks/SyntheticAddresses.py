@@ -0,0 +1,146 @@
+"""
+SyntheticAddresses.py: Reproducible synthetic address points, collection zones and query streams for the benchmarks.
+
+Every layer is built from a seeded random generator, so the same sizes and seed always give the same data. The
+collection zones are a grid of squares around the State Plane sized origin of SyntheticPolygons. Each zone has a
+collection DAY, ROUTE and garbage and recycling areas. The address points are scattered over the grid with a house
+number, a street from a fixed list and the MUNIS_CLAS and MESQ_CLASS fields the tool filters on.
+
+The query stream mimics the lookups of the call center and the web page. A few addresses are asked about over and over
+and most only once, following a Zipf distribution. The queries are written the way people type them:
+
+    full      - the address as it is stored, in any case.
+    abbrev    - street types and directions abbreviated, 123 N GALLOWAY AVE.
+    partial   - the house number and the first few letters after it, 123 NORTH GA.
+    misspelt  - the full address with two letters swapped.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import numpy as np
+
+from SyntheticPolygons import ORIGIN
+
+# STREETS: LIST the street names the addresses are on.
+# STREET_TYPES: LIST the spelled out street types and their abbreviations.
+# DIRECTIONS: LIST the spelled out directions and their abbreviations.
+# DAYS: LIST the collection days of the zones.
+# EXCLUDED: DOUBLE the fraction of the addresses the tool leaves out, as utility or outside city addresses.
+# QUERY_MIX: DICT the fraction of the queries of each kind.
+STREETS = ["GALLOWAY", "BELT LINE", "MOTLEY", "PIONEER", "GUS THOMASSON", "TOWN EAST", "OATES", "MILITARY",
+           "SCYENE", "BRUTON", "CARTWRIGHT", "FAITHON P LUCAS", "LAWSON", "BARNES BRIDGE", "EASTFIELD",
+           "CREEK CROSSING", "FLORENCE", "HICKORY TREE", "NEWSOM", "ASH", "DAVIS", "WALNUT", "ELM", "CEDAR", "PECAN", "MAIN", "BROAD",
+           "SUNNYVALE", "KIMBROUGH", "FRANKLIN"]
+STREET_TYPES = [("STREET", "ST"), ("AVENUE", "AVE"), ("DRIVE", "DR"), ("ROAD", "RD"), ("LANE", "LN"),
+                ("BOULEVARD", "BLVD"), ("COURT", "CT"), ("PARKWAY", "PKWY")]
+DIRECTIONS = [("", ""), ("NORTH", "N"), ("SOUTH", "S"), ("EAST", "E"), ("WEST", "W")]
+DAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
+EXCLUDED = 0.05
+QUERY_MIX = {"full": 0.45, "abbrev": 0.25, "partial": 0.2, "misspelt": 0.1}
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def syntheticZones(grid, size=2000.0):
+    """
+    Return a grid of square collection zones.
+
+    :param grid: INT the number of zones along each side.
+    :param size: DOUBLE the side of each zone, in feet.
+    :return: LIST the clockwise outer ring of every zone, as a (4, 2) array.
+    :return: LIST a dict of DAY, ROUTE, GCDAREA and RCDAREA for every zone.
+    """
+    rings, attributes = [], []
+    x0, y0 = ORIGIN[0] - grid * size / 2.0, ORIGIN[1] - grid * size / 2.0
+    for row in range(grid):
+        for col in range(grid):
+            x, y = x0 + col * size, y0 + row * size
+            rings.append(np.array([[x, y], [x, y + size], [x + size, y + size], [x + size, y]]))
+            zone = row * grid + col
+            attributes.append({"DAY": DAYS[zone % len(DAYS)], "ROUTE": "R{0:03d}".format(zone),
+                               "GCDAREA": "G{0}".format(zone % 7), "RCDAREA": "AB"[(zone // len(DAYS)) % 2]})
+    return rings, attributes
+
+
+def syntheticAddresses(count, grid, size=2000.0, seed=0):
+    """
+    Return address points scattered over the zone grid.
+
+    :param count: INT the number of address points.
+    :param grid: INT the number of zones along each side of the grid they fall in.
+    :param size: DOUBLE the side of each zone, in feet.
+    :param seed: INT the seed of the random generator.
+    :return: ARRAY an (n, 2) array of the points.
+    :return: LIST a dict of ADDRESS, MUNIS_CLAS and MESQ_CLASS for every point.
+    """
+    random = np.random.RandomState(seed)
+    extent = grid * size
+    xy = np.column_stack([ORIGIN[0] - extent / 2.0 + random.random_sample(count) * extent,
+                          ORIGIN[1] - extent / 2.0 + random.random_sample(count) * extent])
+
+    streets = random.randint(0, len(STREETS), count)
+    types = random.randint(0, len(STREET_TYPES), count)
+    directions = random.randint(0, len(DIRECTIONS), count)
+    numbers = random.randint(100, 10000, count)
+    excluded = random.random_sample(count) < EXCLUDED
+
+    attributes = []
+    for i in range(count):
+        words = [str(numbers[i]), DIRECTIONS[directions[i]][0], STREETS[streets[i]], STREET_TYPES[types[i]][0]]
+        attributes.append({"ADDRESS": " ".join(word for word in words if word),
+                           "MUNIS_CLAS": "UTILITY_ADDRESS" if excluded[i] else "RESIDENTIAL",
+                           "MESQ_CLASS": "RESIDENTIAL"})
+    return xy, attributes
+
+
+def abbreviate(address):
+    """
+    Return an address with its street type and direction abbreviated, the way most people type it.
+    """
+    words = address.split()
+    for full, short in STREET_TYPES + DIRECTIONS:
+        words = [short if full and word == full else word for word in words]
+    return " ".join(words)
+
+
+def queryStream(addresses, count, seed=0, zipf=1.2):
+    """
+    Return a stream of address queries with realistic repeats and partial strings.
+
+    :param addresses: LIST the stored addresses to ask about.
+    :param count: INT the number of queries.
+    :param seed: INT the seed of the random generator.
+    :param zipf: DOUBLE the exponent of the Zipf distribution the addresses are picked with. Higher asks about fewer
+        addresses more often.
+    :return: LIST of (kind, query) in the order they are asked.
+    """
+    random = np.random.RandomState(seed)
+    order = random.permutation(len(addresses))
+    picks = order[np.minimum(random.zipf(zipf, count) - 1, len(addresses) - 1)]
+    kinds = sorted(QUERY_MIX)
+    chosen = random.choice(len(kinds), count, p=[QUERY_MIX[kind] for kind in kinds])
+    cases = random.randint(0, 3, count)
+
+    queries = []
+    for pick, k, case in zip(picks, chosen, cases):
+        address, kind = addresses[pick], kinds[k]
+        if kind == "abbrev":
+            query = abbreviate(address)
+        elif kind == "partial":
+            query = address[:address.index(" ") + 1 + int(random.randint(3, 9))]
+        elif kind == "misspelt":
+            i = 1 + int(random.randint(0, max(1, len(address) - 2)))
+            query = address[:i - 1] + address[i:i + 1] + address[i - 1:i] + address[i + 1:]
+        else:
+            query = address
+        queries.append((kind, [query, query.lower(), query.title()][case]))
+    return queries
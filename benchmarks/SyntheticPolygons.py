@@ -0,0 +1,126 @@
+"""
+SyntheticPolygons.py: Reproducible synthetic polygons for the benchmarks.
+
+Every shape is built from a seeded random generator, so the same shape, vertex count and seed always give the same
+polygon. Rings follow the arcpy convention of outer rings winding clockwise and holes winding counter-clockwise, and
+the coordinates sit around a State Plane sized origin so the benchmarks see the same large numbers real data has.
+
+    convex    - an ellipse.
+    concave   - a star whose points alternate between the outer and inner radius, so almost every vertex is a notch.
+    holes     - a round outer ring with up to four round holes.
+    multipart - up to four concave parts side by side, in one feature.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import numpy as np
+
+
+# ORIGIN: TUPLE the center of every shape, in feet.
+# SCALE: DOUBLE the radius of every shape, in feet.
+ORIGIN = (2530000.0, 7000000.0)
+SCALE = 5000.0
+SHAPES = ("convex", "concave", "holes", "multipart")
+
+
+########################################################################################################################
+#
+#                                                  FUNCTIONS
+#
+########################################################################################################################
+
+
+def ellipseRing(n, center, radius, random, clockwise=True, jitter=0.0):
+    """
+    Return the vertices of a ring around an ellipse.
+
+    :param n: INT the number of vertices.
+    :param center: TUPLE the (x, y) center.
+    :param radius: TUPLE the (x, y) radii.
+    :param random: RANDOMSTATE the generator used for the jitter.
+    :param clockwise: BOOLEAN true for an outer ring, false for a hole.
+    :param jitter: DOUBLE how far each vertex may move in and out, as a fraction of the radius.
+    :return: ARRAY an (n, 2) array of vertices.
+    """
+    theta = np.linspace(0.0, 2.0 * np.pi, n, endpoint=False)
+    if clockwise:
+        theta = -theta
+    r = 1.0 + jitter * (random.random_sample(n) - 0.5)
+    return np.column_stack([center[0] + radius[0] * r * np.cos(theta), center[1] + radius[1] * r * np.sin(theta)])
+
+
+def starRing(n, center, radius, random, inner=0.25):
+    """
+    Return the vertices of a clockwise star with n points alternating between radius and inner * radius.
+
+    :param n: INT the number of vertices.
+    :param center: TUPLE the (x, y) center.
+    :param radius: DOUBLE the outer radius.
+    :param random: RANDOMSTATE the generator used to vary the points.
+    :param inner: DOUBLE the inner radius as a fraction of radius.
+    :return: ARRAY an (n, 2) array of vertices.
+    """
+    theta = -np.linspace(0.0, 2.0 * np.pi, n, endpoint=False)
+    r = np.where(np.arange(n) % 2, inner, 1.0) * (0.8 + 0.4 * random.random_sample(n))
+    return np.column_stack([center[0] + radius * r * np.cos(theta), center[1] + radius * r * np.sin(theta)])
+
+
+def syntheticPolygon(shape, vertices, seed=0):
+    """
+    Return the parts of a synthetic polygon.
+
+    :param shape: STRING one of SHAPES.
+    :param vertices: INT the total number of vertices across every ring. Very small counts are rounded up so every ring
+        has at least three.
+    :param seed: INT the seed of the random generator.
+    :return: LIST a list of parts, each a list of (n, 2) ring arrays with the outer ring first.
+    """
+    random = np.random.RandomState(seed)
+    x0, y0 = ORIGIN
+
+    if shape == "convex":
+        return [[ellipseRing(max(vertices, 3), ORIGIN, (SCALE * 1.6, SCALE), random, jitter=0.0)]]
+
+    if shape == "concave":
+        return [[starRing(max(vertices, 4), ORIGIN, SCALE, random)]]
+
+    if shape == "holes":
+        holes = max(1, min(4, vertices // 8))
+        hole_vertices = max(3, vertices // (2 * holes))
+        outer = ellipseRing(max(3, vertices - holes * hole_vertices), ORIGIN, (SCALE, SCALE), random, jitter=0.02)
+        rings = [outer]
+        for k in range(holes):
+            cx = x0 + SCALE * 0.45 * (1 if k % 2 else -1)
+            cy = y0 + SCALE * 0.45 * (1 if k // 2 else -1)
+            rings.append(ellipseRing(hole_vertices, (cx, cy), (SCALE * 0.2, SCALE * 0.2), random, clockwise=False))
+        return [rings]
+
+    if shape == "multipart":
+        count = max(1, min(4, vertices // 5))
+        per_part = max(4, vertices // count)
+        parts = []
+        for k in range(count):
+            center = (x0 + SCALE * 2.6 * (k - (count - 1) / 2.0), y0 + SCALE * 0.3 * (k % 2))
+            parts.append([starRing(per_part, center, SCALE, random, inner=0.4)])
+        return parts
+
+    raise ValueError("Unknown shape {0}, expected one of {1}".format(shape, ", ".join(SHAPES)))
+
+
+def polygonArea(parts):
+    """
+    Return the area of a synthetic polygon from the shoelace formula.
+
+    :param parts: LIST the parts returned by syntheticPolygon.
+    :return: DOUBLE the area.
+    """
+    area = 0.0
+    for rings in parts:
+        for ring in rings:
+            x, y = ring[:, 0] - ORIGIN[0], ring[:, 1] - ORIGIN[1]
+            area -= 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+    return float(area)
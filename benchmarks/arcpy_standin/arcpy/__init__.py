@@ -0,0 +1,726 @@
+"""
+arcpy stand-in: A small in-memory replacement for the parts of arcpy the benchmarks use.
+
+The benchmarks have to run headless on a Linux box without ArcGIS, so this package is put first on sys.path in place
+of arcpy. Feature classes are held in a dictionary keyed by path and nothing is written to disk. Geometries keep their
+rings as NumPy arrays and the overlay tools clip them with the Sutherland-Hodgman algorithm, which is exact for the
+convex strips and rectangles the tools in this repository cut with.
+
+It is not a general GIS. Only the tools, cursors and geometry members the scripts call are implemented, and only as far
+as the scripts use them:
+
+    * Clip_analysis and Geometry.intersect clip against convex polygons only.
+    * Dissolve_management merges every feature into one without removing shared boundaries, which gives the right area
+      as long as the features do not overlap.
+    * FeatureToPolygon_management expects one closed boundary line and straight cut lines that cross it, the way
+      bisectExtent and partitionExtent draw them.
+    * Cursors only evaluate where clauses made of IN, NOT IN, =, <> and LIKE conditions joined by AND.
+
+Anything else raises NotImplementedError, so a benchmark never silently measures a tool that does the wrong thing.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import copy
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+
+########################################################################################################################
+#
+#                                                  STAND-IN STATE
+#
+########################################################################################################################
+
+# parameters: LIST the values returned by GetParameterAsText, set by the benchmark before it runs a script.
+# outputs: DICT the values passed to SetParameterAsText, keyed by index.
+# messages: LIST every (severity, message) passed to AddMessage, AddWarning and AddError.
+# echo: BOOLEAN when true, messages are also printed to stderr.
+# feature_classes: DICT every feature class, keyed by its normalized path.
+
+parameters = []
+outputs = {}
+messages = []
+echo = False
+feature_classes = {}
+
+
+class ExecuteError(Exception):
+    pass
+
+
+class _Env(object):
+    """
+    The geoprocessing environment. The scratch workspaces point at a real temporary folder so that tools which write
+    their own files, such as caches and telemetry, still have somewhere to put them.
+    """
+
+    def __init__(self):
+        self.workspace = None
+        self.overwriteOutput = True
+        self.scratchFolder = tempfile.mkdtemp(prefix="arcpy_standin_")
+        self.scratchGDB = os.path.join(self.scratchFolder, "scratch.gdb")
+
+
+env = _Env()
+
+
+def _key(path):
+    return os.path.normcase(os.path.normpath(str(path))).replace("\\", "/")
+
+
+def reset(scratch_folder=None):
+    """
+    Clear every feature class, parameter and message, ready for the next run.
+
+    :param scratch_folder: STRING optional folder to use as the scratch folder.
+    :return: VOID
+    """
+    del parameters[:]
+    outputs.clear()
+    del messages[:]
+    feature_classes.clear()
+    env.workspace = None
+    if scratch_folder:
+        env.scratchFolder = scratch_folder
+        env.scratchGDB = os.path.join(scratch_folder, "scratch.gdb")
+
+
+########################################################################################################################
+#
+#                                                  GEOMETRY
+#
+########################################################################################################################
+
+
+class SpatialReference(object):
+
+    def __init__(self, item=None):
+        self.factoryCode = item if isinstance(item, int) else 0
+        self.name = str(item) if item is not None else "Unknown"
+        self.type = "Geographic" if item in (4326, 4269) else "Projected"
+
+    def exportToString(self):
+        return "PROJCS['{0}']".format(self.name)
+
+
+class Extent(object):
+
+    def __init__(self, XMin=np.nan, YMin=np.nan, XMax=np.nan, YMax=np.nan):
+        self.XMin, self.YMin, self.XMax, self.YMax = XMin, YMin, XMax, YMax
+        self.width = XMax - XMin
+        self.height = YMax - YMin
+
+
+class Point(object):
+
+    def __init__(self, X=0.0, Y=0.0, Z=None, M=None, ID=None):
+        self.X = X
+        self.Y = Y
+        self.Z = Z
+        self.M = M
+        self.ID = ID
+
+
+class Array(object):
+    """
+    A list of Points, or a list of Arrays for multipart geometries. None separates rings within a part.
+    """
+
+    def __init__(self, items=None):
+        self._items = list(items) if items is not None else []
+
+    def add(self, item):
+        self._items.append(item)
+
+    def append(self, item):
+        self._items.append(item)
+
+    def removeAll(self):
+        self._items = []
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    @property
+    def count(self):
+        return len(self._items)
+
+
+class _Part(object):
+    """
+    One part of a geometry. Iterates Points like arcpy, with every ring closed and None between rings.
+    """
+
+    def __init__(self, rings, closed):
+        self.rings = rings
+        self.closed = closed
+
+    def __iter__(self):
+        for i, ring in enumerate(self.rings):
+            if i:
+                yield None
+            for x, y in ring:
+                yield Point(float(x), float(y))
+            if self.closed and len(ring):
+                yield Point(float(ring[0][0]), float(ring[0][1]))
+
+    def __len__(self):
+        return sum(len(ring) + (1 if self.closed else 0) for ring in self.rings) + len(self.rings) - 1
+
+
+def _partsFromArray(array, closed):
+    """
+    Turn an Array of Points, or an Array of Arrays, into a list of parts, each a list of (n, 2) ring arrays.
+    """
+    items = list(array)
+    if items and isinstance(items[0], (Array, list, tuple)) and not isinstance(items[0], Point):
+        groups = items
+    else:
+        groups = [items]
+
+    parts = []
+    for group in groups:
+        rings = []
+        ring = []
+        for pnt in list(group) + [None]:
+            if pnt is None:
+                if ring:
+                    coords = np.array(ring, dtype=np.float64)
+                    if closed and len(coords) > 1 and np.array_equal(coords[0], coords[-1]):
+                        coords = coords[:-1]
+                    rings.append(coords)
+                ring = []
+            else:
+                ring.append((pnt.X, pnt.Y))
+        if rings:
+            parts.append(rings)
+    return parts
+
+
+def _ringSignedArea(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def _ringMoments(ring):
+    """
+    Return the signed area and first moments of a ring, used for the centroid.
+    """
+    x, y = ring[:, 0], ring[:, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    return 0.5 * float(np.sum(cross)), float(np.sum((x + x1) * cross)) / 6.0, float(np.sum((y + y1) * cross)) / 6.0
+
+
+def _clipRingHalfPlane(ring, a, b, c):
+    """
+    Clip a ring to the half plane a * x + b * y <= c with one vectorized Sutherland-Hodgman pass.
+    """
+    if not len(ring):
+        return ring
+
+    nxt = np.roll(ring, -1, axis=0)
+    d0 = ring[:, 0] * a + ring[:, 1] * b - c
+    d1 = nxt[:, 0] * a + nxt[:, 1] * b - c
+    in0, in1 = d0 <= 0, d1 <= 0
+
+    crossing = in0 != in1
+    t = np.zeros(len(ring))
+    t[crossing] = d0[crossing] / (d0[crossing] - d1[crossing])
+    cross_pt = ring + (nxt - ring) * t[:, np.newaxis]
+
+    # Every edge adds its crossing point when it crosses the line and its end point when that is inside.
+    count = crossing.astype(np.intp) + in1.astype(np.intp)
+    out = np.empty((int(count.sum()), 2))
+    start = np.cumsum(count) - count
+    out[start[crossing]] = cross_pt[crossing]
+    out[start[in1] + crossing[in1]] = nxt[in1]
+    return out
+
+
+def _convexHalfPlanes(ring):
+    """
+    Return the (a, b, c) half planes of a convex ring, whichever way it winds.
+    """
+    ring = ring[np.r_[True, np.any(np.diff(ring, axis=0) != 0, axis=1)]]
+    orientation = 1.0 if _ringSignedArea(ring) > 0 else -1.0
+    nxt = np.roll(ring, -1, axis=0)
+    planes = []
+    for (x0, y0), (x1, y1) in zip(ring, nxt):
+        if x0 == x1 and y0 == y1:
+            continue
+        # The inside of a counter-clockwise ring is on the left of every edge.
+        a, b = (y1 - y0) * orientation, -(x1 - x0) * orientation
+        planes.append((a, b, a * x0 + b * y0))
+    return planes
+
+
+def _isConvex(ring):
+    ring = ring[np.r_[True, np.any(np.diff(ring, axis=0) != 0, axis=1)]]
+    if len(ring) < 3:
+        return False
+    d1 = np.roll(ring, -1, axis=0) - ring
+    d2 = np.roll(d1, -1, axis=0)
+    cross = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    scale = np.abs(d1).max() * np.abs(d2).max()
+    cross = cross[np.abs(cross) > scale * 1e-12]
+    return bool(np.all(cross > 0) or np.all(cross < 0))
+
+
+class Geometry(object):
+
+    _closed = False
+    type = None
+
+    def __init__(self, inputs=None, spatial_reference=None, has_z=False, has_m=False):
+        self.spatialReference = spatial_reference
+        self._parts = _partsFromArray(inputs, self._closed) if inputs is not None else []
+
+    @classmethod
+    def _fromParts(cls, parts, spatial_reference=None):
+        geometry = cls(None, spatial_reference)
+        geometry._parts = parts
+        return geometry
+
+    def __iter__(self):
+        for rings in self._parts:
+            yield _Part(rings, self._closed)
+
+    def getPart(self, index=None):
+        if index is None:
+            return list(self)
+        return _Part(self._parts[index], self._closed)
+
+    @property
+    def partCount(self):
+        return len(self._parts)
+
+    @property
+    def pointCount(self):
+        return sum(len(ring) for rings in self._parts for ring in rings)
+
+    @property
+    def extent(self):
+        rings = [ring for rings in self._parts for ring in rings if len(ring)]
+        if not rings:
+            return Extent()
+        coords = np.vstack(rings)
+        return Extent(float(coords[:, 0].min()), float(coords[:, 1].min()),
+                      float(coords[:, 0].max()), float(coords[:, 1].max()))
+
+    @property
+    def firstPoint(self):
+        ring = self._parts[0][0]
+        return Point(float(ring[0][0]), float(ring[0][1]))
+
+    @property
+    def lastPoint(self):
+        ring = self._parts[-1][-1]
+        return Point(float(ring[-1][0]), float(ring[-1][1]))
+
+
+class Polyline(Geometry):
+
+    type = "polyline"
+
+    @property
+    def length(self):
+        return sum(float(np.sum(np.hypot(*np.diff(ring, axis=0).T))) for rings in self._parts for ring in rings)
+
+
+class Polygon(Geometry):
+    """
+    A polygon with outer rings winding clockwise and holes winding counter-clockwise, like arcpy.
+    """
+
+    _closed = True
+    type = "polygon"
+
+    @property
+    def area(self):
+        return -sum(_ringSignedArea(ring) for rings in self._parts for ring in rings if len(ring) > 2)
+
+    @property
+    def centroid(self):
+        area = mx = my = 0.0
+        for rings in self._parts:
+            for ring in rings:
+                if len(ring) > 2:
+                    a, x, y = _ringMoments(ring)
+                    area, mx, my = area + a, mx + x, my + y
+        if area == 0:
+            extent = self.extent
+            return Point((extent.XMin + extent.XMax) / 2.0, (extent.YMin + extent.YMax) / 2.0)
+        return Point(mx / area, my / area)
+
+    @property
+    def trueCentroid(self):
+        return self.centroid
+
+    @property
+    def labelPoint(self):
+        return self.centroid
+
+    def clipToConvex(self, ring):
+        """
+        Return the part of this polygon inside a convex ring.
+        """
+        planes = _convexHalfPlanes(ring)
+        parts = []
+        for rings in self._parts:
+            clipped = []
+            for part_ring in rings:
+                for a, b, c in planes:
+                    part_ring = _clipRingHalfPlane(part_ring, a, b, c)
+                if len(part_ring) > 2 and _ringSignedArea(part_ring) != 0:
+                    clipped.append(part_ring)
+            if clipped:
+                parts.append(clipped)
+        return Polygon._fromParts(parts, self.spatialReference)
+
+    def intersect(self, other, dimension):
+        if dimension != 4 or not isinstance(other, Polygon):
+            raise NotImplementedError("The arcpy stand-in only intersects polygons with polygons")
+        if other.partCount == 1 and len(other._parts[0]) == 1 and _isConvex(other._parts[0][0]):
+            return self.clipToConvex(other._parts[0][0])
+        if self.partCount == 1 and len(self._parts[0]) == 1 and _isConvex(self._parts[0][0]):
+            return other.clipToConvex(self._parts[0][0])
+        raise NotImplementedError("The arcpy stand-in only intersects polygons with a convex polygon")
+
+    def disjoint(self, other):
+        # The stand-in only compares extents, so shapes that are apart but whose extents meet are not disjoint.
+        a, b = self.extent, other.extent
+        return a.XMax < b.XMin or b.XMax < a.XMin or a.YMax < b.YMin or b.YMax < a.YMin
+
+    def touches(self, other):
+        return not self.disjoint(other) and self.intersect(other, 4).area == 0
+
+    def contains(self, other):
+        pnt = other.centroid if isinstance(other, Polygon) else other.firstPoint if isinstance(other, Geometry) \
+            else other
+        inside = False
+        for rings in self._parts:
+            for ring in rings:
+                x, y = ring[:, 0], ring[:, 1]
+                x1, y1 = np.roll(x, -1), np.roll(y, -1)
+                crosses = (y > pnt.Y) != (y1 > pnt.Y)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    x_at = x + (pnt.Y - y) * (x1 - x) / (y1 - y)
+                inside ^= bool(np.count_nonzero(crosses & (pnt.X < x_at)) % 2)
+        return inside
+
+
+class PointGeometry(Geometry):
+
+    type = "point"
+
+    def __init__(self, inputs=None, spatial_reference=None, has_z=False, has_m=False):
+        self.spatialReference = spatial_reference
+        self._parts = [[np.array([[inputs.X, inputs.Y]], dtype=np.float64)]] if inputs is not None else []
+
+    @property
+    def centroid(self):
+        return self.firstPoint
+
+
+########################################################################################################################
+#
+#                                                  FEATURE CLASSES
+#
+########################################################################################################################
+
+
+class Field(object):
+
+    def __init__(self, name, type="String", length=None, aliasName=None, precision=None, scale=None, domain=None):
+        self.name = name
+        self.type = type
+        self.length = length
+        self.aliasName = aliasName or name
+        self.precision = precision
+        self.scale = scale
+        self.domain = domain
+
+
+class FeatureClass(object):
+    """
+    A feature class held in memory. Every row is a dict of field values with its geometry under "SHAPE@" and its
+    object id under "OID@".
+    """
+
+    def __init__(self, path, shape_type, spatial_reference=None, fields=None):
+        self.path = path
+        self.shapeType = shape_type
+        self.spatialReference = spatial_reference or SpatialReference()
+        self.fields = [Field("OBJECTID", "OID"), Field("Shape", "Geometry")] + list(fields or [])
+        self.rows = []
+        self.next_oid = 1
+
+    def addRow(self, values):
+        row = dict(values)
+        row["OID@"] = self.next_oid
+        self.next_oid += 1
+        self.rows.append(row)
+        return row["OID@"]
+
+    @property
+    def extent(self):
+        extents = [row["SHAPE@"].extent for row in self.rows if row.get("SHAPE@") is not None]
+        if not extents:
+            return Extent()
+        return Extent(min(e.XMin for e in extents), min(e.YMin for e in extents),
+                      max(e.XMax for e in extents), max(e.YMax for e in extents))
+
+
+def registerFeatureClass(path, shape_type, geometries, spatial_reference=None, fields=None, attributes=None):
+    """
+    Add a feature class to the stand-in, as if it already existed on disk.
+
+    :param path: STRING the path scripts will use to open it.
+    :param shape_type: STRING Polygon, Polyline or Point.
+    :param geometries: LIST the geometry of every feature.
+    :param spatial_reference: SPATIAL REFERENCE optional spatial reference.
+    :param fields: LIST optional Field objects.
+    :param attributes: LIST optional dicts of field values, one per geometry.
+    :return: FEATURECLASS the new feature class.
+    """
+    fc = FeatureClass(path, shape_type, spatial_reference, fields)
+    for i, geometry in enumerate(geometries):
+        row = dict(attributes[i]) if attributes else {}
+        row["SHAPE@"] = geometry
+        fc.addRow(row)
+    feature_classes[_key(path)] = fc
+    return fc
+
+
+def getFeatureClass(path):
+    """
+    Return the feature class stored at a path.
+
+    :param path: STRING the path of the feature class.
+    :return: FEATURECLASS the feature class.
+    """
+    try:
+        return feature_classes[_key(path)]
+    except KeyError:
+        raise ExecuteError("ERROR 000732: Dataset {0} does not exist or is not supported".format(path))
+
+
+def Exists(path):
+    return _key(path) in feature_classes
+
+
+class _Describe(object):
+
+    def __init__(self, fc):
+        self.catalogPath = fc.path
+        self.dataType = "FeatureClass"
+        self.shapeType = fc.shapeType
+        self.spatialReference = fc.spatialReference
+        self.fields = fc.fields
+        self.OIDFieldName = "OBJECTID"
+        self.shapeFieldName = "Shape"
+        self._fc = fc
+
+    @property
+    def extent(self):
+        # Worked out only when asked for, because Describe is called far more often than the extent is read.
+        return self._fc.extent
+
+
+def Describe(path):
+    return _Describe(getFeatureClass(path))
+
+
+def AddFieldDelimiters(datasource, field):
+    return '"{0}"'.format(field)
+
+
+def ListFields(path):
+    return list(getFeatureClass(path).fields)
+
+
+########################################################################################################################
+#
+#                                                  MESSAGES AND PARAMETERS
+#
+########################################################################################################################
+
+
+def _message(severity, message):
+    messages.append((severity, message))
+    if echo:
+        sys.stderr.write("{0}: {1}\n".format(severity, message))
+
+
+def AddMessage(message):
+    _message("INFO", message)
+
+
+def AddWarning(message):
+    _message("WARNING", message)
+
+
+def AddError(message):
+    _message("ERROR", message)
+
+
+def GetArgumentCount():
+    return len(parameters)
+
+
+def GetParameterAsText(index):
+    if index < len(parameters) and parameters[index] is not None:
+        return str(parameters[index])
+    return ""
+
+
+def GetParameter(index):
+    return parameters[index] if index < len(parameters) else None
+
+
+def SetParameterAsText(index, text):
+    outputs[index] = text
+
+
+def SetParameter(index, value):
+    outputs[index] = value
+
+
+########################################################################################################################
+#
+#                                                  TOOLS
+#
+########################################################################################################################
+
+
+def CreateFeatureclass_management(out_path, out_name, geometry_type=None, template=None, has_m=None, has_z=None,
+                                  spatial_reference=None):
+    path = os.path.join(out_path, out_name)
+    fields = [copy.copy(f) for f in getFeatureClass(template).fields[2:]] if template else None
+    feature_classes[_key(path)] = FeatureClass(path, (geometry_type or "POLYGON").capitalize(), spatial_reference,
+                                               fields)
+    return path
+
+
+def AddField_management(in_table, field_name, field_type, field_precision=None, field_scale=None, field_length=None,
+                        field_alias=None, field_is_nullable=None, field_is_required=None, field_domain=None):
+    fc = getFeatureClass(in_table)
+    fc.fields.append(Field(field_name, field_type, field_length, field_alias, field_precision, field_scale,
+                           field_domain))
+    return in_table
+
+
+def CopyFeatures_management(in_features, out_feature_class):
+    source = getFeatureClass(in_features)
+    target = FeatureClass(out_feature_class, source.shapeType, source.spatialReference,
+                          [copy.copy(f) for f in source.fields[2:]])
+    for row in source.rows:
+        target.addRow(dict((k, v) for k, v in row.items() if k != "OID@"))
+    feature_classes[_key(out_feature_class)] = target
+    return out_feature_class
+
+
+def Dissolve_management(in_features, out_feature_class, *args, **kwargs):
+    # Merges the parts of every feature into one feature. Shared boundaries are kept, so this is only right for
+    # features that do not overlap.
+    source = getFeatureClass(in_features)
+    parts = [rings for row in source.rows for rings in row["SHAPE@"]._parts]
+    target = FeatureClass(out_feature_class, source.shapeType, source.spatialReference)
+    target.addRow({"SHAPE@": Polygon._fromParts(parts, source.spatialReference)})
+    feature_classes[_key(out_feature_class)] = target
+    return out_feature_class
+
+
+def FeatureToPolygon_management(in_features, out_feature_class, *args, **kwargs):
+    # The boundary is the closed line. Every other line is straight and is extended to split the pieces it crosses.
+    source = getFeatureClass(in_features)
+    boundary = None
+    cuts = []
+    for row in source.rows:
+        for rings in row["SHAPE@"]._parts:
+            for ring in rings:
+                ring = ring[np.r_[True, np.any(np.diff(ring, axis=0) != 0, axis=1)]]
+                if len(ring) > 3 and np.array_equal(ring[0], ring[-1]):
+                    boundary = ring[:-1]
+                elif len(ring) >= 2:
+                    cuts.append((ring[0], ring[-1]))
+
+    if boundary is None:
+        raise NotImplementedError("The arcpy stand-in needs a closed boundary line to build polygons")
+
+    pieces = [boundary]
+    for (x0, y0), (x1, y1) in cuts:
+        a, b = y1 - y0, -(x1 - x0)
+        c = a * x0 + b * y0
+        split = []
+        for piece in pieces:
+            for side in (1.0, -1.0):
+                half = _clipRingHalfPlane(piece, a * side, b * side, c * side)
+                if len(half) > 2 and abs(_ringSignedArea(half)) > 0:
+                    split.append(half)
+        pieces = split
+
+    target = FeatureClass(out_feature_class, "Polygon", source.spatialReference)
+    for piece in pieces:
+        # Outer rings wind clockwise.
+        if _ringSignedArea(piece) > 0:
+            piece = piece[::-1]
+        target.addRow({"SHAPE@": Polygon._fromParts([[piece]], source.spatialReference)})
+    feature_classes[_key(out_feature_class)] = target
+    return out_feature_class
+
+
+def Clip_analysis(in_features, clip_features, out_feature_class, cluster_tolerance=None):
+    # Every input feature must be convex. The clip features are clipped to it, which gives the same result.
+    source = getFeatureClass(in_features)
+    clip = getFeatureClass(clip_features)
+    target = FeatureClass(out_feature_class, source.shapeType, source.spatialReference,
+                          [copy.copy(f) for f in source.fields[2:]])
+    for row in source.rows:
+        window = row["SHAPE@"]
+        if window.partCount != 1 or len(window._parts[0]) != 1 or not _isConvex(window._parts[0][0]):
+            raise NotImplementedError("The arcpy stand-in only clips convex input features")
+        parts = []
+        for clip_row in clip.rows:
+            parts.extend(clip_row["SHAPE@"].clipToConvex(window._parts[0][0])._parts)
+        if parts:
+            values = dict((k, v) for k, v in row.items() if k != "OID@")
+            values["SHAPE@"] = Polygon._fromParts(parts, source.spatialReference)
+            target.addRow(values)
+    feature_classes[_key(out_feature_class)] = target
+    return out_feature_class
+
+
+class Result(object):
+
+    def __init__(self, *outputs):
+        self._outputs = [str(output) for output in outputs]
+
+    def getOutput(self, index):
+        return self._outputs[index]
+
+
+def GetCount_management(in_rows):
+    return Result(len(getFeatureClass(in_rows).rows))
+
+
+def Delete_management(in_data, data_type=None):
+    feature_classes.pop(_key(in_data), None)
+
+
+from . import da  # noqa: E402
@@ -0,0 +1,145 @@
+"""
+arcpy.da stand-in: Search, insert and update cursors over the in-memory feature classes of the arcpy stand-in.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Production"
+
+
+import re
+
+import arcpy
+
+
+# _CONDITION: the one condition of a where clause the stand-in evaluates, "FIELD" [NOT] IN (...), =, <> or LIKE.
+_CONDITION = re.compile(r"""^\s*"?(\w+)"?\s+(NOT\s+IN|IN|=|<>|LIKE)\s*(\(.*\)|'[^']*'|-?\d+(?:\.\d+)?)\s*$""", re.IGNORECASE)
+
+
+def _whereFilter(where_clause):
+    """
+    Return a function that tells whether a row matches a where clause.
+
+    Only conditions joined by AND are understood, each a field compared with IN, NOT IN, =, <> or LIKE to quoted
+    strings, or with IN, NOT IN, = or <> to numbers. That is all the tools in this repository write. Anything else
+    raises NotImplementedError.
+    """
+    if not where_clause:
+        return lambda row: True
+
+    tests = []
+    for condition in re.split(r"\s+AND\s+", where_clause.strip(), flags=re.IGNORECASE):
+        match = _CONDITION.match(condition)
+        if not match:
+            raise NotImplementedError("The arcpy stand-in cannot evaluate the where clause {0}".format(where_clause))
+        field, operator, operand = match.group(1), " ".join(match.group(2).upper().split()), match.group(3)
+        values = re.findall(r"'([^']*)'", operand)
+        if "'" not in operand:
+            values = [float(number) if "." in number else int(number)
+                      for number in re.findall(r"-?\d+(?:\.\d+)?", operand)]
+        if operator == "LIKE":
+            pattern = re.compile("^" + ".*".join(re.escape(part) for part in values[0].split("%")) + "$", re.DOTALL)
+            tests.append(lambda row, f=field, p=pattern: p.match(str(_value(row, f) or "")) is not None)
+        elif operator in ("IN", "="):
+            tests.append(lambda row, f=field, v=set(values): _value(row, f) in v)
+        else:
+            tests.append(lambda row, f=field, v=set(values): _value(row, f) not in v)
+    return lambda row: all(test(row) for test in tests)
+
+
+def _value(row, field):
+    """
+    Return the value of a field or geometry token for a row.
+    """
+    geometry = row.get("SHAPE@")
+    if field == "SHAPE@":
+        return geometry
+    if field in ("OID@", "OBJECTID"):
+        return row["OID@"]
+    if field == "SHAPE@AREA":
+        return geometry.area
+    if field == "SHAPE@EXTENT":
+        return None if geometry is None else geometry.extent
+    if field == "SHAPE@LENGTH":
+        return geometry.length
+    if field == "SHAPE@XY":
+        centroid = geometry.centroid
+        return centroid.X, centroid.Y
+    if field == "SHAPE@X":
+        return geometry.centroid.X
+    if field == "SHAPE@Y":
+        return geometry.centroid.Y
+    return row.get(field)
+
+
+class _Cursor(object):
+
+    def __init__(self, in_table, field_names):
+        self.fc = arcpy.getFeatureClass(in_table)
+        self.fields = [field_names] if isinstance(field_names, str) else list(field_names)
+        if self.fields == ["*"]:
+            self.fields = ["OID@", "SHAPE@"] + [f.name for f in self.fc.fields[2:]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SearchCursor(_Cursor):
+
+    def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None, explode_to_points=False,
+                 sql_clause=(None, None)):
+        _Cursor.__init__(self, in_table, field_names)
+        self._match = _whereFilter(where_clause)
+        self._rows = iter([row for row in self.fc.rows if self._match(row)])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._rows)
+        return tuple(_value(row, field) for field in self.fields)
+
+    next = __next__
+
+    def reset(self):
+        self._rows = iter([row for row in self.fc.rows if self._match(row)])
+
+
+class InsertCursor(_Cursor):
+
+    def insertRow(self, values):
+        row = {}
+        for field, value in zip(self.fields, values):
+            row["SHAPE@" if field.startswith("SHAPE@") else field] = value
+        return self.fc.addRow(row)
+
+
+class UpdateCursor(_Cursor):
+
+    def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None, explode_to_points=False,
+                 sql_clause=(None, None)):
+        _Cursor.__init__(self, in_table, field_names)
+        self._rows = iter([row for row in self.fc.rows if _whereFilter(where_clause)(row)])
+        self._row = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._row = next(self._rows)
+        return [_value(self._row, field) for field in self.fields]
+
+    next = __next__
+
+    def updateRow(self, values):
+        for field, value in zip(self.fields, values):
+            if field in ("OID@", "OBJECTID", "SHAPE@AREA", "SHAPE@LENGTH", "SHAPE@XY", "SHAPE@X", "SHAPE@Y"):
+                continue
+            self._row[field] = value
+
+    def deleteRow(self):
+        self.fc.rows.remove(self._row)
@@ -0,0 +1,26 @@
+"""
+conftest.py: Puts the tool folders on sys.path, so the tests import the NumPy modules of the tools by name, the way the
+tool scripts do.
+
+    python -m pytest -q
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import os
+import sys
+
+# ROOT: STRING the root of the repository.
+# TOOL_FOLDERS: LIST the folders that hold the modules under test. Common comes first, so a shared module is imported
+#   from its source rather than from one of its copies.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOL_FOLDERS = ["Common", "Editing", "EmergencyManagement", "SolidWaste"]
+
+for folder in reversed(TOOL_FOLDERS):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,89 @@
+"""
+test_AddressIndex.py: Checks the address search of SolidWaste/AddressIndex.py against a scan of every address, the way
+the "ADDRESS" LIKE '%...%' query it replaces finds them.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import numpy as np
+import pytest
+
+import AddressIndex
+
+# ADDRESSES: LIST the addresses of the test index, as they are written in the address layer.
+ADDRESSES = [
+    "123 N GALLOWAY AVE", "125 N GALLOWAY AVE", "123 S GALLOWAY AVE", "4600 MAIN SPRINGS DR", "460 MAIN ST",
+    "8923 E DAVIS RD", "759 FRANKLIN PKWY", "2467 S MAIN AVE", "1515 MILITARY PKWY", "100 TOWN EAST BLVD"
+]
+
+
+def addressIndex():
+    """
+    Return the index of ADDRESSES, with the number of every address as its only attribute.
+    """
+    return AddressIndex.buildAddressIndex(ADDRESSES, [(float(i), 0.0) for i in range(len(ADDRESSES))],
+                                          [{"name": "NUMBER", "type": "Integer", "length": 4}],
+                                          [[i] for i in range(len(ADDRESSES))], "fingerprint")
+
+
+def scan(text):
+    """
+    Return the addresses that hold a query, by checking every address in turn.
+    """
+    queries = [AddressIndex.normalizeAddress(text), AddressIndex.normalizeAddress(text, partial=True)]
+    return [i for i, address in enumerate(ADDRESSES)
+            if any(query in AddressIndex.normalizeAddress(address) for query in queries)]
+
+
+def test_normalize_address():
+    assert AddressIndex.normalizeAddress("123 N. Galloway Ave") == "123 NORTH GALLOWAY AVENUE"
+    assert AddressIndex.normalizeAddress("123  north galloway avenue") == "123 NORTH GALLOWAY AVENUE"
+    assert AddressIndex.normalizeAddress("main s", partial=True) == "MAIN S"
+
+
+@pytest.mark.parametrize("text", ["123 N. Galloway Ave", "galloway", "GALLOWAY AVE", "main s", "MAIN ST", "pkwy",
+                                  "e davis", "46", "15", "1", "TOWN EAST BOULEVARD", "MAIN AVENUE"])
+def test_search_matches_a_scan(text):
+    matches, is_fuzzy = AddressIndex.searchAddresses(addressIndex(), text)
+    assert (matches, is_fuzzy) == (scan(text), False)
+    assert matches
+
+
+def test_search_known_answers():
+    index = addressIndex()
+    assert AddressIndex.searchAddresses(index, "123 n galloway")[0] == [0]
+    assert AddressIndex.searchAddresses(index, "main s")[0] == [3, 4]
+    assert AddressIndex.searchAddresses(index, "Main Springs")[0] == [3]
+
+
+def test_misspelled_address_falls_back_to_fuzzy_matches():
+    index = addressIndex()
+    matches, is_fuzzy = AddressIndex.searchAddresses(index, "8923 east davs raod")
+    assert is_fuzzy
+    assert matches[0] == 5
+
+    assert AddressIndex.searchAddresses(index, "8923 east davs raod", fuzzy=False) == ([], False)
+    assert AddressIndex.searchAddresses(index, "zzzz qqqq") == ([], False)
+
+
+def test_exact_matches():
+    index = addressIndex()
+    assert AddressIndex.exactMatches(index, "123 North Galloway Avenue") == [0]
+    assert AddressIndex.exactMatches(index, "123 GALLOWAY AVE") == []
+
+
+def test_saved_index_answers_the_same(tmp_path):
+    index = addressIndex()
+    path = str(tmp_path / "addresses.npz")
+    AddressIndex.saveAddressIndex(index, path)
+    loaded = AddressIndex.loadAddressIndex(path)
+
+    assert loaded["fingerprint"] == "fingerprint"
+    assert loaded["attributes"] == index["attributes"]
+    assert np.array_equal(loaded["xy"], index["xy"])
+    for text in ["galloway", "main s", "8923 east davs raod", "zzzz"]:
+        assert AddressIndex.searchAddresses(loaded, text) == AddressIndex.searchAddresses(index, text)
@@ -0,0 +1,111 @@
+"""
+test_AddressSchedule.py: Checks that an incremental refresh of SolidWaste/AddressSchedule.py gives the same rows as a
+schedule built from nothing, and that it only looks up the addresses it has to.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import numpy as np
+
+import AddressSchedule
+
+# FIELDS: LIST the address field and the zone fields of every row.
+FIELDS = ["ADDRESS", "DAY", "RCDAREA"]
+
+
+def box(x_min, y_min, x_max, y_max):
+    """
+    Return the rings of a rectangle.
+    """
+    return [np.array([(x_min, y_min), (x_min, y_max), (x_max, y_max), (x_max, y_min)], dtype=np.float64)]
+
+
+def cityData():
+    """
+    Return ten addresses along a street and two collection zones that split it at x = 50.
+    """
+    addresses = dict((oid, (oid * 10.0 - 5.0, 5.0, ["{0} MAIN ST".format(oid * 100)])) for oid in range(1, 11))
+    zones = {1: (box(0, 0, 50, 10), ["MONDAY", "A"]), 2: (box(50, 0, 100, 10), ["THURSDAY", "B"])}
+    return addresses, zones
+
+
+def test_first_refresh_joins_every_address():
+    addresses, zones = cityData()
+    schedule, counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+
+    assert counts == {"added": 10, "changed": 0, "deleted": 0, "zones_changed": 2, "evaluated": 10}
+    rows = AddressSchedule.scheduleRows(schedule)
+    assert rows[0] == [1, 1, "100 MAIN ST", "MONDAY", "A"]
+    assert rows[-1] == [10, 2, "1000 MAIN ST", "THURSDAY", "B"]
+    assert [row[1] for row in rows] == [1] * 5 + [2] * 5
+
+
+def test_refresh_without_changes_looks_nothing_up():
+    addresses, zones = cityData()
+    schedule, counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+    schedule, counts = AddressSchedule.refreshSchedule(schedule, addresses, zones, FIELDS, "schema")
+    assert counts == {"added": 0, "changed": 0, "deleted": 0, "zones_changed": 0, "evaluated": 0}
+
+
+def test_incremental_refresh_matches_a_rebuild():
+    addresses, zones = cityData()
+    schedule, counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+
+    # Move address 1 into zone 2, add address 11, delete address 10, and move the boundary so zone 1 takes address 6.
+    addresses[1] = (75.0, 5.0, addresses[1][2])
+    addresses[11] = (20.0, 5.0, ["1100 MAIN ST"])
+    del addresses[10]
+    zones[1] = (box(0, 0, 60, 10), ["MONDAY", "A"])
+    zones[2] = (box(60, 0, 100, 10), ["THURSDAY", "B"])
+    schedule, counts = AddressSchedule.refreshSchedule(schedule, addresses, zones, FIELDS, "schema")
+
+    rebuilt, rebuilt_counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+    assert AddressSchedule.scheduleRows(schedule) == AddressSchedule.scheduleRows(rebuilt)
+    assert counts["added"] == 1 and counts["changed"] == 1 and counts["deleted"] == 1
+    assert [row[:2] for row in AddressSchedule.scheduleRows(schedule)] == \
+        [[1, 2], [2, 1], [3, 1], [4, 1], [5, 1], [6, 1], [7, 2], [8, 2], [9, 2], [11, 1]]
+
+
+def test_changed_zone_values_only_refresh_its_addresses():
+    addresses, zones = cityData()
+    schedule, counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+
+    zones[2] = (zones[2][0], ["FRIDAY", "B"])
+    schedule, counts = AddressSchedule.refreshSchedule(schedule, addresses, zones, FIELDS, "schema")
+    assert counts == {"added": 0, "changed": 0, "deleted": 0, "zones_changed": 1, "evaluated": 5}
+    assert AddressSchedule.scheduleRows(schedule)[5] == [6, 2, "600 MAIN ST", "FRIDAY", "B"]
+
+
+def test_deleted_zone_drops_its_rows():
+    addresses, zones = cityData()
+    schedule, counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+
+    del zones[1]
+    schedule, counts = AddressSchedule.refreshSchedule(schedule, addresses, zones, FIELDS, "schema")
+    assert sorted(schedule["rows"]) == [6, 7, 8, 9, 10]
+
+
+def test_new_schema_rebuilds_the_schedule():
+    addresses, zones = cityData()
+    schedule, counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+    schedule, counts = AddressSchedule.refreshSchedule(schedule, addresses, zones, FIELDS, "other schema")
+    assert counts["evaluated"] == 10
+
+
+def test_saved_schedule_refreshes_incrementally(tmp_path):
+    addresses, zones = cityData()
+    schedule, counts = AddressSchedule.refreshSchedule(None, addresses, zones, FIELDS, "schema")
+    path = str(tmp_path / "schedule.npz")
+    AddressSchedule.saveSchedule(schedule, path)
+
+    loaded = AddressSchedule.loadSchedule(path)
+    assert AddressSchedule.scheduleRows(loaded) == AddressSchedule.scheduleRows(schedule)
+
+    addresses[3] = (3 * 10.0 - 5.0, 5.0, ["300 MAIN STREET"])
+    loaded, counts = AddressSchedule.refreshSchedule(loaded, addresses, zones, FIELDS, "schema")
+    assert counts == {"added": 0, "changed": 1, "deleted": 0, "zones_changed": 0, "evaluated": 1}
+    assert AddressSchedule.scheduleRows(loaded)[2] == [3, 1, "300 MAIN STREET", "MONDAY", "A"]
@@ -0,0 +1,105 @@
+"""
+test_CollectionCalendar.py: Checks the next pickups of SolidWaste/CollectionCalendar.py across Thanksgiving and
+Christmas 2026, and against a day by day walk of the calendar.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import datetime
+import numpy as np
+import pytest
+
+import CollectionCalendar
+
+# HOLIDAYS: ARRAY Thanksgiving, a Thursday, and Christmas, a Friday, 2026.
+# SHIFTS: ARRAY each pushes collection back one day.
+# CYCLES: DICT the recycling cycles of two areas a week apart.
+HOLIDAYS = np.array(["2026-11-26", "2026-12-25"], dtype="datetime64[D]")
+SHIFTS = np.array([1, 1], dtype=np.int64)
+CYCLES = {"A": np.datetime64("2026-01-05", "D"), "B": np.datetime64("2026-01-12", "D")}
+
+
+def dates(*values):
+    """
+    Return datetime64[D] dates from YYYY-MM-DD strings, NaT for None.
+    """
+    return [np.datetime64(value, "D") if value else np.datetime64("NaT") for value in values]
+
+
+def walk(anchor, today, period, holidays, shifts):
+    """
+    Return the next pickup by walking forward from the anchor one regular date at a time, pushing each back by the
+    holidays in its week on or before it.
+    """
+    day = datetime.date(*[int(part) for part in str(anchor).split("-")])
+    start = datetime.date(*[int(part) for part in str(today).split("-")])
+    while day > start - datetime.timedelta(days=period):
+        day -= datetime.timedelta(days=period)
+    while True:
+        monday = day - datetime.timedelta(days=day.weekday())
+        shift = sum(int(s) for h, s in zip(holidays.astype(datetime.date), shifts) if monday <= h <= day)
+        pickup = day + datetime.timedelta(days=shift)
+        if pickup >= start:
+            return np.datetime64(pickup, "D")
+        day += datetime.timedelta(days=period)
+
+
+def test_thanksgiving_week():
+    garbage, recycling = CollectionCalendar.nextPickups(["MONDAY", "Thursday", "fri", "SAT"], ["A", "B", "B", "A"],
+                                                        CYCLES, datetime.date(2026, 11, 23), HOLIDAYS, SHIFTS)
+
+    # Monday is before the holiday. Thursday moves to Friday, Friday to Saturday and Saturday to Sunday.
+    assert garbage.tolist() == [datetime.date(2026, 11, 23), datetime.date(2026, 11, 27), datetime.date(2026, 11, 28),
+                                datetime.date(2026, 11, 29)]
+
+    # Area A collects on Mondays from January 5, area B on Mondays from January 12.
+    assert recycling.tolist() == [datetime.date(2026, 11, 23), datetime.date(2026, 11, 30),
+                                  datetime.date(2026, 11, 30), datetime.date(2026, 11, 23)]
+
+
+def test_shifted_pickup_is_still_next_after_its_regular_day():
+    # On Friday the 27th the Thursday route has not run yet, it runs that day.
+    garbage = CollectionCalendar.nextCollectionDates(CollectionCalendar.weekdayAnchors(["THU"]),
+                                                     np.datetime64("2026-11-27"), 7, HOLIDAYS, SHIFTS)
+    assert garbage.tolist() == [datetime.date(2026, 11, 27)]
+
+    garbage = CollectionCalendar.nextCollectionDates(CollectionCalendar.weekdayAnchors(["THU"]),
+                                                     np.datetime64("2026-11-28"), 7, HOLIDAYS, SHIFTS)
+    assert garbage.tolist() == [datetime.date(2026, 12, 3)]
+
+
+def test_christmas_friday_moves_to_saturday():
+    garbage = CollectionCalendar.nextCollectionDates(CollectionCalendar.weekdayAnchors(["THU", "FRI"]),
+                                                     np.datetime64("2026-12-24"), 7, HOLIDAYS, SHIFTS)
+    assert garbage.tolist() == [datetime.date(2026, 12, 24), datetime.date(2026, 12, 26)]
+
+
+def test_unknown_day_or_area_is_nat():
+    garbage, recycling = CollectionCalendar.nextPickups(["NOPE", None], ["C", None], CYCLES,
+                                                        datetime.date(2026, 11, 23), HOLIDAYS, SHIFTS)
+    assert np.isnat(garbage).all() and np.isnat(recycling).all()
+
+
+@pytest.mark.parametrize("period", [7, 14])
+def test_matches_a_walk_of_the_calendar(period):
+    anchors = np.array(dates("2026-01-05", "2026-01-08", "2026-01-09", "2026-01-15", "2026-12-31", "2025-11-27"))
+    for today in np.arange(np.datetime64("2026-11-16"), np.datetime64("2027-01-10")):
+        expected = [walk(anchor, today, period, HOLIDAYS, SHIFTS) for anchor in anchors]
+        assert CollectionCalendar.nextCollectionDates(anchors, today, period, HOLIDAYS, SHIFTS).tolist() == \
+            [value.astype(datetime.date) for value in expected]
+
+
+def test_read_tables(tmp_path):
+    holidays = tmp_path / "holidays.csv"
+    holidays.write_text("DATE,SHIFT\n2026-11-26,1\n2026-12-25,\n")
+    cycles = tmp_path / "recycle_cycles.csv"
+    cycles.write_text("rcdarea,start\nA,2026-01-05\nB,2026-01-12\n,2026-01-19\n")
+
+    read_holidays, read_shifts = CollectionCalendar.readHolidays(str(holidays))
+    assert read_holidays.tolist() == HOLIDAYS.tolist()
+    assert read_shifts.tolist() == [1, 1]
+    assert CollectionCalendar.readRecycleCycles(str(cycles)) == CYCLES
@@ -0,0 +1,96 @@
+"""
+test_CollectionZoneIndex.py: Checks SolidWaste/CollectionZoneIndex.py against a brute force point in polygon test, and
+that a saved index answers the same as the one it was saved from.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import numpy as np
+
+import CollectionZoneIndex
+
+# FIELDS: LIST the fields of the test zones.
+FIELDS = [{"name": "DAY", "type": "String", "length": 16}, {"name": "ROUTE", "type": "String", "length": 16}]
+
+
+def gridZones():
+    """
+    Return a 6 by 6 grid of 10 foot zones, one with a hole, a zone without rings and a zone laid over four grid zones.
+    """
+    zones = []
+    for r in range(6):
+        for c in range(6):
+            ring = np.array([(c, r), (c, r + 1), (c + 1, r + 1), (c + 1, r)], dtype=np.float64) * 10.0
+            zones.append(([ring], ["DAY{0}".format(r), "R{0:03d}".format(len(zones))]))
+    zones[7][0].append(np.array([(12, 12), (12, 18), (18, 18), (18, 12)], dtype=np.float64))
+    zones.append(([], ["NONE", "R036"]))
+    zones.append(([np.array([(30, 30), (30, 50), (50, 50), (50, 30)], dtype=np.float64)], ["OVER", "R037"]))
+    return zones
+
+
+def bruteForce(zones, x, y):
+    """
+    Return every (point, zone) pair where the point is inside the zone, by the even-odd rule over every edge of every
+    zone, one point at a time.
+    """
+    pairs = []
+    for p in range(len(x)):
+        for number, (rings, attributes) in enumerate(zones):
+            inside = False
+            for ring in rings:
+                for (x1, y1), (x2, y2) in zip(ring, np.roll(ring, -1, axis=0)):
+                    if (y1 > y[p]) != (y2 > y[p]) and x[p] < x1 + (y[p] - y1) * (x2 - x1) / (y2 - y1):
+                        inside = not inside
+            if inside:
+                pairs.append((p, number))
+    return pairs
+
+
+def test_query_points_matches_brute_force():
+    zones = gridZones()
+    rs = np.random.RandomState(12)
+    x, y = rs.rand(500) * 70.0 - 5.0, rs.rand(500) * 70.0 - 5.0
+
+    index = CollectionZoneIndex.buildZoneIndex(zones, FIELDS, capacity=4)
+    point, zone = CollectionZoneIndex.queryPoints(index, x, y)
+
+    assert list(zip(point.tolist(), zone.tolist())) == bruteForce(zones, x, y)
+
+
+def test_zones_at():
+    index = CollectionZoneIndex.buildZoneIndex(gridZones(), FIELDS)
+    assert CollectionZoneIndex.zonesAt(index, 5.0, 5.0) == [0]
+    assert CollectionZoneIndex.zonesAt(index, 15.0, 15.0) == []
+    assert CollectionZoneIndex.zonesAt(index, 35.0, 45.0) == [27, 37]
+    assert CollectionZoneIndex.zonesAt(index, 65.0, 5.0) == []
+    assert index["attributes"][37] == ["OVER", "R037"]
+
+
+def test_saved_index_answers_the_same(tmp_path):
+    zones = gridZones()
+    index = CollectionZoneIndex.buildZoneIndex(zones, FIELDS, "fingerprint")
+    path = str(tmp_path / "zones.npz")
+    CollectionZoneIndex.saveZoneIndex(index, path)
+    loaded = CollectionZoneIndex.loadZoneIndex(path)
+
+    assert loaded["fields"] == FIELDS
+    assert loaded["attributes"] == [attributes for rings, attributes in zones]
+    assert loaded["fingerprint"] == "fingerprint"
+
+    rs = np.random.RandomState(3)
+    x, y = rs.rand(200) * 60.0, rs.rand(200) * 60.0
+    for expected, actual in zip(CollectionZoneIndex.queryPoints(index, x, y),
+                                CollectionZoneIndex.queryPoints(loaded, x, y)):
+        assert actual.tolist() == expected.tolist()
+
+
+def test_missing_or_broken_file_loads_as_none(tmp_path):
+    assert CollectionZoneIndex.loadZoneIndex(str(tmp_path / "missing.npz")) is None
+
+    broken = tmp_path / "broken.npz"
+    broken.write_bytes(b"not a zip file")
+    assert CollectionZoneIndex.loadZoneIndex(str(broken)) is None
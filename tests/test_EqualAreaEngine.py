@@ -0,0 +1,81 @@
+"""
+test_EqualAreaEngine.py: Checks the area profile of Editing/EqualAreaEngine.py against areas worked out by hand.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import numpy as np
+import pytest
+
+import EqualAreaEngine
+
+# SQUARE: LIST a 10 by 10 square, area 100.
+# TRIANGLE: LIST a triangle with a base of 10 on y = 0 and its apex at y = 10, area 50.
+# SQUARE_WITH_HOLE: LIST the square with a 2 by 2 hole from y = 2 to y = 4, area 96.
+SQUARE = [[(0, 0), (0, 10), (10, 10), (10, 0)]]
+TRIANGLE = [[(0, 0), (5, 10), (10, 0)]]
+SQUARE_WITH_HOLE = SQUARE + [[(2, 2), (4, 2), (4, 4), (2, 4)]]
+
+
+def edgeTable(rings, offset=(0.0, 0.0)):
+    """
+    Return the edge table of a polygon, moved by offset.
+    """
+    return EqualAreaEngine.buildEdgeTable(EqualAreaEngine.ringsToEdges(
+        [[(x + offset[0], y + offset[1]) for x, y in ring] for ring in rings]))
+
+
+def test_area_below_square():
+    assert EqualAreaEngine.areaBelow(edgeTable(SQUARE), [-1.0, 3.0, 5.0, 20.0]).tolist() == [0.0, 30.0, 50.0, 100.0]
+    assert EqualAreaEngine.areaBelow(edgeTable(SQUARE), 2.5) == 25.0
+
+
+def test_area_below_ignores_ring_direction():
+    reversed_square = [ring[::-1] for ring in SQUARE]
+    assert EqualAreaEngine.areaBelow(edgeTable(reversed_square), 3.0) == pytest.approx(30.0)
+
+
+def test_area_below_triangle():
+    # The part above y is a triangle similar to the whole, so the area below is 50 * (1 - ((10 - y) / 10) ** 2).
+    table = edgeTable(TRIANGLE)
+    assert table["total"] == pytest.approx(50.0)
+    assert EqualAreaEngine.areaBelow(table, [3.0, 5.0]) == pytest.approx([25.5, 37.5])
+
+
+def test_area_below_square_with_hole():
+    table = edgeTable(SQUARE_WITH_HOLE)
+    assert table["total"] == pytest.approx(96.0)
+    assert EqualAreaEngine.areaBelow(table, [2.0, 3.0, 5.0]) == pytest.approx([20.0, 28.0, 46.0])
+
+
+def test_build_area_profile():
+    profile = EqualAreaEngine.buildAreaProfile(edgeTable(SQUARE_WITH_HOLE))
+    assert profile["ys"].tolist() == [0.0, 2.0, 4.0, 10.0]
+    assert profile["area"] == pytest.approx([0.0, 20.0, 36.0, 96.0])
+    assert profile["width"] == pytest.approx([10.0, 8.0, 10.0])
+    assert profile["total"] == pytest.approx(96.0)
+
+
+def test_height_for_area():
+    assert EqualAreaEngine.heightForArea(EqualAreaEngine.buildAreaProfile(edgeTable(SQUARE)),
+                                         [25.0, 50.0, 75.0]) == pytest.approx([2.5, 5.0, 7.5])
+
+    # Half of the triangle lies below 10 - 10 / sqrt(2).
+    profile = EqualAreaEngine.buildAreaProfile(edgeTable(TRIANGLE))
+    assert EqualAreaEngine.heightForArea(profile, 25.0) == pytest.approx(10.0 - 10.0 / np.sqrt(2.0))
+
+    # 20 lies below the hole, the other 5 across it where the square is 8 wide.
+    profile = EqualAreaEngine.buildAreaProfile(edgeTable(SQUARE_WITH_HOLE))
+    assert EqualAreaEngine.heightForArea(profile, 25.0) == pytest.approx(2.625)
+
+
+def test_height_for_area_on_projected_coordinates():
+    # State plane coordinates are in the millions of feet, the profile has to keep its precision there.
+    table = edgeTable(TRIANGLE, offset=(2500000.0, 7000000.0))
+    profile = EqualAreaEngine.buildAreaProfile(table)
+    cut_ys = EqualAreaEngine.heightForArea(profile, [table["total"] * k / 4.0 for k in range(1, 4)])
+    assert EqualAreaEngine.areaBelow(table, cut_ys) == pytest.approx([12.5, 25.0, 37.5], abs=1e-6)
@@ -0,0 +1,98 @@
+"""
+test_SpatialIndex.py: Checks Common/SpatialIndex.py against a brute force point in polygon test, and that every tool
+folder ships the same copy of it.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import numpy as np
+import os
+import pytest
+
+import SpatialIndex
+
+# ROOT: STRING the root of the repository.
+# COPIES: LIST the tool folders that ship a copy of SpatialIndex.py.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COPIES = ["EmergencyManagement", "SolidWaste"]
+
+
+def bruteForce(polygons, x, y):
+    """
+    Return every (point, polygon) pair where the point is inside the polygon, by the even-odd rule over every edge of
+    every polygon, one point at a time.
+    """
+    pairs = []
+    for p in range(len(x)):
+        for number, rings in enumerate(polygons):
+            inside = False
+            for ring in rings:
+                for i in range(len(ring)):
+                    (x1, y1), (x2, y2) = ring[i], ring[(i + 1) % len(ring)]
+                    if (y1 > y[p]) != (y2 > y[p]) and x[p] < x1 + (y[p] - y1) * (x2 - x1) / (y2 - y1):
+                        inside = not inside
+            if inside:
+                pairs.append((p, number))
+    return pairs
+
+
+def gridPolygons():
+    """
+    Return a 10 by 10 grid of unit squares, one with a hole, an empty polygon, a triangle over the grid and a square
+    made of two parts.
+    """
+    polygons = [[[(c, r), (c, r + 1), (c + 1, r + 1), (c + 1, r)]] for r in range(10) for c in range(10)]
+    polygons[0].append([(0.25, 0.25), (0.25, 0.75), (0.75, 0.75), (0.75, 0.25)])
+    polygons.append([])
+    polygons.append([[(2, 2), (8, 2), (5, 9)]])
+    polygons.append([[(20, 20), (20, 21), (21, 21), (21, 20)], [(30, 30), (30, 31), (31, 31), (31, 30)]])
+    return polygons
+
+
+@pytest.mark.parametrize("folder", COPIES)
+def test_copies_match_common(folder):
+    with open(os.path.join(ROOT, "Common", "SpatialIndex.py"), "rb") as source:
+        with open(os.path.join(ROOT, folder, "SpatialIndex.py"), "rb") as copy:
+            assert copy.read() == source.read()
+
+
+@pytest.mark.parametrize("capacity", [2, 4, 16])
+def test_query_points_matches_brute_force(capacity):
+    polygons = gridPolygons()
+    rs = np.random.RandomState(7)
+    x = np.concatenate([rs.rand(400) * 12 - 1, [20.5, 30.5, 25.0]])
+    y = np.concatenate([rs.rand(400) * 12 - 1, [20.5, 30.5, 25.0]])
+
+    index = SpatialIndex.buildIndex(polygons, capacity)
+    point, polygon = SpatialIndex.queryPoints(index, x, y, max_edges=50)
+
+    assert list(zip(point.tolist(), polygon.tolist())) == bruteForce(polygons, x, y)
+
+
+def test_polygon_at_takes_the_first_polygon():
+    index = SpatialIndex.buildIndex(gridPolygons())
+
+    # In the hole of square 0, in square 0, in square 35 and under the triangle, outside everything, in each part.
+    polygon = SpatialIndex.polygonAt(index, [0.5, 0.1, 5.5, 50.0, 20.5, 30.5], [0.5, 0.1, 3.5, 50.0, 20.5, 30.5])
+    assert polygon.tolist() == [-1, 0, 35, -1, 102, 102]
+
+
+def test_empty_index_and_no_points():
+    assert SpatialIndex.polygonAt(SpatialIndex.buildIndex([]), [1.0], [1.0]).tolist() == [-1]
+    assert SpatialIndex.polygonAt(SpatialIndex.buildIndex(gridPolygons()), [], []).tolist() == []
+
+
+def test_polygon_rings_splits_parts_and_holes():
+    class Point(object):
+        def __init__(self, x, y):
+            self.X, self.Y = x, y
+
+    shape = [[Point(0, 0), Point(0, 4), Point(4, 4), None, Point(1, 1), Point(1, 2), Point(2, 2)],
+             [Point(5, 5), Point(5, 6), Point(6, 6)]]
+    assert SpatialIndex.polygonRings(shape) == [[(0, 0), (0, 4), (4, 4)], [(1, 1), (1, 2), (2, 2)],
+                                                [(5, 5), (5, 6), (6, 6)]]
+    assert SpatialIndex.polygonRings(None) == []
@@ -0,0 +1,63 @@
+"""
+test_USNG.py: Checks EmergencyManagement/USNG.py against published U.S. National Grid labels and UTM coordinates.
+"""
+
+__author__ = "Mark Buie | GIS Coordinator | City of Mesquite"
+__maintainer__ = "Mark Buie"
+__email__ = "mbuie@cityofmesquite.com"
+__status__ = "Development"
+
+
+import numpy as np
+import pytest
+
+import USNG
+
+# WASHINGTON_MONUMENT: TUPLE the latitude and longitude of the Washington Monument, the example of the USNG standard.
+# WASHINGTON_MONUMENT_UTM: TUPLE its UTM zone, easting and northing, 18S 323486 4306483.
+WASHINGTON_MONUMENT = (38.8895, -77.0352)
+WASHINGTON_MONUMENT_UTM = (18, 323486.0, 4306483.0)
+
+
+def test_washington_monument_label():
+    latitude, longitude = WASHINGTON_MONUMENT
+    assert USNG.usngLabels(latitude, longitude, 10) == ["18S UJ 2348 0648"]
+    assert USNG.usngLabels(latitude, longitude, 1000) == ["18S UJ 23 06"]
+    assert USNG.usngLabels(latitude, longitude, 100000) == ["18S UJ"]
+
+
+def test_washington_monument_utm():
+    zone, easting, northing = USNG.toUTM([WASHINGTON_MONUMENT[0]], [WASHINGTON_MONUMENT[1]])
+    assert zone.tolist() == [WASHINGTON_MONUMENT_UTM[0]]
+    assert easting[0] == pytest.approx(WASHINGTON_MONUMENT_UTM[1], abs=1.0)
+    assert northing[0] == pytest.approx(WASHINGTON_MONUMENT_UTM[2], abs=1.0)
+
+
+def test_equator_on_the_central_meridian():
+    # Zone 18 is even, so its rows start at F, and its column letters are the third set, S to Z.
+    assert USNG.usngLabels([0.0], [-75.0], 1) == ["18N WF 00000 00000"]
+
+
+def test_southern_hemisphere_is_symmetric():
+    zone, easting, northing = USNG.toUTM(np.array([-30.0, 30.0, -30.0]), np.array([-73.0, -73.0, -77.0]))
+    assert zone.tolist() == [18, 18, 18]
+    assert northing[0] == pytest.approx(USNG.FALSE_NORTHING - northing[1])
+    assert easting[0] - USNG.FALSE_EASTING == pytest.approx(USNG.FALSE_EASTING - easting[2])
+    assert USNG.usngLabels([-30.0], [-73.0], 100000)[0].startswith("18J ")
+
+
+def test_zone_exceptions():
+    # Southern Norway is in the wide zone 32V and Svalbard only uses the odd zones 31 to 37.
+    zone = USNG.utmZone(np.array([60.0, 60.0, 78.0, 78.0]), np.array([5.0, 2.0, 10.0, 8.0]))
+    assert zone.tolist() == [32, 31, 33, 31]
+    assert USNG.usngLabels([60.0], [5.0], 100000)[0].startswith("32V ")
+
+
+def test_outside_the_utm_latitudes():
+    assert USNG.usngLabels([85.0, -81.0, 38.8895], [0.0, 0.0, -77.0352], 1000) == [None, None, "18S UJ 23 06"]
+    assert USNG.usngLabels([], [], 1000) == []
+
+
+def test_precision_must_be_a_power_of_ten():
+    with pytest.raises(ValueError):
+        USNG.usngLabels([38.8895], [-77.0352], 5)